@@ -0,0 +1,375 @@
+import copy
+from dataclasses import dataclass
+import numpy as np
+import typeRelation
+import battle_log
+from trainer import Trainer
+from battle_engine import Battle
+from battle_logic import BOOST_ABILITIES, MULTI_HIT_COUNTS, MULTI_HIT_ODDS, calculate_damage_batch
+
+# ---------------------- LOCKSTEP BATCH SIMULATOR ---------------------- #
+#
+# Simulates N independent 1v1 battles between the same two Pokémon at once. Every per-battle
+# value (HP, status, toxic counter, stats, item flags) lives in a NumPy array with one entry
+# per battle, and each turn advances every unfinished battle together, following the battle
+# engine's rules: select_order for move order, perform_move for moves, then the item and
+# ability hooks and residual status damage. Both sides pick moves at random (or from fixed
+# move probabilities), like rollout_ai.random_policy.
+
+NONE, BURN, POISON, BADLY_POISON, PARALYZE, SLEEP, FREEZE, OTHER = range(8)
+STATUS_CODES = {None: NONE, "burn": BURN, "poison": POISON, "badly_poison": BADLY_POISON,
+                "paralyze": PARALYZE, "sleep": SLEEP, "freeze": FREEZE}
+
+STATS = ["attack", "sp_attack", "defense", "sp_defense", "speed"]  # perform_move's StatChange order
+ATTACK, SP_ATTACK, DEFENSE, SP_DEFENSE, SPEED = range(5)
+
+CHOICE_ITEMS = ["choice-band", "choice-scarf", "choice-specs"]
+
+
+class Side:
+    """Per-move and per-Pokémon constants of one side, read after the battle's switch-in effects."""
+
+    def __init__(self, pokemon, opponent):
+        moves = list(pokemon.moves.values())
+        self.name = pokemon.name
+        self.level = pokemon.level
+        self.max_hp = pokemon.max_hp
+        self.ability = pokemon.ability
+        self.item = pokemon.item["name"] if pokemon.item else None
+        self.poison_type = "poison" in pokemon.typing
+        self.accuracy_ratio = pokemon.accuracy / opponent.evasion
+        self.crit_chance = (1 / 24) * pokemon.critical_hit
+        self.crit_multiplier = pokemon.critical_multiplier
+        self.initial = np.array([pokemon.initial_stats[stat] for stat in STATS], dtype=np.float64)
+        self.stats = np.array([pokemon.current_stats[stat] for stat in STATS], dtype=np.float64)
+        # White Herb restores the first lowered stat in current_stats order
+        self.herb_order = [STATS.index(stat) for stat in pokemon.current_stats if stat in STATS]
+
+        physical = np.array([move["effectiveState"] == "physical" for move in moves])
+        self.physical = physical
+        self.priority = np.array([move["priority"] for move in moves])
+        self.power = np.array([move["power"] or 0 for move in moves], dtype=np.float64)
+        self.accuracy = np.array([move["accuracy"] for move in moves], dtype=np.float64)
+        self.multi_hit = np.array([bool(move["multi_hit"]) for move in moves])
+        self.crit_attack = np.array([pokemon.base_stats["attack" if p else "sp_attack"] for p in physical], dtype=np.float64)
+        self.crit_defense = np.array([opponent.base_stats["defense" if p else "sp_defense"] for p in physical], dtype=np.float64)
+        self.stab = np.array([pokemon.stab_multiplier if move["type"] in pokemon.typing else 1 for move in moves], dtype=np.float64)
+        self.move_type = np.array([typeRelation.TYPE_INDEX[move["type"]] for move in moves])
+        self.defender_types = typeRelation.type_ids(opponent.typing)
+        self.boost = np.array([BOOST_ABILITIES.get(pokemon.ability) == move["type"] for move in moves])
+        self.immune = np.array([opponent.ability == "levitate" and move["type"] == "ground" for move in moves])
+        # perform_move spells Water Absorb differently in its multi-hit and single-hit branches
+        self.absorbed = np.array([opponent.ability == ("water absorb" if move["multi_hit"] else "water-absorb") and move["type"] == "water"
+                                  for move in moves])
+
+        # Seismic Toss / Night Shade deal the user's level (0 on an immune target); -1 = not a fixed-damage move
+        self.fixed = np.full(len(moves), -1)
+        for i, move in enumerate(moves):
+            if move["name"] == "seismic-toss":
+                self.fixed[i] = 0 if "ghost" in opponent.typing else pokemon.level
+            elif move["name"] == "night-shade":
+                self.fixed[i] = 0 if "normal" in opponent.typing else pokemon.level
+
+        self.stat_change = np.array([bool(move["StatChange"]) for move in moves])
+        self.user_multipliers = np.ones((len(moves), 5))
+        self.opp_multipliers = np.ones((len(moves), 5))
+        for i, move in enumerate(moves):
+            if move["StatChange"]:
+                self.user_multipliers[i] = move["StatChange"][0][:5]
+                self.opp_multipliers[i] = move["StatChange"][0][5:10]
+        self.heals = np.array([move["heals"] or 0 for move in moves], dtype=np.float64)
+        self.damage_heals = np.array([bool(move["damageHeals"]) for move in moves])
+        self.status = np.array([STATUS_CODES.get(move["statusChange"][0], OTHER) if move["statusChange"] else NONE for move in moves])
+        self.status_chance = np.array([move["statusChange"][1] if move["statusChange"] else 0 for move in moves], dtype=np.float64)
+        self.status_immune = np.array([bool(move["statusChange"]) and typeRelation.is_status_immune(move["statusChange"][0], opponent.typing)
+                                       for move in moves])
+
+
+@dataclass
+class BatchResult:
+    """Outcome counts of a batch of battles between pokemon1 (side 1) and pokemon2 (side 2)."""
+    battles: int
+    wins1: int
+    wins2: int
+    unfinished: int  # Battles that hit the turn limit
+    mean_turns: float
+
+    @property
+    def win_rate(self):
+        """Side 1's win rate."""
+        return self.wins1 / self.battles
+
+
+class BatchBattles:
+    """N lockstep 1v1 battles as arrays indexed [side, battle] (stats: [side, stat, battle])."""
+
+    def __init__(self, pokemon1, pokemon2, n_battles, max_turns=100, policies=None, rng=None):
+        # Run the engine's battle start on copies, so switch-in items and abilities apply exactly as in a real battle
+        pokemon1, pokemon2 = copy.deepcopy(pokemon1), copy.deepcopy(pokemon2)
+        battle = Battle(Trainer("Side 1", [pokemon1]), Trainer("Side 2", [pokemon2]), None, None)
+        with battle_log.sink_to(battle.sink):
+            battle.start()
+
+        self.sides = (Side(pokemon1, pokemon2), Side(pokemon2, pokemon1))
+        self.n = n_battles
+        self.max_turns = max_turns
+        self.rng = np.random.default_rng() if rng is None else rng
+        self.policies = [None, None] if policies is None else [None if p is None else np.asarray(p, dtype=np.float64) for p in policies]
+
+        self.hp = np.array([[pokemon1.hp], [pokemon2.hp]]).repeat(n_battles, axis=1)
+        self.status = np.array([[STATUS_CODES.get(pokemon1.status, OTHER)], [STATUS_CODES.get(pokemon2.status, OTHER)]],
+                               dtype=np.int8).repeat(n_battles, axis=1)
+        self.toxic = np.zeros((2, n_battles), dtype=np.int64)
+        self.stats = np.stack([np.repeat(side.stats[:, None], n_battles, axis=1) for side in self.sides])
+        self.item_used = np.array([[bool(p.item and p.item.get("used"))] for p in (pokemon1, pokemon2)]).repeat(n_battles, axis=1)
+        self.choice_lock = np.full((2, n_battles), -1, dtype=np.int64)
+        self.winner = np.zeros(n_battles, dtype=np.int8)  # 0 while running, else 1 or 2
+        self.turn = np.zeros(n_battles, dtype=np.int64)
+
+
+    # -------- helpers (b = array of battle indexes) -------- #
+
+    def damage(self, b, s, mv):
+        """calculate_damage for side s using move slots mv in battles b."""
+        side = self.sides[s]
+        physical = side.physical[mv]
+        attack = np.where(physical, self.stats[s, ATTACK, b], self.stats[s, SP_ATTACK, b])
+        defense = np.where(physical, self.stats[1 - s, DEFENSE, b], self.stats[1 - s, SP_DEFENSE, b])
+        crit_rolls = self.rng.random(len(b))
+        random_rolls = self.rng.uniform(0.85, 1.0, len(b))
+        return calculate_damage_batch(side.level, side.power[mv], attack, defense, side.crit_attack[mv], side.crit_defense[mv],
+                                      side.move_type[mv], *side.defender_types, side.stab[mv],
+                                      self.status[s, b] == BURN, side.boost[mv] & (self.hp[s, b] <= side.max_hp // 3),
+                                      side.crit_chance, side.crit_multiplier, size=len(b),
+                                      crit_rolls=crit_rolls, random_rolls=random_rolls)
+
+
+    def take_damage(self, b, s, damage):
+        self.hp[s, b] = np.maximum(0, self.hp[s, b] - damage)
+
+
+    def heal(self, b, s, amount):
+        self.hp[s, b] = np.minimum(self.sides[s].max_hp, self.hp[s, b] + amount)
+
+
+    def set_stats(self, b, s, multipliers):
+        """stats_change for all five stats: each becomes int(initial * multiplier), at least 1."""
+        initial = self.sides[s].initial[:, None]
+        self.stats[s][:, b] = np.maximum(1, (initial * multipliers.T).astype(np.int64))
+
+
+    # -------- turn steps -------- #
+
+    def choose(self, b, s):
+        side = self.sides[s]
+        n_moves = len(side.power)
+        policy = self.policies[s]
+        if policy is None:
+            chosen = self.rng.integers(n_moves, size=len(b))
+        else:
+            chosen = self.rng.choice(n_moves, size=len(b), p=policy)
+
+        if side.item in CHOICE_ITEMS:
+            locked = self.choice_lock[s, b]
+            chosen = np.where(locked >= 0, locked, chosen)
+            self.choice_lock[s, b] = chosen
+        return chosen
+
+
+    def first_side(self, b, moves):
+        """select_order: priority, then Quick Claw, then speed, then a coin flip. Returns the side that moves first."""
+        priority1, priority2 = self.sides[0].priority[moves[0]], self.sides[1].priority[moves[1]]
+        speed1, speed2 = self.stats[0, SPEED, b], self.stats[1, SPEED, b]
+        first = np.where(speed1 > speed2, 0, np.where(speed2 > speed1, 1, self.rng.integers(2, size=len(b))))
+
+        same_priority = priority1 == priority2
+        if self.sides[1].item == "quick-claw":
+            first = np.where(same_priority & (self.rng.random(len(b)) < 0.2), 1, first)
+        if self.sides[0].item == "quick-claw":
+            first = np.where(same_priority & (self.rng.random(len(b)) < 0.2), 0, first)
+        return np.where(same_priority, first, np.where(priority1 > priority2, 0, 1))
+
+
+    def perform_move(self, b, s, mv):
+        side, d = self.sides[s], 1 - s
+
+        # Sleep / freeze: skip the turn, 40% chance to recover. Paralysis: 30% chance to skip
+        status = self.status[s, b]
+        asleep = (status == SLEEP) | (status == FREEZE)
+        self.status[s, b[asleep & (self.rng.random(len(b)) < 0.4)]] = NONE
+        paralyzed = (status == PARALYZE) & (self.rng.random(len(b)) <= 0.3)
+        acting = ~asleep & ~paralyzed
+
+        # Multi-hit moves skip the accuracy check; hits are independent rolls
+        multi = acting & side.multi_hit[mv]
+        if multi.any():
+            mb, mm = b[multi], mv[multi]
+            hits = self.rng.choice(MULTI_HIT_COUNTS, size=len(mb), p=MULTI_HIT_ODDS)
+            hit_battles, hit_moves = np.repeat(mb, hits), np.repeat(mm, hits)
+            total = np.zeros(self.n, dtype=np.int64)
+            np.add.at(total, hit_battles, self.damage(hit_battles, s, hit_moves))
+            blocked = side.immune[mm]
+            absorbed = side.absorbed[mm] & ~blocked
+            self.heal(mb[absorbed], d, total[mb[absorbed]])
+            hurt = ~blocked & ~absorbed
+            self.take_damage(mb[hurt], d, total[mb[hurt]])
+
+        single = acting & ~side.multi_hit[mv]
+        single &= self.rng.random(len(b)) < side.accuracy[mv] * side.accuracy_ratio
+        sb, sm = b[single], mv[single]
+
+        fixed = side.fixed[sm] >= 0
+        self.take_damage(sb[fixed], d, side.fixed[sm[fixed]])
+        sb, sm = sb[~fixed], sm[~fixed]
+
+        # Levitate and Water Absorb end the move before any secondary effect
+        damaging = side.power[sm] > 0
+        stopped = damaging & (side.immune[sm] | side.absorbed[sm])
+        absorbed = damaging & side.absorbed[sm] & ~side.immune[sm]
+        if absorbed.any():
+            self.heal(sb[absorbed], d, self.damage(sb[absorbed], s, sm[absorbed]))
+        hurt = damaging & ~stopped
+        if hurt.any():
+            self.take_damage(sb[hurt], d, self.damage(sb[hurt], s, sm[hurt]))
+        sb, sm = sb[~stopped], sm[~stopped]
+
+        changes = side.stat_change[sm]
+        if changes.any():
+            self.set_stats(sb[changes], s, side.user_multipliers[sm[changes]])
+            self.set_stats(sb[changes], d, side.opp_multipliers[sm[changes]])
+
+        heals = side.heals[sm] > 0
+        self.heal(sb[heals], s, (side.max_hp * side.heals[sm[heals]]).astype(np.int64))
+        drains = side.damage_heals[sm]
+        if drains.any():
+            self.heal(sb[drains], s, self.damage(sb[drains], s, sm[drains]))
+
+        inflicts = (side.status[sm] != NONE) & (self.status[d, sb] == NONE) & ~side.status_immune[sm]
+        inflicts &= self.rng.random(len(sb)) < side.status_chance[sm]
+        self.status[d, sb[inflicts]] = side.status[sm[inflicts]]
+
+
+    def item_hook(self, b, s, when):
+        """check_item_use for side s in battles b."""
+        side, item = self.sides[s], self.sides[s].item
+        if item == "leftovers" and when == "end":
+            self.heal(b, s, side.max_hp // 16)
+        elif item == "black-sludge" and when == "end":
+            if side.poison_type:
+                self.heal(b, s, side.max_hp // 16)
+            else:
+                self.take_damage(b, s, side.max_hp // 16)
+        elif item == "white-herb":
+            b = b[~self.item_used[s, b]]
+            lowered = self.stats[s][:, b] < side.initial[:, None]
+            for stat in side.herb_order:
+                restore = lowered[stat]
+                self.stats[s, stat, b[restore]] = side.initial[stat]
+                self.item_used[s, b[restore]] = True
+                lowered[:, restore] = False
+        elif item == "sitrus-berry":
+            b = b[~self.item_used[s, b] & (self.hp[s, b] < side.max_hp // 2)]
+            self.heal(b, s, side.max_hp // 4)
+            self.item_used[s, b] = True
+        elif item == "lum-berry":
+            b = b[~self.item_used[s, b] & (self.status[s, b] != NONE)]
+            self.status[s, b] = NONE
+            self.item_used[s, b] = True
+        elif item == "clear-amulet":
+            self.stats[s][:, b] = np.maximum(self.stats[s][:, b], side.initial[:, None])
+        elif item == "rocky-helmet" and when == "defend":
+            self.take_damage(b, 1 - s, self.sides[1 - s].max_hp // 6)
+
+
+    def ability_hook(self, b, s, when):
+        """check_ability_use for side s in battles b ("defend" and "end"; switch-in ran at setup)."""
+        side, opp, ability = self.sides[s], 1 - s, self.sides[s].ability
+        if when == "defend":
+            if ability == "rough-skin":
+                self.take_damage(b, opp, self.sides[opp].max_hp // 8)
+            elif ability == "stamina":
+                self.stats[s, DEFENSE, b] = (self.stats[s, DEFENSE, b] * 1.5).astype(np.int64)
+            elif ability == "static":
+                b = b[self.rng.random(len(b)) < 0.3]
+                self.status[opp, b] = PARALYZE
+                self.stats[opp, SPEED, b] = self.stats[opp, SPEED, b] // 2
+            elif ability == "poison-point":
+                self.status[opp, b[self.rng.random(len(b)) < 0.3]] = POISON
+        elif when == "end":
+            if ability == "self-sufficient":
+                self.heal(b, s, side.max_hp // 8)
+            elif ability == "poison-heal":
+                b = b[self.status[s, b] == POISON]
+                self.heal(b, s, side.max_hp // 8)
+            elif ability == "speed-boost":
+                self.stats[s, SPEED, b] *= 1.5
+
+
+    def status_damage(self, b, s):
+        """apply_status_damage for side s in battles b."""
+        max_hp = self.sides[s].max_hp
+        status = self.status[s, b]
+        self.take_damage(b[status == BURN], s, max_hp // 16)
+        self.take_damage(b[status == POISON], s, max_hp // 8)
+        toxic = b[status == BADLY_POISON]
+        self.toxic[s, toxic] += 1
+        self.take_damage(toxic, s, (self.toxic[s, toxic] * max_hp) // 16)
+
+
+    def finish(self, b, winner):
+        self.winner[b] = winner
+
+
+    def play_turn(self):
+        """Advance every unfinished battle by one turn."""
+        b = np.flatnonzero((self.winner == 0) & (self.turn < self.max_turns))
+        self.turn[b] += 1
+        moves = (self.choose(b, 0), self.choose(b, 1))
+        first = self.first_side(b, moves)
+
+        # Each side acts in turn order; a faint ends the (1v1) battle at once
+        for step in (0, 1):
+            running = self.winner[b] == 0
+            for s in (0, 1):
+                acting = running & ((first == s) if step == 0 else (first != s))
+                ab, mv = b[acting], moves[s][acting]
+                self.perform_move(ab, s, mv)
+                self.item_hook(ab, s, "attack")
+                self.item_hook(ab, 1 - s, "defend")
+                self.ability_hook(ab, 1 - s, "defend")
+                self.finish(ab[self.hp[1 - s, ab] == 0], s + 1)
+
+        # End-of-turn hooks, then residual status damage; side 1 is checked for fainting first
+        b = b[self.winner[b] == 0]
+        for s in (0, 1):
+            self.item_hook(b, s, "end")
+            self.ability_hook(b, s, "end")
+        for s in (0, 1):
+            self.status_damage(b, s)
+        self.finish(b[self.hp[0, b] == 0], 2)
+        b = b[self.winner[b] == 0]
+        self.finish(b[self.hp[1, b] == 0], 1)
+
+
+    def run(self):
+        while ((self.winner == 0) & (self.turn < self.max_turns)).any():
+            self.play_turn()
+        return BatchResult(self.n, int((self.winner == 1).sum()), int((self.winner == 2).sum()),
+                           int((self.winner == 0).sum()), float(self.turn.mean()))
+
+
+def simulate_matchup(pokemon1, pokemon2, n_battles, max_turns=100, policies=None, seed=None, chunk_size=100_000):
+    """
+    Play `n_battles` random-move 1v1 battles of pokemon1 vs pokemon2 in lockstep batches of
+    at most `chunk_size` and return the combined BatchResult. `policies` optionally gives each
+    side's move probabilities (by move slot) instead of uniform choice.
+    """
+    rng = np.random.default_rng(seed)
+    wins1 = wins2 = unfinished = 0
+    total_turns = 0.0
+    for start in range(0, n_battles, chunk_size):
+        n = min(chunk_size, n_battles - start)
+        result = BatchBattles(pokemon1, pokemon2, n, max_turns, policies, rng).run()
+        wins1, wins2, unfinished = wins1 + result.wins1, wins2 + result.wins2, unfinished + result.unfinished
+        total_turns += result.mean_turns * n
+    return BatchResult(n_battles, wins1, wins2, unfinished, total_turns / n_battles)
@@ -1,34 +1,26 @@
-import random
-import pickle
+import battle_rng
+from q_table import QTable, encode_state, load_table, move_slots
 
-# Load Q-table from a file
-Q_table = {}
+# Q-table, memory-mapped read-only on first use
+Q_table = None
 
-def load_Q_table(filename="final_qtable/q_table.pkl"):
+def load_Q_table(filename="final_qtable/q_table.qtab"):
     """Load the Q-table from disk."""
     global Q_table
     try:
-        with open(filename, "rb") as f:
-            Q_table = pickle.load(f)
+        Q_table = load_table(filename)
     except FileNotFoundError:
         print("No Q-table found, using default random strategy.")
+        Q_table = QTable()
+    return Q_table
 
-load_Q_table()  # Load the Q-table when this module is imported
+def get_Q_table():
+    """Return the Q-table, loading it the first time it is needed."""
+    return Q_table if Q_table is not None else load_Q_table()
 
 def get_Q(state, action):
-    """Retrieve Q-value for a given state-action pair (defaulting to 0)."""
-    return Q_table.get((state, action), 0)
-
-def encode_state(attacker, defender):
-    """Encode the battle state as a tuple for Q-table lookup."""
-    return (
-        attacker.hp,
-        defender.hp,
-        tuple(attacker.typing),
-        tuple(defender.typing),
-        attacker.status,
-        defender.status
-    )
+    """Retrieve Q-value for a given state and move slot (defaulting to 0)."""
+    return get_Q_table().get(state, action)
 
 def battleAI(attacker, defender, last_move):
     """
@@ -38,14 +30,14 @@ def battleAI(attacker, defender, last_move):
       - 90% of the time, select the move with the highest Q-value (exploitation).
     """
     state = encode_state(attacker, defender)
-    moves = list(attacker.moves.keys())
+    moves = move_slots(attacker)
 
     if last_move and attacker.item["name"] in ["choice-band", "choice-scarf", "choice-specs"]:
         return last_move
 
-    if random.uniform(0, 1) < 0.1:  # 10% exploration
-        chosen_move = random.choice(moves)
+    if battle_rng.uniform(0, 1) < 0.1:  # 10% exploration
+        chosen_move = battle_rng.choice(moves)
     else:  # 90% exploitation
-        chosen_move = max(moves, key=lambda m: get_Q(state, m))
+        chosen_move = moves[get_Q_table().best_action(state, len(moves))]
 
     return chosen_move
@@ -0,0 +1,223 @@
+import battle_log
+import battle_rng
+from battle_log import Event
+
+# ---------------------- EFFECT REGISTRY ---------------------- #
+#
+# Held items and abilities register one handler(pokemon, opp) per battle phase they act in.
+# The registry is filled once, when this module is imported; effect_table() then turns an
+# (item, ability) pair into a phase -> (item handler, ability handler) table shared by every
+# Pokémon holding that pair, so checking a phase in which neither does anything is one lookup.
+# A new item or ability is a new registered function, not another branch in Pokemon.
+
+PHASES = ("initialize", "switch", "attack", "defend", "end")
+NO_EFFECTS = (None, None)
+
+ITEM_EFFECTS = {}     # item name -> {phase: handler}
+ABILITY_EFFECTS = {}  # ability name -> {phase: handler}
+tables = {}           # (item name, ability) -> {phase: (item handler, ability handler)}
+
+
+def register(effects, name, phases):
+    def decorator(handler):
+        for phase in phases or PHASES:
+            effects.setdefault(name, {})[phase] = handler
+        return handler
+    return decorator
+
+
+def item_effect(name, *phases):
+    """Register the decorated function as the item's handler in `phases` (every phase if none are given)."""
+    return register(ITEM_EFFECTS, name, phases)
+
+
+def ability_effect(name, *phases):
+    """Register the decorated function as the ability's handler in `phases` (every phase if none are given)."""
+    return register(ABILITY_EFFECTS, name, phases)
+
+
+def effect_table(item, ability):
+    """The phase -> (item handler, ability handler) table of an item name and ability; phases without effects are left out."""
+    table = tables.get((item, ability))
+    if table is None:
+        item_effects, ability_effects = ITEM_EFFECTS.get(item, {}), ABILITY_EFFECTS.get(ability, {})
+        table = tables[item, ability] = {phase: (item_effects.get(phase), ability_effects.get(phase))
+                                         for phase in PHASES if phase in item_effects or phase in ability_effects}
+    return table
+
+
+# ---------------------- ITEMS ---------------------- #
+
+@item_effect("leftovers", "end")
+def leftovers(pokemon, opp):
+    pokemon.hp = min(pokemon.max_hp, pokemon.hp + pokemon.max_hp // 16)  # Restores 1/16 of max HP at the end of turn
+
+
+@item_effect("black-sludge", "end")
+def black_sludge(pokemon, opp):
+    if "poison" in pokemon.typing:
+        pokemon.hp = min(pokemon.max_hp, pokemon.hp + pokemon.max_hp // 16)  # Heals if Poison-type
+    else:
+        pokemon.take_damage(pokemon.max_hp // 16, "black-sludge")  # Damages non-Poison types
+
+
+def stat_booster(stat):
+    def boost(pokemon, opp):
+        pokemon.current_stats[stat] = int(pokemon.current_stats[stat] * 1.5)  # Boosts the stat by 50%
+        pokemon.stats_changed()
+    return boost
+
+
+item_effect("choice-band", "switch")(stat_booster("attack"))
+item_effect("choice-scarf", "switch")(stat_booster("speed"))
+item_effect("choice-specs", "switch")(stat_booster("sp_attack"))
+item_effect("assault-vest", "switch")(stat_booster("sp_defense"))
+
+
+@item_effect("white-herb")
+def white_herb(pokemon, opp):
+    # Restores stats that were lowered once
+    if not pokemon.item["used"]:
+        initial_stat = pokemon.initial_stat_values()
+        for stat in pokemon.current_stats.keys():
+            if pokemon.current_stats[stat] < initial_stat[stat]:  # If a stat is lower than its original value
+                pokemon.current_stats[stat] = initial_stat[stat]
+                pokemon.item["used"] = True
+                pokemon.stats_changed()
+                break
+
+
+@item_effect("sitrus-berry")
+def sitrus_berry(pokemon, opp):
+    if not pokemon.item["used"] and pokemon.hp < pokemon.max_hp // 2:
+        pokemon.hp = min(pokemon.max_hp, pokemon.hp + pokemon.max_hp // 4)  # Heals 1/4 max HP when below 50% HP
+        pokemon.item["used"] = True
+
+
+@item_effect("lum-berry")
+def lum_berry(pokemon, opp):
+    if not pokemon.item["used"] and pokemon.status is not None:
+        pokemon.status = None  # Cures any status condition
+        pokemon.item["used"] = True
+
+
+@item_effect("clear-amulet")
+def clear_amulet(pokemon, opp):
+    # Prevents stat reductions
+    initial_stat = pokemon.initial_stat_values()
+    for stat in pokemon.current_stats.keys():
+        if pokemon.current_stats[stat] < initial_stat[stat]:
+            pokemon.current_stats[stat] = initial_stat[stat]
+            pokemon.stats_changed()
+
+
+@item_effect("life-orb", "switch")
+def life_orb(pokemon, opp):
+    for move in pokemon.moves.keys():
+        pokemon.moves[move]["power"] = int(pokemon.moves[move]["power"]*1.3)
+
+
+@item_effect("rocky-helmet", "defend")
+def rocky_helmet(pokemon, opp):
+    opp.take_damage(opp.max_hp // 6, "rocky-helmet")  # Deals damage to attackers who use contact moves
+
+
+@item_effect("light-ball", "switch")
+def light_ball(pokemon, opp):
+    if pokemon.name.lower() == "pikachu":
+        pokemon.current_stats["attack"] = int(pokemon.current_stats["attack"] * 2)  # Doubles Attack for Pikachu
+        pokemon.current_stats["sp_attack"] = int(pokemon.current_stats["sp_attack"] * 2)  # Doubles Special Attack for Pikachu
+        pokemon.stats_changed()
+
+
+# ---------------------- ABILITIES ---------------------- #
+
+@ability_effect("adaptability", "initialize")
+def adaptability(pokemon, opp):
+    pokemon.stab_multiplier = 2  # Boosts STAB (Same-Type Attack Bonus) from 1.5x to 2x
+
+
+@ability_effect("sniper", "initialize")
+def sniper(pokemon, opp):
+    pokemon.critical_multiplier = 2.25  # Boosts critical hits from 1.5x to 2.25x
+
+
+@ability_effect("sheer-force", "initialize")
+def sheer_force(pokemon, opp):
+    for move in pokemon.moves.keys():
+        pokemon.moves[move]["power"] = int(pokemon.moves[move]["power"]*1.3)
+
+
+@ability_effect("technician", "initialize")
+def technician(pokemon, opp):
+    for move in pokemon.moves.keys():
+        if pokemon.moves[move]["power"] <= 60:
+            pokemon.moves[move]["power"] = int(pokemon.moves[move]["power"]*1.5)
+
+
+# Abilities that activate upon switching in
+@ability_effect("intimidate", "switch")
+def intimidate(pokemon, opp):
+    opp.current_stats["attack"] = max(1, int(opp.current_stats["attack"] * 0.67))  # Lowers enemy Attack by 1 stage
+    opp.stats_changed()
+
+
+@ability_effect("download", "switch")
+def download(pokemon, opp):
+    if opp.current_stats["defense"] < opp.current_stats["sp_defense"]:
+        pokemon.current_stats["attack"] = int(pokemon.current_stats["attack"]*1.5)  # Boosts Attack if opponent has lower Defense
+    else:
+        pokemon.current_stats["sp_attack"] = int(pokemon.current_stats["sp_attack"]*1.5)
+    pokemon.stats_changed()
+
+
+@ability_effect("fur coat", "switch")
+def fur_coat(pokemon, opp):
+    pokemon.current_stats["defense"] *= 2  # Doubles Defense
+    pokemon.stats_changed()
+
+
+# Abilities that activate when defending
+@ability_effect("rough-skin", "defend")
+def rough_skin(pokemon, opp):
+    opp.take_damage(opp.max_hp // 8, "rough-skin")  # Deals 1/8 max HP damage if hit by a contact move
+
+
+@ability_effect("stamina", "defend")
+def stamina(pokemon, opp):
+    pokemon.current_stats["defense"] = int(pokemon.current_stats["defense"] * 1.5)  # Boosts Defense when hit
+    pokemon.stats_changed()
+
+
+@ability_effect("static", "defend")
+def static(pokemon, opp):
+    if battle_rng.random() < 0.3:  # 30% chance to paralyze the attacker
+        opp.status = "paralyze"
+        opp.current_stats["speed"] = opp.current_stats["speed"]//2
+        opp.stats_changed()
+        battle_log.emit(Event.STATUS, opp.name, "paralyze")
+
+
+@ability_effect("poison-point", "defend")
+def poison_point(pokemon, opp):
+    if battle_rng.random() < 0.3:  # 30% chance to poison the attacker
+        opp.status = "poison"
+        battle_log.emit(Event.STATUS, opp.name, "poison")
+
+
+# Abilities that activate at the end of turn
+@ability_effect("self-sufficient", "end")
+def self_sufficient(pokemon, opp):
+    pokemon.hp = min(pokemon.max_hp, pokemon.hp + pokemon.max_hp//8)  # Heals 1/3 max HP when switching out
+
+
+@ability_effect("poison-heal", "end")
+def poison_heal(pokemon, opp):
+    if pokemon.status == "poison":
+        pokemon.hp = min(pokemon.max_hp, pokemon.hp + pokemon.max_hp//8)  # Heals instead of taking poison damage
+
+
+@ability_effect("speed-boost", "end")
+def speed_boost(pokemon, opp):
+    pokemon.current_stats["speed"] *= 1.5  # Boosts Speed at the end of each turn
+    pokemon.stats_changed()
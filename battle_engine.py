@@ -0,0 +1,238 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+import battle_log
+import battle_rng
+from battle_log import Event, NullSink
+from battle_rng import BattleRNG
+from battle_logic import DamageCache, apply_status_damage, perform_move, select_order, reset_toxic_counter
+from snapshot import SnapshotSchema, restore_snapshot, take_snapshot
+
+# ---------------------- ACTION PROVIDERS ---------------------- #
+#
+# An action provider is a callable `provider(request, trainer, opponent, last_move)`:
+#   - request == "action": return one of the active Pokémon's move names, or SWITCH
+#   - request == "switch": return the team index of the Pokémon to send out
+# A provider is asked again whenever the switch it chose is not allowed.
+
+SWITCH = "switch"
+SWITCH_PRIORITY = 10  # Switching always goes before moves
+
+
+def ai_provider(ai):
+    """Wrap a move-picking AI with the `ai(attacker, defender, last_move)` signature (e.g. battleAI)."""
+    def provider(request, trainer, opponent, last_move):
+        if request == "switch":
+            # Send out the first healthy Pokémon that isn't already active
+            return next(i for i, p in enumerate(trainer.team) if i != trainer.active_pokemon and not p.is_fainted())
+        return ai(trainer.get_active_pokemon(), opponent.get_active_pokemon(), last_move)
+    return provider
+
+
+def scripted_provider(actions):
+    """Provider that replays a pre-decided stream of actions and switch indexes, in order."""
+    actions = iter(actions)
+
+    def provider(request, trainer, opponent, last_move):
+        return next(actions)
+    return provider
+
+
+# ---------------------- BATTLE RESULT ---------------------- #
+
+@dataclass
+class BattleResult:
+    """Outcome of a finished battle."""
+    winner: Optional[int]  # 1 or 2, None if the turn limit was reached
+    winner_name: Optional[str]
+    turns: int
+    remaining_hp: List[List[int]] = field(default_factory=list)  # HP of every team member, per side
+
+
+# ---------------------- BATTLE ENGINE ---------------------- #
+
+class Battle:
+    """
+    A trainer-vs-trainer battle driven entirely by action providers.
+    The engine never reads input or prints: battle events go to `sink`, which defaults
+    to a NullSink that drops them.
+    Random draws come from `rng` (a BattleRNG or a seed; by default a stream spawned from the
+    current battle_rng one). Providers draw from a separate child stream, so replaying the
+    same actions with the same seed reproduces the battle exactly whatever chose them.
+    """
+
+    def __init__(self, trainer1, trainer2, provider1, provider2, max_turns=None, sink=None, rng=None):
+        self.trainers = (trainer1, trainer2)
+        self.providers = (provider1, provider2)
+        self.max_turns = max_turns
+        self.sink = NullSink() if sink is None else sink
+        if rng is None:
+            rng = battle_rng.spawn()
+        self.rng = rng if isinstance(rng, BattleRNG) else BattleRNG(rng)
+        self.provider_rng = self.rng.spawn()
+        self.last_moves = [None, None]  # Last move of each side (for Choice items)
+        self.known_moves = (set(), set())  # Moves each side has revealed (for AI predictions)
+        self.turn = 0
+        self.winner = None
+        self.started = False
+        self.schema = None  # Snapshot layout, built on the first snapshot
+        self.damage_cache = DamageCache()  # Damage terms per (attacker, defender, move) for this battle
+
+
+    def active(self, side):
+        """Active Pokémon of side 0 or 1."""
+        return self.trainers[side].get_active_pokemon()
+
+
+    def is_over(self):
+        return self.winner is not None or (self.max_turns is not None and self.turn >= self.max_turns)
+
+
+    def start(self):
+        """Set up battle multipliers for every team member, then trigger the leads' switch-in effects."""
+        battle_log.emit(Event.BATTLE_START, self.trainers[0].name, target=self.trainers[1].name)
+        for side in (0, 1):
+            opp = self.active(1 - side)
+            for pokemon in self.trainers[side].team:
+                pokemon.check_ability_use(opp, "initialize")
+                reset_toxic_counter(pokemon)
+
+        for side in (0, 1):
+            pokemon, opp = self.active(side), self.active(1 - side)
+            pokemon.check_item_use(opp, "switch")
+            pokemon.check_ability_use(opp, "switch")
+        self.started = True
+
+
+    def request(self, side, request):
+        trainer, opponent = self.trainers[side], self.trainers[1 - side]
+        with battle_rng.use(self.provider_rng):
+            return self.providers[side](request, trainer, opponent, self.last_moves[side])
+
+
+    def choose_action(self, side):
+        """Ask a side for its action and return (action, priority)."""
+        action = self.request(side, "action")
+        pokemon = self.active(side)
+
+        if action == SWITCH:
+            if self.trainers[side].active_pokemon_count() == 1:
+                raise ValueError(f"{self.trainers[side].name} has no Pokémon to switch to")
+            return action, SWITCH_PRIORITY
+
+        if action not in pokemon.moves:
+            raise ValueError(f"{pokemon.name} doesn't know {action!r}")
+        self.last_moves[side] = action
+        return action, pokemon.moves[action]["priority"]
+
+
+    def switch_in(self, side):
+        """Ask a side which Pokémon to send out until the switch succeeds, then apply switch-in effects."""
+        trainer = self.trainers[side]
+        while not trainer.switch_pokemon(self.request(side, "switch")):
+            pass
+
+        pokemon, opp = self.active(side), self.active(1 - side)
+        pokemon.current_stats = pokemon.calc_initial_stats()
+        if pokemon.status == "paralyze":
+            pokemon.current_stats["speed"] = pokemon.current_stats["speed"]//2
+        pokemon.stats_changed()
+        pokemon.check_item_use(opp, "switch")
+        pokemon.check_ability_use(opp, "switch")
+        reset_toxic_counter(pokemon)  # Reset toxic counter on switch
+        self.last_moves[side] = None
+
+
+    def use_move(self, side, move_name):
+        attacker, defender = self.active(side), self.active(1 - side)
+        perform_move(attacker, defender, attacker.moves[move_name], self.damage_cache)
+        attacker.check_item_use(defender, "attack")
+        defender.check_item_use(attacker, "defend")
+        defender.check_ability_use(attacker, "defend")
+        self.known_moves[side].add(move_name)
+
+
+    def replace_fainted(self, side):
+        """Handle a fainted active Pokémon. Returns True if this ended the battle."""
+        if not self.active(side).is_fainted():
+            return False
+        if not self.trainers[side].has_pokemon_left():
+            self.winner = 2 - side  # The other side wins
+            battle_log.emit(Event.WIN, self.trainers[1 - side].name)
+            return True
+        self.switch_in(side)
+        return False
+
+
+    def play_turn(self):
+        """Play one full turn: both actions in order, end-of-turn effects and forced switches."""
+        with battle_log.sink_to(self.sink), battle_rng.use(self.rng):
+            if not self.started:
+                self.start()
+            self.turn += 1
+            battle_log.emit(Event.TURN, value=self.turn)
+
+            action2, priority2 = self.choose_action(1)
+            action1, priority1 = self.choose_action(0)
+
+            # Determine move order based on priority, speed, and Quick Claw
+            pokemon1, pokemon2 = self.active(0), self.active(1)
+            order = select_order(priority1, priority2, pokemon1.current_stats["speed"],
+                                 pokemon2.current_stats["speed"], pokemon1.item, pokemon2.item)
+
+            actions = (action1, action2)
+            for turn in order:
+                side = turn - 1
+                if actions[side] == SWITCH:
+                    self.switch_in(side)
+                else:
+                    self.use_move(side, actions[side])
+
+                # A faint cuts the turn short; end-of-turn effects still apply
+                if self.active(1 - side).is_fainted():
+                    if self.replace_fainted(1 - side):
+                        return
+                    break
+
+            # End-of-turn item and ability checks
+            for side in (0, 1):
+                self.active(side).check_item_use(self.active(1 - side), "end")
+                self.active(side).check_ability_use(self.active(1 - side), "end")
+
+            # Apply status damage from burn, poison, or badly poisoned effects
+            apply_status_damage(self.active(0))
+            apply_status_damage(self.active(1))
+
+            if not self.replace_fainted(0):
+                self.replace_fainted(1)
+
+
+    def snapshot(self):
+        """Capture everything needed to resume the battle as a flat, immutable tuple."""
+        if self.schema is None:
+            self.schema = SnapshotSchema(self)
+        return take_snapshot(self, self.schema)
+
+
+    def restore(self, snapshot):
+        """Put the battle back in the state of an earlier `snapshot()`, in place."""
+        if self.schema is None:
+            self.schema = SnapshotSchema(self)
+        restore_snapshot(self, self.schema, snapshot)
+
+
+    def result(self):
+        winner_name = self.trainers[self.winner - 1].name if self.winner else None
+        remaining_hp = [[p.hp for p in trainer.team] for trainer in self.trainers]
+        return BattleResult(self.winner, winner_name, self.turn, remaining_hp)
+
+
+    def run(self):
+        """Play turns until one side has no Pokémon left (or the turn limit is hit) and return the result."""
+        while not self.is_over():
+            self.play_turn()
+        return self.result()
+
+
+def run_battle(trainer1, trainer2, provider1, provider2, max_turns=None, sink=None, rng=None):
+    """Run a whole battle headlessly and return its BattleResult (`rng`: a BattleRNG or seed)."""
+    return Battle(trainer1, trainer2, provider1, provider2, max_turns=max_turns, sink=sink, rng=rng).run()
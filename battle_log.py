@@ -0,0 +1,181 @@
+import struct
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from enum import IntEnum
+
+# ---------------------- BATTLE EVENTS ---------------------- #
+
+class Event(IntEnum):
+    """Kinds of battle events. Each event carries (actor, detail, value, target)."""
+    BATTLE_START = 0   # actor vs target
+    TURN = 1           # value = turn number
+    MOVE_USED = 2      # actor used move `detail`
+    MISS = 3           # actor's move `detail` missed
+    DAMAGE = 4         # actor lost `value` HP from `detail` (a move, status or item/ability)
+    HEAL = 5           # actor healed `value` HP from `detail`
+    STATUS = 6         # actor is now `detail`
+    STATUS_FAILED = 7  # `detail` failed to land on actor
+    IMMUNE = 8         # actor is immune to `detail`
+    CANT_MOVE = 9      # actor can't move because it is `detail`
+    ITEM = 10          # actor's item `detail` activated
+    FAINT = 11         # actor fainted
+    SWITCH = 12        # trainer actor sent out `detail`
+    SWITCH_FAILED = 13 # trainer actor couldn't send out target; detail = "invalid" / "active" / "fainted"
+    WIN = 14           # trainer actor won the battle
+    RL_EXPLORE = 15    # RL agent actor picked move `detail` at random
+    RL_EXPLOIT = 16    # RL agent actor picked move `detail` with Q-value `value`
+    RL_ESTIMATE = 17   # RL agent actor estimated `value` damage for move `detail`
+    REWARD = 18        # move `detail` earned reward `value`
+    Q_UPDATE = 19      # Q-value of move `detail` is now `value`
+    EPISODE = 20       # actor finished an episode against target; value = cumulative win rate
+
+
+BattleEvent = namedtuple("BattleEvent", ["kind", "actor", "detail", "value", "target"])
+
+
+# ---------------------- SINKS ---------------------- #
+
+class NullSink:
+    """Drops every event. Emitting costs one no-op call and no message is ever built."""
+
+    def emit(self, kind, actor=None, detail=None, value=0, target=None):
+        pass
+
+
+class RingBufferSink:
+    """Keeps the last `capacity` events in memory as BattleEvent tuples."""
+
+    def __init__(self, capacity=1024):
+        self.buffer = deque(maxlen=capacity)
+
+    def emit(self, kind, actor=None, detail=None, value=0, target=None):
+        self.buffer.append(BattleEvent(kind, actor, detail, value, target))
+
+    def events(self):
+        return list(self.buffer)
+
+
+# Binary records: kind (u8), actor/detail/target string IDs (u16), value (f32).
+# A string is written once, as a STRING_RECORD carrying its ID and UTF-8 bytes, before its first use.
+RECORD = struct.Struct("<BHHHf")
+STRING_HEADER = struct.Struct("<BHH")
+STRING_RECORD = 255
+
+
+class BinarySink:
+    """Appends events to a compact binary log (a bytearray, or any object with `write`)."""
+
+    def __init__(self, stream=None):
+        self.stream = bytearray() if stream is None else stream
+        self.strings = {None: 0}  # ID 0 is reserved for a missing field
+
+    def string_id(self, text):
+        string_id = self.strings.get(text)
+        if string_id is None:
+            string_id = self.strings[text] = len(self.strings)
+            data = str(text).encode()
+            self.write(STRING_HEADER.pack(STRING_RECORD, string_id, len(data)) + data)
+        return string_id
+
+    def write(self, data):
+        if isinstance(self.stream, bytearray):
+            self.stream += data
+        else:
+            self.stream.write(data)
+
+    def emit(self, kind, actor=None, detail=None, value=0, target=None):
+        self.write(RECORD.pack(kind, self.string_id(actor), self.string_id(detail), self.string_id(target), value))
+
+
+def read_binary_log(data):
+    """Decode a BinarySink log back into BattleEvent tuples."""
+    strings = {0: None}
+    offset = 0
+    while offset < len(data):
+        if data[offset] == STRING_RECORD:
+            _, string_id, length = STRING_HEADER.unpack_from(data, offset)
+            offset += STRING_HEADER.size
+            strings[string_id] = bytes(data[offset:offset + length]).decode()
+            offset += length
+            continue
+
+        kind, actor, detail, target, value = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        yield BattleEvent(Event(kind), strings[actor], strings[detail], int(value) if value.is_integer() else value, strings[target])
+
+
+# Human-readable templates, filled only by PrintSink
+MESSAGES = {
+    Event.BATTLE_START: "Battle Start! {actor} vs {target}\n",
+    Event.TURN: "\n--- Turn {value} ---",
+    Event.MOVE_USED: "{actor} used {detail}!",
+    Event.MISS: "{actor}'s {detail} missed!",
+    Event.DAMAGE: "{actor} took {value} damage from {detail}.",
+    Event.HEAL: "{actor} healed for {value} HP!",
+    Event.STATUS: "{actor} is now {detail}!",
+    Event.STATUS_FAILED: "Failed to inflict {detail} on {actor}!",
+    Event.IMMUNE: "{actor} is immune to {detail}!",
+    Event.CANT_MOVE: "{actor} is {detail} and can't move!",
+    Event.ITEM: "{actor}'s {detail} activated!",
+    Event.FAINT: "{actor} fainted!",
+    Event.SWITCH: "{actor} switched to {detail}!",
+    Event.WIN: "{actor} has won the battle!",
+    Event.RL_EXPLORE: "[RL] Exploration: Randomly selected move '{detail}'",
+    Event.RL_EXPLOIT: "[RL] Exploitation: Selected best move '{detail}' with Q-value {value:.2f}",
+    Event.RL_ESTIMATE: "[RL] Estimated damage by '{detail}': {value}",
+    Event.REWARD: "[Reward] Move '{detail}' generated reward: {value}",
+    Event.Q_UPDATE: "[RL] Updated Q-value for action '{detail}': {value:.2f}",
+    Event.EPISODE: "{actor} vs {target} episode complete. Cumulative win rate: {value:.2f}\n",
+}
+
+DAMAGE_MESSAGES = {
+    "burn": "{actor} is hurt by its burn! It lost {value} HP.",
+    "poison": "{actor} is hurt by poison! It lost {value} HP.",
+    "badly_poison": "{actor} is badly poisoned! It lost {value} HP.",
+}
+
+SWITCH_FAILED_MESSAGES = {
+    "invalid": "Invalid switch! Choose a valid Pokémon index.",
+    "active": "{actor}, {target} is already active!",
+    "fainted": "{actor} cannot switch to {target}, it has fainted!",
+}
+
+
+class PrintSink:
+    """Formats events into the familiar battle messages and passes them to `output` (print by default)."""
+
+    def __init__(self, output=print):
+        self.output = output
+
+    def emit(self, kind, actor=None, detail=None, value=0, target=None):
+        if kind == Event.DAMAGE:
+            template = DAMAGE_MESSAGES.get(detail, MESSAGES[kind])
+        elif kind == Event.SWITCH_FAILED:
+            template = SWITCH_FAILED_MESSAGES[detail]
+        else:
+            template = MESSAGES[kind]
+        self.output(template.format(actor=actor, detail=detail, value=value, target=target))
+
+
+# ---------------------- CURRENT SINK ---------------------- #
+
+_sink = PrintSink()  # Interactive scripts keep printing by default
+emit = _sink.emit    # Rebound on every sink change so emitting is a single call
+
+
+def set_sink(sink):
+    """Replace the current event sink and return the previous one."""
+    global _sink, emit
+    previous, _sink = _sink, sink
+    emit = sink.emit
+    return previous
+
+
+@contextmanager
+def sink_to(sink):
+    """Temporarily send battle events to `sink`."""
+    previous = set_sink(sink)
+    try:
+        yield sink
+    finally:
+        set_sink(previous)
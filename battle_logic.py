@@ -1,17 +1,14 @@
-import random
 import numpy as np
 import typeRelation
-from collections import defaultdict
-
-# Ensure it's always a defaultdict
-typeRelation.type_relation = defaultdict(lambda: defaultdict(lambda: 1), typeRelation.type_relation)
+import battle_log
+import battle_rng
+from battle_log import Event
 
 # ---------------------- STATUS DAMAGE FUNCTIONS ---------------------- #
 
 def reset_toxic_counter(self):
     """Reset toxic counter when switching out to avoid stacking damage."""
-    if self.status == "badly poison":
-        self.toxic_counter = 0
+    self.toxic_counter = 0
 
 def apply_status_damage(pokemon):
     """Apply residual damage for burn, poison, and badly poisoned status effects."""
@@ -19,51 +16,40 @@ def apply_status_damage(pokemon):
     if pokemon.status == "burn":
         # Burn deals 1/16 of max HP as damage each turn
         burn_damage = pokemon.max_hp // 16  
-        pokemon.take_damage(burn_damage)
-        print(f"{pokemon.name} is hurt by its burn! It lost {burn_damage} HP.")
+        pokemon.take_damage(burn_damage, "burn")
 
     elif pokemon.status == "poison":
         # Poison deals 1/8 of max HP as damage each turn
         poison_damage = pokemon.max_hp // 8  
-        pokemon.take_damage(poison_damage)
-        print(f"{pokemon.name} is hurt by poison! It lost {poison_damage} HP.")
+        pokemon.take_damage(poison_damage, "poison")
 
     elif pokemon.status == "badly_poison":
         # Badly Poisoned damage increases each turn (1/16 * toxic counter)
         pokemon.toxic_counter += 1  # Increase toxic counter each turn
         toxic_damage = (pokemon.toxic_counter * pokemon.max_hp) // 16  
-        pokemon.take_damage(toxic_damage)
-        print(f"{pokemon.name} is badly poisoned! It lost {toxic_damage} HP.")
+        pokemon.take_damage(toxic_damage, "badly_poison")
 
 
 # ---------------------- DAMAGE CALCULATION ---------------------- #
 
-def calculate_damage(attacker, defender, move):
-    """Calculate the damage dealt by an attacking Pokémon to a defending Pokémon."""
-    
-    # Critical hit has a 1/24 base chance, modified by attacker's critical hit stat
-    critical = attacker.critical_multiplier if np.random.random() < ((1 / 24) * attacker.critical_hit) else 1
-    
+def damage_terms(attacker, defender, move):
+    """
+    Everything calculate_damage needs besides its two random rolls:
+    (normal base, critical base, STAB, type multiplier, burn multiplier, ability boost, crit chance, crit multiplier).
+    """
     # Determine if move uses physical or special stats
     att_stat = "attack" if move["effectiveState"] == "physical" else "sp_attack"
     def_stat = "defense" if move["effectiveState"] == "physical" else "sp_defense"
-    
-    # Calculate attack stat with potential critical hit impact
-    A = attacker.current_stats[att_stat] if critical == 1 else attacker.base_stats[att_stat]
-    
-    # Calculate defense stat with potential critical hit impact
-    D = defender.current_stats[def_stat] if critical == 1 else defender.base_stats[def_stat]
-    
-    # Random damage variation between 0.85x to 1.0x
-    random_multiplier = np.random.uniform(0.85, 1.0)
+
+    # Critical hits use the unmodified stats
+    def base(A, D):
+        return ((((2 * attacker.level)/5) + 2) * move["power"] * (A/D))/50
 
     # STAB (Same Type Attack Bonus) - 1.5x if Pokémon's type matches move's type
     stab = attacker.stab_multiplier if move["type"] in attacker.typing else 1
 
-    # Type effectiveness from typeRelation module
-    type_multiplier = 1
-    for t in defender.typing:
-        type_multiplier *= float(typeRelation.type_relation[move["type"]][t])
+    # Type effectiveness from typeRelation module (one lookup in the dual-type table)
+    type_multiplier = typeRelation.effectiveness(move["type"], defender.typing)
 
     # Burn reduces physical attack damage by 50%
     status = 0.5 if attacker.status == "burn" else 1
@@ -73,76 +59,200 @@ def calculate_damage(attacker, defender, move):
     if attacker.hp <= attacker.max_hp // 3:  # If HP is ≤ 1/3
         if (attacker.ability == "blaze" and move["type"] == "fire") or (attacker.ability == "torrent" and move["type"] == "water") or (attacker.ability == "overgrow" and move["type"] == "grass") or (attacker.ability == "swarm" and move["type"] == "bug"):
             other = 1.5
-    
+
+    return (base(attacker.current_stats[att_stat], defender.current_stats[def_stat]),
+            base(attacker.base_stats[att_stat], defender.base_stats[def_stat]),
+            stab, type_multiplier, status, other, (1 / 24) * attacker.critical_hit, attacker.critical_multiplier)
+
+
+class DamageCache:
+    """
+    Per-battle memo of damage_terms for each (attacker, defender, move), and of damage_inputs for
+    each (attacker, defender, moves). An entry is reused until either Pokémon's stats_version,
+    a move's power, the attacker's burn or its 1/3 HP threshold changes.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.batch_entries = {}
+
+
+    def terms(self, attacker, defender, move):
+        stamp = (attacker.stats_version, defender.stats_version, move["power"],
+                 attacker.status == "burn", attacker.hp <= attacker.max_hp // 3)
+        key = (id(attacker), id(defender), move["name"])
+        entry = self.entries.get(key)
+        # Entries hold the Pokémon themselves, so their ids can't be reused by other objects
+        if entry is None or entry[0] != stamp or entry[1] is not attacker or entry[2] is not defender:
+            entry = self.entries[key] = (stamp, attacker, defender, damage_terms(attacker, defender, move))
+        return entry[3]
+
+
+    def inputs(self, attacker, defender, moves):
+        """damage_inputs(attacker, defender, moves), memoized like terms."""
+        stamp = (attacker.stats_version, defender.stats_version, tuple(move["power"] for move in moves),
+                 attacker.status == "burn", attacker.hp <= attacker.max_hp // 3)
+        key = (id(attacker), id(defender), tuple(move["name"] for move in moves))
+        entry = self.batch_entries.get(key)
+        if entry is None or entry[0] != stamp or entry[1] is not attacker or entry[2] is not defender:
+            entry = self.batch_entries[key] = (stamp, attacker, defender, damage_inputs(attacker, defender, moves))
+        return entry[3]
+
+
+def calculate_damage(attacker, defender, move, cache=None):
+    """Calculate the damage dealt by an attacking Pokémon to a defending Pokémon, optionally through a DamageCache."""
+    terms = damage_terms(attacker, defender, move) if cache is None else cache.terms(attacker, defender, move)
+    normal_base, critical_base, stab, type_multiplier, status, other, crit_chance, crit_multiplier = terms
+
+    # Critical hit has a 1/24 base chance, modified by attacker's critical hit stat
+    is_critical = battle_rng.random() < crit_chance
+    critical = crit_multiplier if is_critical else 1
+
+    # Random damage variation between 0.85x to 1.0x
+    random_multiplier = battle_rng.uniform(0.85, 1.0)
+
     # Final damage calculation
-    return int((((((2 * attacker.level)/5) + 2) * move["power"] * (A/D))/50) * critical * random_multiplier * stab * type_multiplier * status * other)
+    return int((critical_base if is_critical else normal_base) * critical * random_multiplier * stab * type_multiplier * status * other)
+
+
+# ---------------------- BATCH DAMAGE CALCULATION ---------------------- #
+
+# Abilities that boost moves of one type by 1.5x when the holder is at or below 1/3 HP
+BOOST_ABILITIES = {"blaze": "fire", "torrent": "water", "overgrow": "grass", "swarm": "bug"}
+
+# Number of hits of a multi-hit move and their odds
+MULTI_HIT_COUNTS = [2, 3, 4, 5]
+MULTI_HIT_ODDS = [0.375, 0.375, 0.125, 0.125]
+
+def damage_inputs(attacker, defender, moves):
+    """Collect the inputs of calculate_damage_batch for each move in `moves` as NumPy arrays."""
+    physical = [move["effectiveState"] == "physical" for move in moves]
+    type1, type2 = typeRelation.type_ids(defender.typing)
+
+    low_hp = attacker.hp <= attacker.max_hp // 3
+    return {
+        "level": attacker.level,
+        "power": np.array([move["power"] for move in moves]),
+        "attack": np.array([attacker.current_stats["attack" if p else "sp_attack"] for p in physical]),
+        "defense": np.array([defender.current_stats["defense" if p else "sp_defense"] for p in physical]),
+        "crit_attack": np.array([attacker.base_stats["attack" if p else "sp_attack"] for p in physical]),
+        "crit_defense": np.array([defender.base_stats["defense" if p else "sp_defense"] for p in physical]),
+        "move_type": np.array([typeRelation.TYPE_INDEX[move["type"]] for move in moves]),
+        "defender_type1": type1,
+        "defender_type2": type2,
+        "stab": np.array([attacker.stab_multiplier if move["type"] in attacker.typing else 1 for move in moves]),
+        "burned": attacker.status == "burn",
+        "boosted": np.array([low_hp and BOOST_ABILITIES.get(attacker.ability) == move["type"] for move in moves]),
+        "crit_chance": (1 / 24) * attacker.critical_hit,
+        "crit_multiplier": attacker.critical_multiplier,
+    }
+
+
+def calculate_damage_batch(level, power, attack, defense, crit_attack, crit_defense, move_type,
+                           defender_type1, defender_type2, stab=1, burned=False, boosted=False, crit_chance=1 / 24, crit_multiplier=1.5,
+                           size=None, crit_rolls=None, random_rolls=None):
+    """
+    Vectorized calculate_damage: every argument may be a scalar or an array and the
+    result is an int64 array of damages, one per element of the broadcast shape (or `size`).
+    Types are interned IDs from typeRelation.TYPE_INDEX; mono-type defenders pass the
+    same ID as both defender types.
+
+    The critical-hit rolls and the 0.85-1.0 rolls are drawn as two whole vectors (crit
+    rolls first), so a single-element batch consumes the current battle_rng stream exactly like
+    calculate_damage and returns the same damage for the same seed. Pre-drawn rolls can
+    be passed in through `crit_rolls` and `random_rolls`.
+    """
+    shape = np.broadcast(level, power, attack, defense, crit_attack, crit_defense, move_type,
+                         defender_type1, defender_type2, stab, burned, boosted, crit_chance, crit_multiplier).shape if size is None else size
+
+    if crit_rolls is None:
+        crit_rolls = battle_rng.random(shape)
+    if random_rolls is None:
+        random_rolls = battle_rng.uniform(0.85, 1.0, shape)
+
+    # Critical hits ignore stat changes by using the unmodified stats
+    is_crit = crit_rolls < crit_chance
+    critical = np.where(is_crit, crit_multiplier, 1)
+    A = np.where(is_crit, crit_attack, attack)
+    D = np.where(is_crit, crit_defense, defense)
+
+    type_multiplier = typeRelation.DUAL_TYPE_CHART[move_type, defender_type1, defender_type2]
+    status = np.where(burned, 0.5, 1)
+    other = np.where(boosted, 1.5, 1)
+
+    # Same operation order as calculate_damage so both round identically
+    damage = (((((2 * level)/5) + 2) * power * (A/D))/50) * critical * random_rolls * stab * type_multiplier * status * other
+    return np.broadcast_to(np.trunc(damage), shape).astype(np.int64)
 
 
 # ---------------------- MOVE EXECUTION ---------------------- #
 
-def perform_move(attacker, defender, move):
-    """Execute a Pokémon's move, handling damage, status effects, and stat changes."""
+def perform_move(attacker, defender, move, cache=None):
+    """Execute a Pokémon's move, handling damage, status effects, and stat changes (`cache`: optional DamageCache)."""
     
     # Skip turn if attacker is asleep or frozen
     if attacker.status in ["sleep", "freeze"]:
-        print(f"{attacker.name} is {attacker.status} and can't move!")
+        battle_log.emit(Event.CANT_MOVE, attacker.name, attacker.status)
         
         # Chance to wake up or thaw out
-        attacker.status = np.random.choice([attacker.status, None], p=[0.6, 0.4])
+        if battle_rng.random() < 0.4:
+            attacker.status = None
         return
 
-    if attacker.status == "paralyze" and np.random.random() <= 0.3:
-        print(f"{attacker.name} is {attacker.status} and can't move!")
+    if attacker.status == "paralyze" and battle_rng.random() <= 0.3:
+        battle_log.emit(Event.CANT_MOVE, attacker.name, attacker.status)
         return
+
+    battle_log.emit(Event.MOVE_USED, attacker.name, move["name"])
     
     if move["multi_hit"]:
-        hits = np.random.choice([2, 3, 4, 5], p=[0.375, 0.375, 0.125, 0.125])
-        for _ in range(hits):
+        hits = battle_rng.choice(MULTI_HIT_COUNTS, p=MULTI_HIT_ODDS)
+        # Stats can't change between hits, so every hit's damage is rolled in one batch
+        inputs = damage_inputs(attacker, defender, [move]) if cache is None else cache.inputs(attacker, defender, [move])
+        damages = calculate_damage_batch(**inputs, size=hits)
+        for damage in damages.tolist():
             if defender.ability == "levitate" and move["type"] == "ground":
-                print(f"{defender.name} is immune to Ground-type moves due to Levitate!")
+                battle_log.emit(Event.IMMUNE, defender.name, move["name"])
 
             # **Ability Check - Water Absorb (Heals when hit by Water moves)**
             elif defender.ability == "water absorb" and move["type"] == "water":
-                heal_amount = calculate_damage(attacker, defender, move)
+                heal_amount = damage
                 defender.hp = min(defender.max_hp, defender.hp+heal_amount)
-                print(f"{defender.name} absorbed the Water move and healed {heal_amount} HP!")
+                battle_log.emit(Event.HEAL, defender.name, "water-absorb", heal_amount)
             
             else:
-                damage = calculate_damage(attacker, defender, move)
-                defender.take_damage(damage)
-                print(f"{attacker.name} hit {defender.name} for {damage} damage!")
+                defender.take_damage(damage, move["name"])
         return
     
     # Check if move hits based on accuracy
-    if np.random.random() < (move["accuracy"] * attacker.accuracy / defender.evasion):
+    if battle_rng.random() < (move["accuracy"] * attacker.accuracy / defender.evasion):
         if move["name"] in ["seismic-toss", "night-shade"]:
             if move["name"] == "seismic-toss" and "ghost" in defender.typing:
-                print(f"{defender.name} is immune to Seismic Toss!")
+                battle_log.emit(Event.IMMUNE, defender.name, move["name"])
                 return
 
             elif move["name"] == "night-shade" and "normal" in defender.typing:
-                print(f"{defender.name} is immune to Night Shade!")
+                battle_log.emit(Event.IMMUNE, defender.name, move["name"])
                 return
             
-            return defender.take_damage(attacker.level)
+            return defender.take_damage(attacker.level, move["name"])
             
         # **Ability Check - Levitate (Immunity to Ground moves)**
         if move["power"]:  # If move has power, deal damage
 
             if defender.ability == "levitate" and move["type"] == "ground":
-                print(f"{defender.name} is immune to Ground-type moves due to Levitate!")
+                battle_log.emit(Event.IMMUNE, defender.name, move["name"])
                 return
 
             # **Ability Check - Water Absorb (Heals when hit by Water moves)**
             if defender.ability == "water-absorb" and move["type"] == "water":
-                heal_amount = calculate_damage(attacker, defender, move)
+                heal_amount = calculate_damage(attacker, defender, move, cache)
                 defender.hp = min(defender.max_hp, defender.hp+heal_amount)
-                print(f"{defender.name} absorbed the Water move and healed {heal_amount} HP!")
+                battle_log.emit(Event.HEAL, defender.name, "water-absorb", heal_amount)
                 return  # No damage dealt
 
-            damage = calculate_damage(attacker, defender, move)
-            defender.take_damage(damage)
-            print(f"{attacker.name} used {move['name']}! It dealt {damage} damage.")
+            damage = calculate_damage(attacker, defender, move, cache)
+            defender.take_damage(damage, move["name"])
 
         # If move changes stats, apply stat changes
         if move["StatChange"]:
@@ -155,12 +265,12 @@ def perform_move(attacker, defender, move):
         if move["heals"]:  
             heal_amount = int(attacker.max_hp * move["heals"])  
             attacker.hp = min(attacker.max_hp, attacker.hp+heal_amount)
-            print(f"{attacker.name} healed for {heal_amount} HP!")
+            battle_log.emit(Event.HEAL, attacker.name, move["name"], heal_amount)
 
         if move["damageHeals"]:
-            heal_amount = calculate_damage(attacker, defender, move)  
+            heal_amount = calculate_damage(attacker, defender, move, cache)  
             attacker.hp = min(attacker.max_hp, attacker.hp+heal_amount)
-            print(f"{attacker.name} healed for {heal_amount} HP!")
+            battle_log.emit(Event.HEAL, attacker.name, move["name"], heal_amount)
 
         # Apply status condition if possible
         if move["statusChange"] and defender.status is None:
@@ -168,15 +278,16 @@ def perform_move(attacker, defender, move):
             success_chance = move["statusChange"][1]
 
             # Check if the defender is immune to the status effect
-            immune = any(status_effect in typeRelation.STATUS_IMMUNITIES.get(t, []) for t in defender.typing)
-
-            if immune:
-                print(f"{defender.name} is immune to {status_effect}!")
-            elif np.random.random() < success_chance:  # If not immune, apply status
+            if typeRelation.is_status_immune(status_effect, defender.typing):
+                battle_log.emit(Event.IMMUNE, defender.name, status_effect)
+            elif battle_rng.random() < success_chance:  # If not immune, apply status
                 defender.status = status_effect
-                print(f"{defender.name} is now {status_effect}!")
+                battle_log.emit(Event.STATUS, defender.name, status_effect)
             else:
-                print(f"{move['name']} failed to inflict {status_effect} on {defender.name}!")
+                battle_log.emit(Event.STATUS_FAILED, defender.name, status_effect)
+
+    else:
+        battle_log.emit(Event.MISS, attacker.name, move["name"])
 
 
 # ---------------------- SELECT ORDER ---------------------- #
@@ -187,9 +298,9 @@ def select_order(priority1, priority2, speed1, speed2, item1, item2):
         return [1, 2] if priority1 > priority2 else [2, 1]
     
     # Quick Claw Activation - 20% chance for the holder to move first
-    if item1 and item1["name"] == "quick-claw" and random.random() < 0.2:
+    if item1 and item1["name"] == "quick-claw" and battle_rng.random() < 0.2:
         return [1, 2]  # Pokémon 1 moves first
-    if item2 and item2["name"] == "quick-claw" and random.random() < 0.2:
+    if item2 and item2["name"] == "quick-claw" and battle_rng.random() < 0.2:
         return [2, 1]  # Pokémon 2 moves first
 
     # Speed check - The Pokémon with the higher speed stat moves first
@@ -199,4 +310,4 @@ def select_order(priority1, priority2, speed1, speed2, item1, item2):
         return [2, 1]    
 
     # If speeds are equal, the move order is randomly chosen
-    return random.choice([[1, 2], [2, 1]])
\ No newline at end of file
+    return battle_rng.choice([[1, 2], [2, 1]])
\ No newline at end of file
@@ -0,0 +1,215 @@
+from array import array
+from collections import namedtuple
+from pokemon import Pokemon
+from q_table import STATUSES
+
+# ---------------------- COMPACT POKÉMON ---------------------- #
+#
+# BattlePokemon holds the same state as a pokemon.Pokemon in a fraction of the memory, for
+# keeping large numbers of simulated Pokémon resident:
+#   - __slots__ instead of an instance dict
+#   - the seven stat dicts (base_stats, evs, ivs, stat_stages, nature_effect, initial_stats,
+#     current_stats) flattened into one small-int array, read through fixed indexes from a
+#     shared StatLayout; the few float values (nature multipliers, a Speed Boost speed) go in
+#     an interned tuple, so Pokémon with the same nature share it
+#   - moves as a tuple of immutable MoveRecords, interned so every Pokémon with the same move
+#     (and power: Life Orb and friends change it in place) shares one record
+#   - status, ability, item and nature as small integer codes
+# Conversion in either direction shares names, typings and move records instead of copying
+# them, and to_pokemon() rebuilds a Pokemon equal to the one converted, dict key order included.
+# BattlePokemon is a storage format, not a battle participant: the engine, battle_logic and
+# damage_terms work on Pokemon, so a stored Pokémon is converted with to_pokemon() (which
+# rebuilds its dicts) before it battles. stat() only reads a stored Pokémon.
+
+STAT_DICTS = ("base_stats", "evs", "ivs", "stat_stages", "nature_effect", "initial_stats", "current_stats")
+CURRENT_STATS = STAT_DICTS.index("current_stats")
+
+# Attributes the battle code adds to Pokémon after construction; None in a slot = never set
+BATTLE_ATTRIBUTES = ("critical_hit", "stab_multiplier", "critical_multiplier", "toxic_counter")
+
+MOVE_KEYS = ("name", "type", "power", "accuracy", "priority", "multi_hit", "StatChange",
+             "statusChange", "effectiveState", "heals", "damageHeals")
+MoveRecord = namedtuple("MoveRecord", ["name", "type", "power", "accuracy", "priority", "multi_hit",
+                                       "stat_change", "status_change", "effective_state", "heals", "damage_heals"])
+
+NO_ITEM, ITEM_UNUSED, ITEM_USED = -1, 0, 1  # item_used: the item dict has no "used" key / False / True
+
+
+class Codes:
+    """Interns names (abilities, items, natures, statuses) as small integers for the whole process; 0 is None."""
+
+    def __init__(self, names=()):
+        self.names = [None]
+        self.index = {None: 0}
+        for name in names:
+            self.code(name)
+
+
+    def code(self, name):
+        code = self.index.get(name)
+        if code is None:
+            code = self.index[name] = len(self.names)
+            self.names.append(name)
+        return code
+
+
+    def name(self, code):
+        return self.names[code]
+
+
+STATUS_CODES = Codes(STATUSES[1:])
+ABILITY_CODES = Codes()
+ITEM_CODES = Codes()
+NATURE_CODES = Codes()
+
+
+# ---------------------- SHARED LAYOUTS AND RECORDS ---------------------- #
+
+# Per stat dict: its keys, whether each value is a float, and each value's index in the int array or float tuple;
+# current_index maps each current_stats key to its (is float, index) pair
+StatLayout = namedtuple("StatLayout", ["keys", "floats", "positions", "current_index"])
+layouts = {}
+float_values = {}
+move_records = {}
+typings = {}
+
+
+def stat_layout(dicts):
+    """The interned layout of a Pokémon's stat dicts: every Pokémon with the same keys and value types shares one."""
+    keys = tuple(tuple(d) for d in dicts)
+    floats = tuple(tuple(isinstance(value, float) for value in d.values()) for d in dicts)
+    layout = layouts.get((keys, floats))
+    if layout is None:
+        positions, counts = [], [0, 0]
+        for d in floats:
+            dict_positions = []
+            for is_float in d:
+                dict_positions.append(counts[is_float])
+                counts[is_float] += 1
+            positions.append(tuple(dict_positions))
+        current_index = dict(zip(keys[CURRENT_STATS], zip(floats[CURRENT_STATS], positions[CURRENT_STATS])))
+        layout = layouts[keys, floats] = StatLayout(keys, floats, tuple(positions), current_index)
+    return layout
+
+
+def move_record(move):
+    if tuple(move) != MOVE_KEYS:
+        raise ValueError(f"Move {move.get('name')!r} doesn't have the standard move keys")
+    # StatChange is None or [(10 multipliers)], statusChange None or [status, chance]: stored as tuples
+    stat_change, status_change = move["StatChange"], move["statusChange"]
+    record = MoveRecord(move["name"], move["type"], move["power"], move["accuracy"], move["priority"], move["multi_hit"],
+                        None if stat_change is None else tuple(tuple(row) for row in stat_change),
+                        None if status_change is None else tuple(status_change),
+                        move["effectiveState"], move["heals"], move["damageHeals"])
+    return move_records.setdefault(record, record)
+
+
+def move_dict(move):
+    return {
+        "name": move.name, "type": move.type, "power": move.power, "accuracy": move.accuracy,
+        "priority": move.priority, "multi_hit": move.multi_hit,
+        "StatChange": None if move.stat_change is None else list(move.stat_change),
+        "statusChange": None if move.status_change is None else list(move.status_change),
+        "effectiveState": move.effective_state, "heals": move.heals, "damageHeals": move.damage_heals,
+    }
+
+
+# ---------------------- BATTLE POKÉMON ---------------------- #
+
+class BattlePokemon:
+    __slots__ = ("name", "typing", "level", "ability", "nature", "item", "item_used", "status",
+                 "hp", "max_hp", "accuracy", "evasion", "critical_stage", "stats_version",
+                 "layout", "stats", "float_stats", "move_keys", "moves") + BATTLE_ATTRIBUTES
+
+
+    @classmethod
+    def from_pokemon(cls, pokemon):
+        self = cls.__new__(cls)
+        self.name = pokemon.name
+        self.typing = typings.setdefault(tuple(pokemon.typing), tuple(pokemon.typing))
+        self.level = pokemon.level
+        self.ability = ABILITY_CODES.code(pokemon.ability)
+        self.nature = NATURE_CODES.code(pokemon.nature)
+        self.status = STATUS_CODES.code(pokemon.status)
+        self.hp, self.max_hp = pokemon.hp, pokemon.max_hp
+        self.accuracy, self.evasion = pokemon.accuracy, pokemon.evasion
+        self.critical_stage, self.stats_version = pokemon.critical_stage, pokemon.stats_version
+        for attribute in BATTLE_ATTRIBUTES:
+            setattr(self, attribute, getattr(pokemon, attribute, None))
+
+        item = pokemon.item
+        if item is None:
+            self.item, self.item_used = 0, NO_ITEM
+        elif isinstance(item, dict) and set(item) <= {"name", "used"}:
+            self.item = ITEM_CODES.code(item["name"])
+            self.item_used = ITEM_USED if item.get("used") else ITEM_UNUSED if "used" in item else NO_ITEM
+        else:
+            raise ValueError(f"{pokemon.name}'s item {item!r} isn't a {{'name', 'used'}} dict")
+
+        dicts = [getattr(pokemon, name) for name in STAT_DICTS]
+        self.layout = stat_layout(dicts)
+        values = [value for d in dicts for value in d.values()]
+        self.stats = array("i", [value for value in values if not isinstance(value, float)])
+        floats = tuple(value for value in values if isinstance(value, float))
+        self.float_stats = float_values.setdefault(floats, floats)
+
+        self.move_keys = tuple(pokemon.moves)
+        self.moves = tuple(move_record(move) for move in pokemon.moves.values())
+        return self
+
+
+    def to_pokemon(self):
+        """A pokemon.Pokemon equal to the one this was made from (with its current battle state)."""
+        pokemon = Pokemon.__new__(Pokemon)
+        pokemon.name = self.name
+        pokemon.typing = list(self.typing)
+        pokemon.level = self.level
+        pokemon.ability = ABILITY_CODES.name(self.ability)
+        pokemon.nature = NATURE_CODES.name(self.nature)
+        pokemon.status = STATUS_CODES.name(self.status)
+        pokemon.hp, pokemon.max_hp = self.hp, self.max_hp
+        pokemon.accuracy, pokemon.evasion = self.accuracy, self.evasion
+        pokemon.critical_stage, pokemon.stats_version = self.critical_stage, self.stats_version
+        for attribute in BATTLE_ATTRIBUTES:
+            value = getattr(self, attribute)
+            if value is not None:
+                setattr(pokemon, attribute, value)
+
+        if self.item == 0:
+            pokemon.item = None
+        else:
+            pokemon.item = {"name": ITEM_CODES.name(self.item)}
+            if self.item_used != NO_ITEM:
+                pokemon.item["used"] = self.item_used == ITEM_USED
+
+        layout, sources = self.layout, (self.stats, self.float_stats)
+        for name, keys, floats, positions in zip(STAT_DICTS, layout.keys, layout.floats, layout.positions):
+            setattr(pokemon, name, {key: sources[is_float][i] for key, is_float, i in zip(keys, floats, positions)})
+
+        pokemon.moves = {key: move_dict(move) for key, move in zip(self.move_keys, self.moves)}
+        return pokemon
+
+
+    def __reduce__(self):
+        # Codes are only meaningful in this process, so pickles carry the full Pokémon
+        return BattlePokemon.from_pokemon, (self.to_pokemon(),)
+
+
+    # -------- battle-time accessors -------- #
+
+    def stat(self, stat):
+        """Current value of a battle stat, by its key in current_stats (one lookup in the shared layout)."""
+        is_float, i = self.layout.current_index[stat]
+        return (self.float_stats if is_float else self.stats)[i]
+
+
+    def is_fainted(self):
+        return self.hp == 0
+
+
+    def status_name(self):
+        return STATUS_CODES.name(self.status)
+
+
+def compact_team(team):
+    return [BattlePokemon.from_pokemon(pokemon) for pokemon in team]
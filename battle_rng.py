@@ -0,0 +1,126 @@
+from contextlib import contextmanager
+import numpy as np
+
+# ---------------------- BATTLE RNG ---------------------- #
+#
+# Every random draw of the battle code (damage rolls, accuracy, status chances, move order,
+# AI exploration) goes through the current BattleRNG instead of the global `random` and
+# `np.random` states. Each BattleRNG is a numpy Generator seeded from a SeedSequence, so
+# a battle replays bit-exactly from its seed, and `spawn` hands parallel workers or child
+# battles streams that are independent of each other. Uniform draws are generated in blocks
+# of `block_size` and handed out one by one, instead of one generator call per event.
+
+BLOCK_SIZE = 256
+
+
+class BattleRNG:
+    """One independent random stream, seeded from an int, a SeedSequence or fresh OS entropy (None)."""
+
+    def __init__(self, seed=None, block_size=BLOCK_SIZE):
+        self.seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.generator = np.random.Generator(np.random.PCG64(self.seed_sequence))
+        self.block_size = block_size
+        self.block = []
+        self.index = 0
+        self.block_state = self.generator.bit_generator.state  # Generator state the current block was drawn from
+
+
+    def refill(self):
+        self.block_state = self.generator.bit_generator.state
+        self.block = self.generator.random(self.block_size).tolist()
+        self.index = 0
+
+
+    def get_state(self):
+        """Position in the stream, as (generator state before the current block, index in the block)."""
+        return self.block_state, self.index
+
+
+    def set_state(self, state):
+        """Go back (or forward) to a position returned by get_state."""
+        block_state, index = state
+        self.generator.bit_generator.state = block_state
+        self.refill()
+        self.index = index
+
+
+    def random(self, size=None):
+        """A uniform float in [0, 1), or a float64 array of `size` of them."""
+        if size is None:
+            if self.index == len(self.block):
+                self.refill()
+            value = self.block[self.index]
+            self.index += 1
+            return value
+
+        # Arrays take the rest of the current block first, so the stream doesn't depend on how draws are grouped
+        count = int(np.prod(size))
+        values = []
+        while len(values) < count:
+            if self.index == len(self.block):
+                self.refill()
+            take = self.block[self.index:self.index + count - len(values)]
+            self.index += len(take)
+            values += take
+        return np.array(values).reshape(size)
+
+
+    def uniform(self, low=0.0, high=1.0, size=None):
+        return low + (high - low) * self.random(size)
+
+
+    def choice(self, options, p=None):
+        """A random element of `options`, uniformly or with probabilities `p`."""
+        r = self.random()
+        if p is None:
+            return options[int(r * len(options))]
+        for option, probability in zip(options, p):
+            r -= probability
+            if r < 0:
+                return option
+        return options[-1]
+
+
+    def spawn(self):
+        """A child stream, independent of this one and of every other child."""
+        return BattleRNG(self.seed_sequence.spawn(1)[0], self.block_size)
+
+
+# ---------------------- CURRENT RNG ---------------------- #
+
+_rng = BattleRNG()
+random = _rng.random    # Rebound on every RNG change so drawing is a single call
+uniform = _rng.uniform
+choice = _rng.choice
+
+
+def get_rng():
+    return _rng
+
+
+def set_rng(rng):
+    """Replace the current stream and return the previous one."""
+    global _rng, random, uniform, choice
+    previous, _rng = _rng, rng
+    random, uniform, choice = rng.random, rng.uniform, rng.choice
+    return previous
+
+
+def seed(seed=None):
+    """Restart the current stream from `seed` (what random.seed / np.random.seed used to do)."""
+    set_rng(BattleRNG(seed))
+
+
+def spawn():
+    """A new stream spawned from the current one."""
+    return _rng.spawn()
+
+
+@contextmanager
+def use(rng):
+    """Temporarily draw from `rng`."""
+    previous = set_rng(rng)
+    try:
+        yield rng
+    finally:
+        set_rng(previous)
@@ -1,7 +1,7 @@
 from pokemon import Pokemon
 from trainer import Trainer
 from battle_simulation import pokemon_battle
-import sqlite3
+import game_data
 
 # ---------------------- COPY POKEMON ---------------------- #
 
@@ -26,68 +26,9 @@ def copy_pokemon(pokemon):
 # ---------------------- MOVE RETRIVEVAL FROM DATABASE ---------------------- #
 
 def retrieve_and_format_moves(name):
-    conn = sqlite3.connect("database/move_db.sqlite")
-    cursor = conn.cursor()
-
-    # print(name)
-
-    #  print first 5 rows
-    cursor.execute("SELECT * FROM Moves WHERE name = ?", (name,))
-    rows = cursor.fetchall()
-    #  print(rows)
-    if not rows:
+    move = game_data.battle_move(name)
+    if move is None:
         print(f"{name.capitalize()} is not in the database")
-        return 
-    
-    row = rows[0]
-    # print(row)
-
-    name = row[1]
-    types = row[2]
-    power = row[3] if row[3] else 0
-    accuracy = row[4] if row[4] else 1.0
-    priority = row[6]
-    multihit = False if row[7]==0 else True
-
-    stat_change = False
-    for i in range(8, 18):
-        if row[i] != 1.0:
-            stat_change = True
-            break
-    
-    if stat_change:
-        stat_change_list = [row[8:18]]
-    else:
-        stat_change_list = None
-
-    status = None if row[18] == "none" else row[18]
-    status_chance = 1 if row[19] == 0.0 else row[19]
-
-    statusChange = [status, status_chance] if status else None
-
-    effectiveState = row[20]
-
-    heals = None if row[21] == 0.0 else row[21]
-
-    if row[1] == "rest":
-        heals = 1.0
-
-    damageHeals = False if row[22] == 0 else True
-
-    move = {
-        "name": name,
-        "type": types,
-        "power": power,
-        "accuracy" : accuracy,
-        "priority": priority,
-        "multi_hit": multihit,
-        "StatChange" : stat_change_list,
-        "statusChange": statusChange,
-        "effectiveState": effectiveState,
-        "heals": heals,
-        "damageHeals": damageHeals
-    }
-    
     return move
 
 
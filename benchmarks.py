@@ -0,0 +1,336 @@
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+import battle_log
+import battle_rng
+from battle_log import NullSink
+
+# ---------------------- BENCHMARK SUITE ---------------------- #
+#
+# Times the battle engine and AI hot paths. Every benchmark is a setup function that builds its
+# fixtures and returns the zero-argument call to time; setup is never timed. Per benchmark it
+# reports ops/sec, per-call latency percentiles (microseconds) and, from a separate pass under
+# tracemalloc (which slows calls down, so it never overlaps the timing), the peak memory one
+# call allocates and the memory every call leaves behind. Events go to a NullSink and each
+# benchmark starts from the same seed, so runs do the same work.
+#
+# Results are saved as JSON; given a baseline file, any benchmark whose ops/sec dropped or
+# whose median latency rose by more than --threshold is reported and the exit status is 1.
+#
+#   python benchmarks.py -o baseline.json
+#   python benchmarks.py --baseline baseline.json --threshold 0.15 -o current.json
+#   python benchmarks.py calculate_damage perform_move --min-time 2
+
+DEFAULT_THRESHOLD = 0.15  # Allowed slowdown before a benchmark counts as a regression
+MIN_TIME = 1.0            # Seconds of timed calls per benchmark
+MIN_CALLS = 20
+WARMUP_CALLS = 5
+ALLOC_CALLS = 20          # Calls traced for allocations
+PERCENTILES = (50, 90, 99)
+SEED = 1234
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a setup function under `name`."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+# ---------------------- FIXTURES ---------------------- #
+
+def fresh(pokemon):
+    from battle_test import copy_pokemon
+    fighter = copy_pokemon(pokemon)
+    fighter.check_ability_use(None, "initialize")
+    return fighter
+
+
+def duel():
+    """Fresh Charizard and Blastoise from the battle_test fixtures, as the engine initializes them."""
+    from battle_test import charizard, blastoise
+    return fresh(charizard), fresh(blastoise)
+
+
+def restore_hp(*pokemon):
+    for p in pokemon:
+        p.hp, p.status = p.max_hp, None
+
+
+def load_battle_state():
+    # "models/game mechanics" isn't an importable package name, so load the module from its path
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "game mechanics", "battle_state.py")
+    spec = importlib.util.spec_from_file_location("battle_state", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def battle_state_pokemon(species_name, level=50):
+    """A models-layer PokemonInBattle of the species (no moves, not saved to the game database)."""
+    import game_data
+    from models.pokemon.pokemon_dex_info import PokemonDexInfo
+    from models.pokemon.pokemon_ingame import PokemonInGame
+    from models.pokemon.pokemon_inbattle import PokemonInBattle
+
+    species = game_data.pokemon_species(species_name)
+    dex_info = PokemonDexInfo(
+        name=species.name.capitalize(), pokedex_no=species.id, pokedex_entry="",
+        typing=[species.type1] + ([species.type2] if species.type2 else []), species=species.name,
+        height=0.0, weight=0.0,
+        base_stats={"HP": species.base_hp, "Atk": species.base_attack, "Def": species.base_defense,
+                    "SpA": species.base_sp_attack, "SpD": species.base_sp_defense, "Spe": species.base_speed},
+        abilities=[species.ability1], catch_rate=0, base_friendship=0, base_exp=0, growth_rate="medium", egg_cycle=0,
+    )
+    return PokemonInBattle(PokemonInGame(dex_info, level, "hardy", species.ability1, pokemon_id=0))
+
+
+# ---------------------- BENCHMARKS ---------------------- #
+
+@benchmark("calculate_damage")
+def bench_calculate_damage():
+    from battle_logic import calculate_damage
+    attacker, defender = duel()
+    move = attacker.moves["fire-blast"]
+    return lambda: calculate_damage(attacker, defender, move)
+
+
+@benchmark("perform_move")
+def bench_perform_move():
+    from battle_logic import perform_move
+    attacker, defender = duel()
+    move = attacker.moves["earthquake"]
+
+    def call():
+        restore_hp(defender)
+        perform_move(attacker, defender, move)
+    return call
+
+
+@benchmark("select_order")
+def bench_select_order():
+    from battle_logic import select_order
+    item1, item2 = {"name": "quick-claw"}, {"name": "leftovers"}
+    # Same priority and speed, so every call goes through the Quick Claw rolls and the random tie-break
+    return lambda: select_order(0, 0, 100, 100, item1, item2)
+
+
+@benchmark("get_turn_order")
+def bench_get_turn_order():
+    battle_state = load_battle_state()
+    player, opponent = battle_state_pokemon("charizard"), battle_state_pokemon("blastoise")
+    state = battle_state.BattleState([player], [opponent])
+    choices = {player: "flamethrower", opponent: "surf"}
+    return lambda: state.get_turn_order(choices)
+
+
+@benchmark("create_move")
+def bench_create_move():
+    from models.pokemon.move import create_move
+    return lambda: create_move("thunderbolt")
+
+
+@benchmark("battleAI")
+def bench_battle_ai():
+    from battle_ai import battleAI, get_Q_table
+    attacker, defender = duel()
+    get_Q_table()  # Load the Q-table before timing
+    return lambda: battleAI(attacker, defender, None)
+
+
+@benchmark("battleAI_RL")
+def bench_battle_ai_rl():
+    import reinforcement_learning
+    from battle_logic import DamageCache
+    from q_table import QTable
+    reinforcement_learning.Q_table = QTable()  # Updates go to a scratch table, never the saved one
+    attacker, defender = duel()
+    cache = DamageCache()
+
+    def call():
+        restore_hp(attacker, defender)
+        reinforcement_learning.battleAI_RL(attacker, defender, None, cache)
+    return call
+
+
+@benchmark("simulate_battle_RL")
+def bench_simulate_battle_rl():
+    import reinforcement_learning as rl
+    from battle_test import charizard, blastoise
+    from q_table import QTable
+    from trainer import Trainer
+    rl.Q_table = QTable()
+    # One whole training episode, including the fresh Pokémon copies every episode makes
+    return lambda: rl.simulate_battle_RL(Trainer("RL_Agent", [rl.rl_agent_pokemon(charizard)]),
+                                         Trainer("Baseline", [rl.baseline_pokemon(blastoise)]))
+
+
+@benchmark("team_battle")
+def bench_team_battle():
+    from battle_ai import battleAI, get_Q_table
+    from battle_engine import ai_provider, run_battle
+    from battle_test import charizard, blastoise, venusaur, pikachu, snorlax, gengar
+    from battle_test import copy_pokemon
+    from trainer import Trainer
+    get_Q_table()
+    provider = ai_provider(battleAI)
+    # A full headless 3v3 engine battle, including copying the teams it starts from
+    return lambda: run_battle(Trainer("Red", [copy_pokemon(p) for p in (charizard, blastoise, venusaur)]),
+                              Trainer("Blue", [copy_pokemon(p) for p in (pikachu, snorlax, gengar)]),
+                              provider, provider, max_turns=200)
+
+
+# ---------------------- MEASUREMENT ---------------------- #
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    return sorted_values[min(len(sorted_values) - 1, max(0, round(q / 100 * len(sorted_values)) - 1))]
+
+
+def measure(call, min_time=MIN_TIME, min_calls=MIN_CALLS, alloc_calls=ALLOC_CALLS):
+    for _ in range(WARMUP_CALLS):
+        call()
+
+    timings = []
+    start = time.perf_counter()
+    while len(timings) < min_calls or time.perf_counter() - start < min_time:
+        t0 = time.perf_counter_ns()
+        call()
+        timings.append(time.perf_counter_ns() - t0)
+    timings.sort()
+    result = {"calls": len(timings), "ops_per_sec": len(timings) / (sum(timings) / 1e9),
+              "mean_us": sum(timings) / len(timings) / 1e3}
+    result.update({f"p{q}_us": percentile(timings, q) / 1e3 for q in PERCENTILES})
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        peaks = []
+        for _ in range(alloc_calls):
+            tracemalloc.reset_peak()
+            current = tracemalloc.get_traced_memory()[0]
+            call()
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+        retained = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    result["alloc_peak_bytes"] = max(peaks)
+    result["alloc_retained_bytes"] = retained / alloc_calls
+    return result
+
+
+def run_benchmarks(names=None, min_time=MIN_TIME, seed=SEED):
+    """Run the named benchmarks (all by default). A benchmark that fails records its error instead."""
+    results = {}
+    with battle_log.sink_to(NullSink()):
+        for name in names or BENCHMARKS:
+            battle_rng.seed(seed)
+            try:
+                results[name] = measure(BENCHMARKS[name](), min_time)
+            except Exception as e:
+                results[name] = {"error": f"{type(e).__name__}: {e}"}
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": results,
+    }
+
+
+# ---------------------- RESULTS AND BASELINES ---------------------- #
+
+def save_results(filename, results):
+    with open(filename, "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def load_results(filename):
+    with open(filename) as f:
+        return json.load(f)
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Regressions against a baseline, as (benchmark, metric, baseline value, current value) tuples.
+    A benchmark regresses if its ops/sec fell, or its median latency rose, by more than `threshold`.
+    A benchmark that fails now is a regression too, and so is one that failed in the baseline:
+    it has nothing to be compared against, so it would otherwise pass unchecked.
+    """
+    regressions = []
+    for name, old in baseline["benchmarks"].items():
+        new = results["benchmarks"].get(name)
+        if new is None:
+            continue
+        if "error" in old:
+            regressions.append((name, "baseline error", old["error"], None))
+            continue
+        if "error" in new:
+            regressions.append((name, "error", None, new["error"]))
+            continue
+        if new["ops_per_sec"] < old["ops_per_sec"] * (1 - threshold):
+            regressions.append((name, "ops_per_sec", old["ops_per_sec"], new["ops_per_sec"]))
+        if new["p50_us"] > old["p50_us"] * (1 + threshold):
+            regressions.append((name, "p50_us", old["p50_us"], new["p50_us"]))
+    return regressions
+
+
+def report(results, baseline=None):
+    print(f"{'benchmark':<20}{'ops/sec':>12}{'p50 us':>11}{'p90 us':>11}{'p99 us':>11}{'peak KB':>10}{'vs base':>10}")
+    for name, result in results["benchmarks"].items():
+        if "error" in result:
+            print(f"{name:<20}  error: {result['error']}")
+            continue
+        change = ""
+        old = (baseline or {}).get("benchmarks", {}).get(name)
+        if old and "error" not in old:
+            change = f"{result['ops_per_sec'] / old['ops_per_sec'] - 1:+.1%}"
+        print(f"{name:<20}{result['ops_per_sec']:>12,.0f}{result['p50_us']:>11.1f}{result['p90_us']:>11.1f}"
+              f"{result['p99_us']:>11.1f}{result['alloc_peak_bytes'] / 1024:>10.1f}{change:>10}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the battle engine and AI hot paths.")
+    parser.add_argument("benchmarks", nargs="*", help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("-o", "--output", help="save the results to this JSON file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="allowed slowdown, as a fraction")
+    parser.add_argument("--min-time", type=float, default=MIN_TIME, help="seconds of timed calls per benchmark")
+    parser.add_argument("--seed", type=int, default=SEED)
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    baseline = load_results(args.baseline) if args.baseline else None
+    results = run_benchmarks(args.benchmarks, args.min_time, args.seed)
+    report(results, baseline)
+    if args.output:
+        save_results(args.output, results)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.threshold)
+        for name, metric, old, new in regressions:
+            if metric == "error":
+                print(f"REGRESSION {name}: now fails ({new})")
+            elif metric == "baseline error":
+                print(f"REGRESSION {name}: failed in the baseline ({old}), record a new baseline")
+            else:
+                print(f"REGRESSION {name}: {metric} {old:,.1f} -> {new:,.1f}")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
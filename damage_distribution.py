@@ -0,0 +1,143 @@
+from functools import lru_cache
+import numpy as np
+import typeRelation
+from battle_logic import MULTI_HIT_COUNTS, MULTI_HIT_ODDS, damage_inputs
+
+# ---------------------- EXACT DAMAGE DISTRIBUTIONS ---------------------- #
+#
+# calculate_damage truncates scale * r, where r is uniform on [0.85, 1.0). So P(damage == d) is
+# the share of that interval where d <= scale * r < d + 1, which gives every probability exactly
+# instead of by sampling. The crit and non-crit branches, multi-hit counts and accuracy are then
+# combined as mixtures and convolutions of these distributions.
+
+ROLL_MIN = 0.85
+ROLL_MAX = 1.0
+
+
+@lru_cache(maxsize=4096)
+def roll_distribution(scale):
+    """probabilities[d] = P(int(scale * r) == d) for the 0.85-1.0 random roll r (read-only array)."""
+    if scale <= 0:
+        probabilities = np.ones(1)
+    else:
+        damages = np.arange(int(scale * ROLL_MAX) + 1)
+        low = np.maximum(damages / scale, ROLL_MIN)
+        high = np.minimum((damages + 1) / scale, ROLL_MAX)
+        probabilities = np.clip(high - low, 0, None) / (ROLL_MAX - ROLL_MIN)
+        probabilities /= probabilities.sum()
+    probabilities.flags.writeable = False
+    return probabilities
+
+
+def mix(weighted):
+    """Mixture of (weight, probabilities) distributions."""
+    probabilities = np.zeros(max(len(p) for weight, p in weighted if weight))
+    for weight, p in weighted:
+        if weight:
+            probabilities[:len(p)] += weight * p
+    return probabilities
+
+
+@lru_cache(maxsize=4096)
+def hit_distribution(level, power, attack, defense, crit_attack, crit_defense, modifier, crit_chance, crit_multiplier):
+    """
+    Damage of a single hit, with the critical and normal branches mixed. `modifier` is the
+    product of STAB, type effectiveness, burn and ability boosts.
+    """
+    def scale(A, D):
+        return (((((2 * level)/5) + 2) * power * (A/D))/50) * modifier
+
+    crit_chance = min(crit_chance, 1)
+    probabilities = mix([(1 - crit_chance, roll_distribution(scale(attack, defense))),
+                         (crit_chance, roll_distribution(scale(crit_attack, crit_defense) * crit_multiplier))])
+    probabilities.flags.writeable = False
+    return probabilities
+
+
+@lru_cache(maxsize=1024)
+def multi_hit_distribution(*hit_inputs):
+    """Total damage of a multi-hit move: hits are independent, their count follows MULTI_HIT_ODDS."""
+    hit = hit_distribution(*hit_inputs)
+    totals = {1: hit}
+    for hits in range(2, max(MULTI_HIT_COUNTS) + 1):
+        totals[hits] = np.convolve(totals[hits - 1], hit)
+    probabilities = mix([(odds, totals[hits]) for hits, odds in zip(MULTI_HIT_COUNTS, MULTI_HIT_ODDS)])
+    probabilities.flags.writeable = False
+    return probabilities
+
+
+class DamageDistribution:
+    """Exact distribution of the damage of one move use: probabilities[d] = P(damage == d)."""
+
+    def __init__(self, probabilities):
+        self.probabilities = probabilities
+
+
+    def probability(self, damage):
+        return float(self.probabilities[damage]) if 0 <= damage < len(self.probabilities) else 0.0
+
+
+    def outcomes(self):
+        """(damage, probability) of every possible damage value, lowest first."""
+        damages = np.flatnonzero(self.probabilities)
+        return list(zip(damages.tolist(), self.probabilities[damages].tolist()))
+
+
+    def min_damage(self):
+        return int(np.flatnonzero(self.probabilities)[0])
+
+
+    def max_damage(self):
+        return int(np.flatnonzero(self.probabilities)[-1])
+
+
+    def expected(self):
+        return float(np.dot(np.arange(len(self.probabilities)), self.probabilities))
+
+
+    def ko_chance(self, hp, uses=1):
+        """Probability that `uses` independent uses of the move deal at least `hp` damage in total."""
+        probabilities = self.probabilities
+        for _ in range(uses - 1):
+            probabilities = np.convolve(probabilities, self.probabilities)
+        return float(min(1.0, probabilities[hp:].sum())) if hp > 0 else 1.0
+
+
+def fixed_damage(damage, chance=1.0):
+    """Distribution that deals `damage` with probability `chance`, else nothing."""
+    probabilities = np.zeros(damage + 1)
+    probabilities[0] += 1 - chance
+    probabilities[damage] += chance
+    return DamageDistribution(probabilities)
+
+
+def damage_distribution(attacker, defender, move):
+    """
+    Exact damage distribution of `attacker` using `move` on `defender`, following perform_move:
+    accuracy (checked for single-hit moves only), fixed-damage moves, Levitate and Water Absorb
+    immunities, crits and the 2-5 hit counts of multi-hit moves.
+    The damage is what the move deals, before Focus Sash or fainting caps it.
+    """
+    multi_hit = bool(move["multi_hit"])
+    hit_chance = 1.0 if multi_hit else min(1.0, move["accuracy"] * attacker.accuracy / defender.evasion)
+
+    if not multi_hit and move["name"] in ["seismic-toss", "night-shade"]:
+        immune = (move["name"] == "seismic-toss" and "ghost" in defender.typing) or \
+                 (move["name"] == "night-shade" and "normal" in defender.typing)
+        return fixed_damage(attacker.level, 0.0 if immune else hit_chance)
+
+    immune = defender.ability == "levitate" and move["type"] == "ground"
+    absorbed = defender.ability == ("water absorb" if multi_hit else "water-absorb") and move["type"] == "water"
+    if not move["power"] or immune or absorbed:
+        return fixed_damage(0)
+
+    inputs = damage_inputs(attacker, defender, [move])
+    modifier = float(inputs["stab"][0] * typeRelation.DUAL_TYPE_CHART[inputs["move_type"][0], inputs["defender_type1"], inputs["defender_type2"]]
+                     * (0.5 if inputs["burned"] else 1) * (1.5 if inputs["boosted"][0] else 1))
+    hit_inputs = (attacker.level, float(inputs["power"][0]), float(inputs["attack"][0]), float(inputs["defense"][0]),
+                  float(inputs["crit_attack"][0]), float(inputs["crit_defense"][0]), modifier,
+                  float(inputs["crit_chance"]), float(inputs["crit_multiplier"]))
+
+    if multi_hit:
+        return DamageDistribution(multi_hit_distribution(*hit_inputs))
+    return DamageDistribution(mix([(1 - hit_chance, np.ones(1)), (hit_chance, hit_distribution(*hit_inputs))]))
@@ -0,0 +1,192 @@
+import argparse
+import os
+import sqlite3
+from item_db import ITEM_TABLE
+from move_db import MOVES_TABLE
+from poke_db import POKEMON_TABLE
+
+# ---------------------- CONSOLIDATED DATABASE ---------------------- #
+#
+# game_data.sqlite holds the four databases in one file, so the game opens one connection and
+# cross-table questions ("all moves of species X") are one indexed join:
+#   - Pokemon, Moves and item keep the columns (and ids) of their own databases; their UNIQUE
+#     name columns are the name indexes
+#   - pokemon_move is the learnset, reduced to ids with foreign keys to Pokemon and Moves:
+#     its primary key (pokemon_id, position) keeps each learnset in order, clustered per
+#     species (WITHOUT ROWID), and the unique (pokemon_id, move_id) index rejects duplicates
+#   - covering indexes answer the learnset join's move-name and reverse lookups without
+#     reading whole rows
+# PRAGMA user_version records SCHEMA_VERSION; game_data only reads a file with the version it knows.
+# consolidate() builds the file from scratch; update() brings an existing one in line with the four
+# databases by writing only the rows that differ (what ingest.py --refresh uses), so an unchanged
+# source leaves the file - and the game_data.bundle compiled from it - untouched.
+#
+#   python database_creation/game_db.py                 # database/*.sqlite -> database/game_data.sqlite
+#   python database_creation/game_db.py -o /tmp/database
+#   python database_creation/game_db.py --update
+
+SCHEMA_VERSION = 1
+GAME_DATABASE = "game_data.sqlite"
+SOURCES = {  # schema name -> legacy database file
+    "pokemon_src": "pokemon_db.sqlite",
+    "move_src": "move_db.sqlite",
+    "item_src": "item_db.sqlite",
+    "learnset_src": "pokemon_move_db.sqlite",
+}
+
+POKEMON_MOVE_TABLE = """
+    CREATE TABLE IF NOT EXISTS pokemon_move (
+        pokemon_id INTEGER NOT NULL REFERENCES Pokemon(id) ON DELETE CASCADE,
+        position INTEGER NOT NULL,  -- Order of the move in the Pokémon's learnset
+        move_id INTEGER NOT NULL REFERENCES Moves(id) ON DELETE CASCADE,
+        PRIMARY KEY (pokemon_id, position)
+    ) WITHOUT ROWID;
+"""
+
+SCHEMA = [
+    POKEMON_TABLE,
+    MOVES_TABLE,
+    ITEM_TABLE,
+    POKEMON_MOVE_TABLE,
+    "CREATE UNIQUE INDEX IF NOT EXISTS pokemon_move_pair ON pokemon_move (pokemon_id, move_id)",
+    "CREATE INDEX IF NOT EXISTS pokemon_move_by_move ON pokemon_move (move_id, pokemon_id)",  # Which Pokémon learn a move
+    "CREATE INDEX IF NOT EXISTS moves_id_name ON Moves (id, name)",  # Move names of a learnset, without the effect texts
+]
+
+NAMED_TABLES = {"Pokemon": "pokemon_src", "Moves": "move_src", "item": "item_src"}  # table -> schema it is copied from
+
+# Learnset rows keep their order per Pokémon; rows whose Pokémon or move (by id and name) is missing are dropped
+LEARNSET_ROWS = """
+    SELECT l.pokemon_id, ROW_NUMBER() OVER (PARTITION BY l.pokemon_id ORDER BY l.id), l.move_id
+    FROM learnset_src.pokemon_move_db l
+    JOIN Pokemon p ON p.id = l.pokemon_id AND p.name = l.pokemon_name
+    JOIN Moves m ON m.id = l.move_id AND m.name = l.move_name
+"""
+
+COPY = [f"INSERT INTO {table} SELECT * FROM {schema}.{table} ORDER BY id" for table, schema in NAMED_TABLES.items()] + [
+    f"INSERT OR IGNORE INTO pokemon_move (pokemon_id, position, move_id) {LEARNSET_ROWS}",
+]
+
+
+def attach_sources(conn, database_dir):
+    for schema, filename in SOURCES.items():
+        path = os.path.join(database_dir, filename)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No {filename} in {database_dir}")
+        conn.execute(f"ATTACH DATABASE ? AS {schema}", (path,))
+
+
+def consolidate(database_dir, target=None):
+    """Build game_data.sqlite (or `target`) from the four databases in `database_dir`. Returns table -> row count."""
+    target = target or os.path.join(database_dir, GAME_DATABASE)
+    temporary = target + ".tmp"
+    if os.path.exists(temporary):
+        os.remove(temporary)
+
+    conn = sqlite3.connect(temporary)
+    try:
+        conn.execute("PRAGMA foreign_keys = ON")
+        attach_sources(conn, database_dir)
+        with conn:
+            for statement in SCHEMA + COPY:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        for schema in SOURCES:
+            conn.execute(f"DETACH DATABASE {schema}")
+        if conn.execute("PRAGMA foreign_key_check").fetchall():
+            raise sqlite3.IntegrityError("Foreign key check failed")
+        conn.execute("ANALYZE")  # Table statistics for the query planner
+        counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in ("Pokemon", "Moves", "item", "pokemon_move")}
+    finally:
+        conn.close()
+    os.replace(temporary, target)
+    return counts
+
+
+def schema_version(filename):
+    """PRAGMA user_version of a database file, or None if there is no file."""
+    if not os.path.exists(filename):
+        return None
+    conn = sqlite3.connect(filename)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def update_statements(conn):
+    """(statement, description) pairs that turn the consolidated tables into the attached sources' rows."""
+    statements = []
+    for table, schema in NAMED_TABLES.items():
+        columns = [row[1] for row in conn.execute(f"PRAGMA main.table_info({table})")]
+        updates = ", ".join(f"{column} = excluded.{column}" for column in columns if column != "id")
+        statements += [
+            # Rows whose id is gone, or whose name now belongs to another id (their learnset rows cascade)
+            (f"""DELETE FROM main.{table} WHERE id NOT IN (SELECT id FROM {schema}.{table})
+                OR name IN (SELECT s.name FROM {schema}.{table} s JOIN main.{table} m ON m.name = s.name AND m.id != s.id)""",
+             f"{table} deleted"),
+            # New and changed rows, upserted on their id so learnset rows keep pointing at them
+            (f"""INSERT INTO main.{table} SELECT * FROM (SELECT * FROM {schema}.{table} EXCEPT SELECT * FROM main.{table})
+                WHERE true ON CONFLICT(id) DO UPDATE SET {updates}""", f"{table} upserted"),
+        ]
+    statements += [
+        (f"CREATE TEMP TABLE learnset AS {LEARNSET_ROWS}", None),
+        ("""DELETE FROM pokemon_move WHERE (pokemon_id, position, move_id) NOT IN
+               (SELECT * FROM temp.learnset)""", "pokemon_move deleted"),
+        ("INSERT OR IGNORE INTO pokemon_move SELECT * FROM temp.learnset EXCEPT SELECT * FROM pokemon_move", "pokemon_move inserted"),
+        ("DROP TABLE temp.learnset", None),
+    ]
+    return statements
+
+
+def update(database_dir, target=None):
+    """
+    Bring game_data.sqlite (or `target`) in line with the four databases in `database_dir`, writing
+    only the rows that differ, in one transaction. A missing target, or one of another SCHEMA_VERSION,
+    is built with consolidate() instead. Returns change -> row count (empty: already up to date).
+    """
+    target = target or os.path.join(database_dir, GAME_DATABASE)
+    if schema_version(target) != SCHEMA_VERSION:
+        return {"rebuilt": sum(consolidate(database_dir, target).values())}
+
+    conn = sqlite3.connect(target)
+    try:
+        conn.execute("PRAGMA foreign_keys = ON")
+        attach_sources(conn, database_dir)
+        changes = {}
+        conn.execute("BEGIN")
+        try:
+            for statement, description in update_statements(conn):
+                count = conn.execute(statement).rowcount  # Rows the statement itself wrote, not cascaded deletes
+                if description is not None and count > 0:
+                    changes[description] = count
+            if conn.execute("PRAGMA foreign_key_check").fetchall():
+                raise sqlite3.IntegrityError("Foreign key check failed")
+        except BaseException:
+            conn.rollback()
+            raise
+        conn.commit()
+        if changes:
+            conn.execute("ANALYZE")
+        return changes
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge the game databases into one schema-versioned database.")
+    parser.add_argument("-o", "--database-dir", default="database", help="directory of the four databases")
+    parser.add_argument("--target", help=f"database to write (default: <database-dir>/{GAME_DATABASE})")
+    parser.add_argument("--update", action="store_true", help="only write the rows that changed in an existing database")
+    args = parser.parse_args(argv)
+
+    if args.update:
+        changes = update(args.database_dir, args.target)
+        print(", ".join(f"{change}: {count} rows" for change, count in changes.items()) or "Already up to date")
+        return
+    counts = consolidate(args.database_dir, args.target)
+    print(", ".join(f"{table}: {count} rows" for table, count in counts.items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,474 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+import requests
+from game_db import GAME_DATABASE, consolidate, update
+from item_db import INSERT_ITEM, ITEM_ATTRIBUTE_URL, ITEM_TABLE, item_effect
+from move_db import INSERT_MOVE, MOVES_TABLE, move_row
+from move_poke_db import INSERT_POKEMON_MOVE, POKEMON_MOVE_TABLE
+from poke_db import INSERT_POKEMON, POKEMON_TABLE, english_effect, pokemon_row
+
+# ---------------------- INGESTION PIPELINE ---------------------- #
+#
+# Rebuilds the four databases from PokeAPI in one pass, instead of the one-request-at-a-time,
+# one-commit-per-row scripts next to this file (whose row builders it reuses):
+#   - requests go through a thread pool of --workers, each thread with its own keep-alive session
+#   - every JSON response is cached on disk under --cache, one file per URL
+#     (<cache>/pokeapi.co/api/v2/pokemon/6.json), so a rerun downloads nothing
+#   - each table is written with one executemany inside one transaction, into a temporary file
+#     that replaces the database only once it is complete - and only if none of its sources failed,
+#     since a missing row would shift the AUTOINCREMENT ids of every row after it
+# The Pokémon moves table reuses the cached Pokémon responses, and the item list is fetched once.
+#
+# A cache directory doubles as a set of recorded responses: --offline builds from it alone, and
+# --base-url sends the requests to another server (e.g. a local fixture server), while the cache
+# keeps PokeAPI URLs as its keys. --refresh updates existing databases with only what changed
+# upstream since the cache was filled (see refresh()). A rebuild then rebuilds the consolidated
+# game_data.sqlite the game reads from the four databases; a refresh applies only the rows that
+# changed to it (see game_db.py), so an unchanged upstream leaves it and game_data.bundle as they are.
+#
+#   python database_creation/ingest.py --cache .pokeapi_cache
+#   python database_creation/ingest.py --cache .pokeapi_cache --refresh --report changes.json
+#   python database_creation/ingest.py --cache tests/responses --offline -o /tmp/database
+#   python database_creation/ingest.py --base-url http://localhost:8000/api/v2 --tables moves items
+
+POKEAPI = "https://pokeapi.co/api/v2"
+POKEMON_COUNT = 151
+MOVE_COUNT = 165
+WORKERS = 16
+RETRIES = 3
+TIMEOUT = 30
+
+DATABASES = {  # table name -> database file, as game_data reads them
+    "pokemon": "pokemon_db.sqlite",
+    "moves": "move_db.sqlite",
+    "items": "item_db.sqlite",
+    "pokemon_moves": "pokemon_move_db.sqlite",
+}
+
+
+# ---------------------- RESPONSE CACHE ---------------------- #
+
+def content_hash(data):
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+
+
+class ResponseCache:
+    """
+    JSON responses on disk, one file per URL, plus validators.json: each response's ETag,
+    Last-Modified date and content hash, which refresh() uses to tell changed sources apart.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.validators_file = os.path.join(directory, "validators.json")
+        self.lock = threading.Lock()
+        try:
+            with open(self.validators_file, encoding="utf-8") as f:
+                self.validators = json.load(f)
+        except FileNotFoundError:
+            self.validators = {}
+
+
+    def path(self, url):
+        parts = urlsplit(url)
+        name = parts.path.strip("/") or "index"
+        if parts.query:
+            name += "-" + hashlib.sha1(parts.query.encode()).hexdigest()[:12]
+        return os.path.join(self.directory, parts.netloc, *name.split("/")) + ".json"
+
+
+    def get(self, url):
+        try:
+            with open(self.path(url), encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+
+    def put(self, url, data, etag=None, last_modified=None):
+        path = self.path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Written to a temporary file first, so concurrent or interrupted writes never leave half a response
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(temporary, path)
+        with self.lock:
+            self.validators[url] = {"etag": etag, "last_modified": last_modified, "hash": content_hash(data)}
+
+
+    def remove(self, url):
+        if os.path.exists(self.path(url)):
+            os.remove(self.path(url))
+        with self.lock:
+            self.validators.pop(url, None)
+
+
+    def save_validators(self):
+        os.makedirs(self.directory, exist_ok=True)
+        with self.lock:
+            with open(self.validators_file + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(self.validators, f, indent=0, sort_keys=True)
+            os.replace(self.validators_file + ".tmp", self.validators_file)
+
+
+# ---------------------- FETCHER ---------------------- #
+
+class Fetcher:
+    """
+    Fetches PokeAPI URLs concurrently through the response cache, each at most once per run.
+    Failed requests (after retrying 429s, 5xx and connection errors) return None, like the scripts.
+
+    With `revalidate`, cached responses are checked with a conditional request (If-None-Match /
+    If-Modified-Since) instead of trusted, and every URL's outcome is recorded: "unchanged",
+    "changed" (or new), "gone" (404, dropped from the cache) or "failed" (the cached copy, if
+    any, is used).
+    """
+
+    def __init__(self, cache_dir=None, base_url=POKEAPI, workers=WORKERS, offline=False, retries=RETRIES, timeout=TIMEOUT,
+                 revalidate=False):
+        if (offline or revalidate) and cache_dir is None:
+            raise ValueError("Offline fetching and revalidation need a cache directory")
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+        self.base_url = base_url.rstrip("/")
+        self.workers = workers
+        self.offline = offline
+        self.retries = retries
+        self.timeout = timeout
+        self.revalidate = revalidate
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.responses = {}  # url -> response of this run
+        self.outcomes = {}   # url -> outcome of this run
+        self.touched = set()  # every URL asked for since the last reset (see sources_missing)
+        self.counts = dict.fromkeys(("cached", "downloaded", "unchanged", "changed", "gone", "failed"), 0)
+
+
+    def record(self, url, outcome, data):
+        with self.lock:
+            self.counts[outcome] += 1
+            self.outcomes[url] = outcome
+            self.responses[url] = data
+        return data
+
+
+    def session(self):
+        if not hasattr(self.local, "session"):
+            self.local.session = requests.Session()
+        return self.local.session
+
+
+    def request(self, url, headers=None):
+        """(status, response) of a GET, retried on 429s, 5xx and connection errors; status is an exception name if it never connected."""
+        # Responses link to pokeapi.co; those links go to base_url instead when it is another server
+        if url.startswith(POKEAPI):
+            url = self.base_url + url[len(POKEAPI):]
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session().get(url, headers=headers, timeout=self.timeout)
+            except requests.RequestException as e:
+                status, response = type(e).__name__, None
+            else:
+                status = response.status_code
+                if status < 500 and status != 429:
+                    break
+            if attempt < self.retries:
+                time.sleep(0.5 * 2**attempt)
+        if status not in (200, 304):
+            print(f"Error: {status} - Could not fetch {url}")
+        return status, response
+
+
+    def download(self, url, cached=None):
+        validators = self.cache.validators.get(url, {}) if self.cache is not None and cached is not None else {}
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+        status, response = self.request(url, headers)
+        if status == 304:
+            return self.record(url, "unchanged", cached)
+        if status == 404 and self.revalidate:
+            if cached is not None:
+                self.cache.remove(url)
+            return self.record(url, "gone", None)
+        if status != 200:
+            return self.record(url, "failed", cached)
+
+        data = response.json()
+        if self.cache is not None:
+            self.cache.put(url, data, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        if cached is None:
+            return self.record(url, "changed" if self.revalidate else "downloaded", data)
+        return self.record(url, "unchanged" if content_hash(data) == validators.get("hash", content_hash(cached)) else "changed", data)
+
+
+    def get(self, url):
+        self.touched.add(url)
+        if url in self.responses:
+            return self.responses[url]
+        cached = self.cache.get(url) if self.cache is not None else None
+        if cached is not None and (self.offline or not self.revalidate):
+            return self.record(url, "cached", cached)
+        if self.offline:
+            print(f"Error: {url} is not in the recorded responses")
+            return self.record(url, "failed", None)
+        return self.download(url, cached)
+
+
+    def get_all(self, urls):
+        """url -> response (None if it failed) for every distinct URL, fetched `workers` at a time."""
+        urls = list(dict.fromkeys(urls))
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return dict(zip(urls, pool.map(self.get, urls)))
+
+
+    def sources_missing(self):
+        """Whether a URL asked for since the last call failed with no cached copy, then start over."""
+        missing = any(self.outcomes.get(url) == "failed" and self.responses.get(url) is None for url in self.touched)
+        self.touched = set()
+        return missing
+
+
+    def save(self):
+        if self.cache is not None:
+            self.cache.save_validators()
+
+
+# ---------------------- ROWS ---------------------- #
+
+def pokemon_rows(fetcher, count=POKEMON_COUNT):
+    pokemon = fetcher.get_all(f"{POKEAPI}/pokemon/{i}" for i in range(1, count + 1))
+    responses = [data for data in pokemon.values() if data is not None]
+    abilities = fetcher.get_all(ability["ability"]["url"] for data in responses for ability in data["abilities"])
+    texts = {url: None if data is None else english_effect(data) for url, data in abilities.items()}
+    return [pokemon_row(data, texts.get) for data in responses]
+
+
+def move_rows(fetcher, count=MOVE_COUNT):
+    moves = fetcher.get_all(f"{POKEAPI}/move/{i}" for i in range(1, count + 1))
+    return [move_row(data) for data in moves.values() if data is not None]
+
+
+def item_rows(fetcher):
+    attribute = fetcher.get(ITEM_ATTRIBUTE_URL)
+    if attribute is None:
+        return []
+    items = fetcher.get_all(item["url"] for item in attribute["items"])
+    return [(item["name"], item_effect(items[item["url"]])) for item in attribute["items"] if items[item["url"]] is not None]
+
+
+def pokemon_move_rows(fetcher, database_dir, count=POKEMON_COUNT):
+    """Learnset rows of every Pokémon in the Pokémon database, for the moves in the move database."""
+    pokemon_conn = sqlite3.connect(os.path.join(database_dir, DATABASES["pokemon"]))
+    all_pokemon = pokemon_conn.execute("SELECT id, name FROM Pokemon ORDER BY id").fetchall()
+    pokemon_conn.close()
+    move_conn = sqlite3.connect(os.path.join(database_dir, DATABASES["moves"]))
+    move_ids = dict(move_conn.execute("SELECT name, id FROM Moves"))
+    move_conn.close()
+
+    # Same requests (by PokeAPI id) as the Pokémon table, so these are cache hits after a full rebuild.
+    # Responses are matched to rows by name: row ids are database ids, not PokeAPI ids.
+    pokemon = fetcher.get_all(f"{POKEAPI}/pokemon/{i}" for i in range(1, count + 1))
+    by_name = {data["name"]: data for data in pokemon.values() if data is not None}
+    rows = []
+    for pokemon_id, pokemon_name in all_pokemon:
+        data = by_name.get(pokemon_name)
+        if data is None:
+            continue
+        for move in data["moves"]:
+            move_name = move["move"]["name"]
+            if move_name in move_ids:
+                rows.append((pokemon_id, pokemon_name, move_ids[move_name], move_name))
+    return rows
+
+
+# ---------------------- DATABASES ---------------------- #
+
+def write_table(filename, schema, insert, rows):
+    """Write `rows` into a fresh database with one transaction, then swap it in for `filename`."""
+    temporary = filename + ".tmp"
+    if os.path.exists(temporary):
+        os.remove(temporary)
+    conn = sqlite3.connect(temporary)
+    try:
+        with conn:
+            conn.execute(schema)
+            # Rows repeating a unique name are skipped, as the scripts skip them on IntegrityError
+            conn.executemany(insert.replace("INSERT INTO", "INSERT OR IGNORE INTO"), rows)
+    finally:
+        conn.close()
+    os.replace(temporary, filename)
+
+
+def table_steps(fetcher, database_dir):
+    """table name -> (schema, insert, function returning its rows)"""
+    return {
+        "pokemon": (POKEMON_TABLE, INSERT_POKEMON, lambda: pokemon_rows(fetcher)),
+        "moves": (MOVES_TABLE, INSERT_MOVE, lambda: move_rows(fetcher)),
+        "items": (ITEM_TABLE, INSERT_ITEM, lambda: item_rows(fetcher)),
+        "pokemon_moves": (POKEMON_MOVE_TABLE, INSERT_POKEMON_MOVE, lambda: pokemon_move_rows(fetcher, database_dir)),
+    }
+
+
+def rebuild(fetcher, database_dir, tables=tuple(DATABASES)):
+    """
+    Rebuild the given tables' databases in `database_dir`. Returns table -> rows written; a table
+    with a source that failed (and had no cached copy) isn't written, and its database is kept.
+    """
+    os.makedirs(database_dir, exist_ok=True)
+    steps = table_steps(fetcher, database_dir)
+    fetcher.sources_missing()
+    written = {}
+    for table in DATABASES:  # Pokémon moves last: they read the Pokémon and move databases
+        if table in tables:
+            schema, insert, rows = steps[table]
+            rows = rows()
+            if fetcher.sources_missing():
+                print(f"{table}: not written, some sources failed ({DATABASES[table]} kept)")
+                continue
+            write_table(os.path.join(database_dir, DATABASES[table]), schema, insert, rows)
+            written[table] = len(rows)
+            print(f"{table}: {len(rows)} rows written to {DATABASES[table]}")
+    fetcher.save()
+    return written
+
+
+# ---------------------- INCREMENTAL REFRESH ---------------------- #
+#
+# refresh() updates the databases in place instead of replacing them: the rows are rebuilt from
+# revalidated responses (unchanged ones are 304s or cache hits), compared with the rows already
+# stored, and only the difference is written - changed rows are upserted on their name, so their
+# ids (which the Pokémon moves table refers to) stay the same, and rows whose source is gone are
+# deleted. The diff is computed before anything is written, and each table's changes are applied
+# in one short transaction, so readers of the game databases are never locked out for a download.
+# Deletions are skipped for a table if any of its sources failed with no cached copy to fall back on.
+
+def insert_columns(insert):
+    """(SQL table, column names) of an INSERT statement."""
+    table, columns = re.search(r"INTO\s+(\w+)\s*\((.*?)\)", insert, re.S).groups()
+    return table, [column.strip() for column in columns.split(",")]
+
+
+def refresh_named_table(conn, insert, rows, delete):
+    """Upsert changed rows and delete missing ones of a table keyed on its first column (name)."""
+    table, columns = insert_columns(insert)
+    key = columns[0]
+    stored = {row[0]: row for row in conn.execute(f"SELECT {', '.join(columns)} FROM {table}")}
+    wanted = {}
+    for row in rows:
+        wanted.setdefault(row[0], tuple(row))  # The first row of a repeated name wins, as in rebuild()
+
+    diff = {
+        "added": [name for name in wanted if name not in stored],
+        "updated": [name for name in wanted if name in stored and stored[name] != wanted[name]],
+        "deleted": [name for name in stored if name not in wanted] if delete else [],
+    }
+    upsert = (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+              f"ON CONFLICT({key}) DO UPDATE SET " + ", ".join(f"{column} = excluded.{column}" for column in columns[1:]))
+    if any(diff.values()):
+        with conn:
+            conn.executemany(upsert, [wanted[name] for name in diff["added"] + diff["updated"]])
+            conn.executemany(f"DELETE FROM {table} WHERE {key} = ?", [(name,) for name in diff["deleted"]])
+    return diff
+
+
+def refresh_pokemon_moves(conn, rows, delete):
+    """Insert and delete learnset rows; they have no unique key, so they are compared as a multiset."""
+    stored = {}
+    for row_id, *row in conn.execute("SELECT id, pokemon_id, pokemon_name, move_id, move_name FROM pokemon_move_db"):
+        stored.setdefault(tuple(row), []).append(row_id)
+    wanted = Counter(map(tuple, rows))
+    added = [row for row, count in wanted.items() for _ in range(count - len(stored.get(row, ())))]
+    deleted = [(row_id, row) for row, row_ids in stored.items() for row_id in row_ids[wanted[row]:]] if delete else []
+
+    diff = {"added": [f"{row[1]}/{row[3]}" for row in added], "updated": [], "deleted": [f"{row[1]}/{row[3]}" for _, row in deleted]}
+    if added or deleted:
+        with conn:
+            conn.executemany(INSERT_POKEMON_MOVE, added)
+            conn.executemany("DELETE FROM pokemon_move_db WHERE id = ?", [(row_id,) for row_id, _ in deleted])
+    return diff
+
+
+def refresh(fetcher, database_dir, tables=tuple(DATABASES)):
+    """Bring the given tables' databases up to date in place. Returns table -> {"added", "updated", "deleted"} keys."""
+    os.makedirs(database_dir, exist_ok=True)
+    steps = table_steps(fetcher, database_dir)
+    fetcher.sources_missing()
+    report = {}
+    for table in DATABASES:  # Pokémon moves last: they read the refreshed Pokémon and move databases
+        if table not in tables:
+            continue
+        schema, insert, rows = steps[table]
+        rows = rows()
+        delete = not fetcher.sources_missing()
+        conn = sqlite3.connect(os.path.join(database_dir, DATABASES[table]))
+        try:
+            conn.execute(schema)
+            if table == "pokemon_moves":
+                report[table] = refresh_pokemon_moves(conn, rows, delete)
+            else:
+                report[table] = refresh_named_table(conn, insert, rows, delete)
+        finally:
+            conn.close()
+        diff = report[table]
+        skipped = "" if delete else " (deletions skipped: some sources failed)"
+        print(f"{table}: {len(diff['added'])} added, {len(diff['updated'])} updated, {len(diff['deleted'])} deleted{skipped}")
+        for change, keys in diff.items():
+            if keys:
+                print(f"  {change}: {', '.join(keys[:20])}{' ...' if len(keys) > 20 else ''}")
+    fetcher.save()
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rebuild the game databases from PokeAPI.")
+    parser.add_argument("-o", "--database-dir", default="database")
+    parser.add_argument("--tables", nargs="+", choices=list(DATABASES), default=list(DATABASES))
+    parser.add_argument("--cache", help="directory of cached (or recorded) JSON responses")
+    parser.add_argument("--offline", action="store_true", help="only use the responses in --cache")
+    parser.add_argument("--base-url", default=POKEAPI, help="API root to request instead of PokeAPI")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="concurrent requests")
+    parser.add_argument("--refresh", action="store_true", help="update the databases in place with what changed since the last run")
+    parser.add_argument("--report", help="with --refresh, also write the changes to this JSON file")
+    args = parser.parse_args(argv)
+    if (args.offline or args.refresh) and not args.cache:
+        parser.error("--offline and --refresh need --cache")
+
+    fetcher = Fetcher(args.cache, args.base_url, args.workers, args.offline, revalidate=args.refresh)
+    start = time.time()
+    if args.refresh:
+        report = refresh(fetcher, args.database_dir, args.tables)
+        if args.report:
+            with open(args.report, "w", encoding="utf-8") as f:
+                json.dump({"tables": report, "sources": fetcher.counts}, f, indent=2)
+        changes = update(args.database_dir)
+        print(f"{GAME_DATABASE}: " + (", ".join(f"{change}: {count}" for change, count in changes.items()) or "unchanged"))
+    else:
+        rebuild(fetcher, args.database_dir, args.tables)
+        changes = consolidate(args.database_dir)
+        print(f"{GAME_DATABASE} rebuilt")
+    if changes and os.path.exists(os.path.join(args.database_dir, "game_data.bundle")):
+        # game_data ignores a bundle built from other databases, so it reads SQLite until it is recompiled
+        print("game_data.bundle is out of date: recompile it with `python game_bundle.py`")
+    counts = fetcher.counts
+    if args.refresh:
+        print(f"Done in {time.time() - start:.1f}s: {counts['unchanged']} responses unchanged, {counts['changed']} changed, "
+              f"{counts['gone']} gone, {counts['cached']} from the cache, {counts['failed']} failed")
+    else:
+        print(f"Done in {time.time() - start:.1f}s: {counts['downloaded']} responses downloaded, "
+              f"{counts['cached']} from the cache, {counts['failed']} failed")
+
+if __name__ == "__main__":
+    main()
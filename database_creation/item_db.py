@@ -1,30 +1,43 @@
 import sqlite3
 import requests
 
-def create_item_table():
-    cursor.execute("""
+ITEM_TABLE = """
     CREATE TABLE IF NOT EXISTS item (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         name TEXT NOT NULL UNIQUE,
         info TEXT NOT NULL
     );
-    """)
+"""
+
+INSERT_ITEM = """
+    INSERT INTO item (name, info) 
+    VALUES (?, ?)
+"""
+
+# Item attribute whose item list the database holds (7 = "holdable-active")
+ITEM_ATTRIBUTE_URL = "https://pokeapi.co/api/v2/item-attribute/7"
+
+def create_item_table():
+    cursor.execute(ITEM_TABLE)
     conn.commit()
 
 
+def item_effect(item_data):
+    return item_data["effect_entries"][0]["effect"]
+
+
 def fetch_item_info(item_url):
     response = requests.get(item_url)
     
     if response.status_code == 200:
-        item_data = response.json()
-        return item_data["effect_entries"][0]["effect"]
+        return item_effect(response.json())
     else:
         print(f"Error: {response.status_code} - Could not fetch data for the item")
         return None
     
 
 def fetch_item_data(i):
-    url = "https://pokeapi.co/api/v2/item-attribute/7"
+    url = ITEM_ATTRIBUTE_URL
     response = requests.get(url)
 
     if response.status_code == 200:
@@ -50,10 +63,7 @@ def insert_item_into_db(i):
     info = item_info
 
     try:
-        cursor.execute("""
-            INSERT INTO item (name, info) 
-            VALUES (?, ?)
-        """, (name, info))
+        cursor.execute(INSERT_ITEM, (name, info))
 
         conn.commit()
         print(f"Inserted {name} into database successfully!")
@@ -68,7 +78,7 @@ if __name__ == "__main__":
     cursor = conn.cursor()
 
     create_item_table()
-    url = "https://pokeapi.co/api/v2/item-attribute/7"
+    url = ITEM_ATTRIBUTE_URL
     response = requests.get(url)
 
     if response.status_code == 200:
@@ -1,12 +1,7 @@
 import requests
 import sqlite3
 
-# Connect to SQLite database
-conn = sqlite3.connect("move_db.sqlite")
-cursor = conn.cursor()
-
-def create_moves_table():
-    cursor.execute("""
+MOVES_TABLE = """
     CREATE TABLE IF NOT EXISTS Moves (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         name TEXT UNIQUE NOT NULL,
@@ -43,8 +38,17 @@ def create_moves_table():
         
         damage_heals INTEGER NOT NULL DEFAULT 0
     );
-    """)
+"""
+
+INSERT_MOVE = """
+    INSERT INTO Moves (
+        name, type, power, accuracy, priority, effect, multi_hit, stat_user_attack, stat_user_defense, stat_user_sp_attack, stat_user_sp_defense, stat_user_speed, stat_opp_attack, stat_opp_defense, stat_opp_sp_attack, stat_opp_sp_defense, stat_opp_speed, status_change, status_chance, effective_state, heals, damage_heals
+    ) 
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
 
+def create_moves_table():
+    cursor.execute(MOVES_TABLE)
     conn.commit()
 
 
@@ -62,14 +66,8 @@ def fetch_move_data(move_no):
         return None
 
 
-def insert_move_into_db(move_no):
-    """Extract relevant data and insert Pokémon into the database."""
-    
-    # Example Usage:
-    move_data = fetch_move_data(move_no)
-    if not move_data:
-        return
-    
+def move_row(move_data):
+    """The INSERT_MOVE values of a move response."""
     name = move_data["name"]
 
     move_type = move_data["type"]["name"]
@@ -160,15 +158,24 @@ def insert_move_into_db(move_no):
     
     damage_heals = 1 if move_data.get("meta",{}).get("category", {}).get("name", None) == "damage+heal" else 0
 
+    return (
+        name, move_type, power, accuracy, priority, effect, multi_hit, stat_user_attack, stat_user_defense, stat_user_sp_attack, stat_user_sp_defense, stat_user_speed, stat_opp_attack, stat_opp_defense, stat_opp_sp_attack, stat_opp_sp_defense, stat_opp_speed, status_change, status_chance, effective_state, heals, damage_heals
+    )
+
+
+def insert_move_into_db(move_no):
+    """Extract relevant data and insert Pokémon into the database."""
+    
+    # Example Usage:
+    move_data = fetch_move_data(move_no)
+    if not move_data:
+        return
+    
+    row = move_row(move_data)
+    name = row[0]
+
     try:
-        cursor.execute("""
-            INSERT INTO Moves (
-                name, type, power, accuracy, priority, effect, multi_hit, stat_user_attack, stat_user_defense, stat_user_sp_attack, stat_user_sp_defense, stat_user_speed, stat_opp_attack, stat_opp_defense, stat_opp_sp_attack, stat_opp_sp_defense, stat_opp_speed, status_change, status_chance, effective_state, heals, damage_heals
-            ) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
-            name, move_type, power, accuracy, priority, effect, multi_hit, stat_user_attack, stat_user_defense, stat_user_sp_attack, stat_user_sp_defense, stat_user_speed, stat_opp_attack, stat_opp_defense, stat_opp_sp_attack, stat_opp_sp_defense, stat_opp_speed, status_change, status_chance, effective_state, heals, damage_heals
-        ))
+        cursor.execute(INSERT_MOVE, row)
         conn.commit()
         print(f"Inserted {name} into database successfully!")
 
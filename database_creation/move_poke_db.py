@@ -1,19 +1,7 @@
 import sqlite3
 import requests
 
-# Connect to both databases
-pokemon_conn = sqlite3.connect("database/pokemon_db.sqlite")
-pokemon_cursor = pokemon_conn.cursor()
-
-move_conn = sqlite3.connect("database/move_db.sqlite")
-move_cursor = move_conn.cursor()
-
-relation_conn = sqlite3.connect("database/pokemon_move_db.sqlite")
-relation_cursor = relation_conn.cursor()
-
-# Create the pokemon_move_db table in pokemon_move_db.sqlite
-def create_pokemon_move_table():
-    relation_cursor.execute("""
+POKEMON_MOVE_TABLE = """
     CREATE TABLE IF NOT EXISTS pokemon_move_db (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         pokemon_id INTEGER NOT NULL,
@@ -23,7 +11,16 @@ def create_pokemon_move_table():
         FOREIGN KEY (pokemon_id) REFERENCES Pokemon(id) ON DELETE CASCADE,
         FOREIGN KEY (move_id) REFERENCES Moves(id) ON DELETE CASCADE
     );
-    """)
+"""
+
+INSERT_POKEMON_MOVE = """
+    INSERT OR IGNORE INTO pokemon_move_db (pokemon_id, pokemon_name, move_id, move_name) 
+    VALUES (?, ?, ?, ?)
+"""
+
+# Create the pokemon_move_db table in pokemon_move_db.sqlite
+def create_pokemon_move_table():
+    relation_cursor.execute(POKEMON_MOVE_TABLE)
     relation_conn.commit()
 
 # Retrieve all Pokémon IDs and Names from pokemon_db.sqlite
@@ -46,17 +43,11 @@ def fetch_and_store_pokemon_moves(pokemon_id, pokemon_name):
         move_name = move["move"]["name"]
 
         # Check if move exists in move_db.sqlite
-        move_cursor.execute("SELECT id FROM Moves WHERE name = ?", (move_name,))
-        move_entry = move_cursor.fetchone()
-
-        if move_entry:
-            move_id = move_entry[0]
+        if move_name in move_ids:
+            move_id = move_ids[move_name]
 
             # Insert into pokemon_move_db if the relation doesn't already exist
-            relation_cursor.execute("""
-                INSERT OR IGNORE INTO pokemon_move_db (pokemon_id, pokemon_name, move_id, move_name) 
-                VALUES (?, ?, ?, ?)
-            """, (pokemon_id, pokemon_name, move_id, move_name))
+            relation_cursor.execute(INSERT_POKEMON_MOVE, (pokemon_id, pokemon_name, move_id, move_name))
 
     relation_conn.commit()
 
@@ -69,6 +60,16 @@ def populate_pokemon_moves():
         print(f"Added moves for {pokemon_name} (ID: {pokemon_id})")
 
 if __name__ == "__main__":
+    # Connect to both databases
+    pokemon_conn = sqlite3.connect("database/pokemon_db.sqlite")
+    pokemon_cursor = pokemon_conn.cursor()
+
+    move_conn = sqlite3.connect("database/move_db.sqlite")
+    move_ids = dict(move_conn.execute("SELECT name, id FROM Moves"))  # Move name -> id, read once
+
+    relation_conn = sqlite3.connect("database/pokemon_move_db.sqlite")
+    relation_cursor = relation_conn.cursor()
+
     # Run the functions
     create_pokemon_move_table()
     populate_pokemon_moves()
@@ -1,11 +1,10 @@
 import sqlite3
 import requests
 
-def create_pokemon_table():
-    cursor.execute("""
+# Schema of the shipped database/pokemon_db.sqlite (Pokédex number = id, in insertion order)
+POKEMON_TABLE = """
     CREATE TABLE IF NOT EXISTS Pokemon (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
-        pokedex_no INTEGER NOT NULL,
         name TEXT NOT NULL UNIQUE,
         type1 TEXT NOT NULL,
         type2 TEXT,  
@@ -18,13 +17,19 @@ def create_pokemon_table():
         ability1 TEXT NOT NULL,   -- First possible ability
         ability1_text TEXT NOT NULL, -- First ability text
         ability2 TEXT,            -- Second possible ability (optional)
-        ability2_text TEXT, -- second ability text
-        ability2_isHidden TEXT,  -- True of False
-        ability3 TEXT,  -- third ability (optional)
-        ability3_text TEXT -- third ability text
-        ability3_isHidden TEXT,  -- True of False
+        ability2_text TEXT, -- Second ability text
+        ability3 TEXT,  -- Hidden ability (optional)
+        ability3_text TEXT -- Third ability text
     );
-    """)
+"""
+
+INSERT_POKEMON = """
+    INSERT INTO Pokemon (name, type1, type2, base_hp, base_attack, base_defense, base_sp_attack, base_sp_defense, base_speed, ability1, ability1_text, ability2, ability2_text,  ability3, ability3_text) 
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+def create_pokemon_table():
+    cursor.execute(POKEMON_TABLE)
     conn.commit()
 
 
@@ -42,32 +47,29 @@ def fetch_pokemon_data(pokemon_no):
         return None
     
 
+def english_effect(ability_data):
+    """The English effect text of an ability response."""
+    for effect_entry in ability_data["effect_entries"]:
+        if effect_entry["language"]["name"] == "en":
+            return effect_entry["effect"]
+
+    print("Couldn't fetch ability info in english.")
+    return None
+
+
 def fetch_ability_text(url):
     response = requests.get(url)
 
     if response.status_code == 200:
-        abilities_data = response.json()
-        abilities_data = abilities_data["effect_entries"]
-        for ability_data in abilities_data:
-            if ability_data["language"]["name"] == "en":
-                return ability_data["effect"]
-        
-        print("Couldn't fetch ability info in english.")
-        return None
+        return english_effect(response.json())
     
     else:
         print(f"Error: {response.status_code} - Could not fetch data for this ability.")
         return None
 
 
-def insert_pokemon_into_db(poke_no):
-    """Extract relevant data and insert Pokémon into the database."""
-    
-    # Example Usage:
-    pokemon_data = fetch_pokemon_data(poke_no)
-    if not pokemon_data:
-        return
-    
+def pokemon_row(pokemon_data, ability_text):
+    """The INSERT_POKEMON values of a Pokémon response; `ability_text(url)` looks up ability texts."""
     name = pokemon_data["name"]
 
     type1 = pokemon_data["types"][0]["type"]["name"]
@@ -81,17 +83,28 @@ def insert_pokemon_into_db(poke_no):
     base_speed = pokemon_data["stats"][5]["base_stat"]
 
     ability1 = pokemon_data["abilities"][0]["ability"]["name"]
-    ability1_text = fetch_ability_text(pokemon_data["abilities"][0]["ability"]["url"])
+    ability1_text = ability_text(pokemon_data["abilities"][0]["ability"]["url"])
     ability2 = pokemon_data["abilities"][1]["ability"]["name"] if len(pokemon_data["abilities"]) > 1 else None
-    ability2_text = fetch_ability_text(pokemon_data["abilities"][1]["ability"]["url"]) if ability2 else None
+    ability2_text = ability_text(pokemon_data["abilities"][1]["ability"]["url"]) if ability2 else None
     ability3 = pokemon_data["abilities"][2]["ability"]["name"] if len(pokemon_data["abilities"]) > 2 else None
-    ability3_text = fetch_ability_text(pokemon_data["abilities"][2]["ability"]["url"]) if ability3 else None
+    ability3_text = ability_text(pokemon_data["abilities"][2]["ability"]["url"]) if ability3 else None
+
+    return (name, type1, type2, base_hp, base_attack, base_defense, base_sp_attack, base_sp_defense, base_speed, ability1, ability1_text, ability2, ability2_text, ability3, ability3_text)
+
+
+def insert_pokemon_into_db(poke_no):
+    """Extract relevant data and insert Pokémon into the database."""
+    
+    # Example Usage:
+    pokemon_data = fetch_pokemon_data(poke_no)
+    if not pokemon_data:
+        return
+    
+    row = pokemon_row(pokemon_data, fetch_ability_text)
+    name = row[0]
 
     try:
-        cursor.execute("""
-            INSERT INTO Pokemon (name, type1, type2, base_hp, base_attack, base_defense, base_sp_attack, base_sp_defense, base_speed, ability1, ability1_text, ability2, ability2_text,  ability3, ability3_text) 
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (name, type1, type2, base_hp, base_attack, base_defense, base_sp_attack, base_sp_defense, base_speed, ability1, ability1_text, ability2, ability2_text, ability3, ability3_text))
+        cursor.execute(INSERT_POKEMON, row)
 
         conn.commit()
         print(f"Inserted {name} into database successfully!")
@@ -0,0 +1,344 @@
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import zlib
+import numpy as np
+import typeRelation
+
+# -------------------- BUNDLE FORMAT -------------------- #
+# Species, moves, items, learnsets and the type chart compiled into one read-only file:
+#   - a header and a directory of named sections (offset, length), each section 8-byte aligned
+#   - "schema": JSON with each table's columns (name, kind, whether it has NULLs), the type names
+#     and the hash of the SQLite databases the bundle was built from
+#   - one fixed-width record array per table (int64 / float64 / uint32 string id per column, in
+#     id order) and an open-addressing name index (crc32, linear probing; slot = row + 1)
+#   - "strings": every string once, UTF-8, located through "string_offsets"
+#   - learnsets as move rows per species row ("learnset_offsets" into "learnset_moves")
+#   - "type_chart": float64[attacking type, defending type]
+# The file is memory-mapped read-only and records are decoded on their first lookup, so every
+# process on the host shares one page-cache copy and loading it costs a header read, not a query
+# per row. Decoded records and learnsets are immutable and memoized per table, so a warm lookup
+# is one dict access, as with the SQLite tables.
+#
+#   python game_bundle.py                    # database/*.sqlite -> database/game_data.bundle
+#   python game_bundle.py -o /tmp/game_data.bundle
+
+MAGIC = b"GDBN"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHI")   # magic, version, section count, reserved (12 bytes)
+SECTION = struct.Struct("<20sQQ")  # name, offset, length (36 bytes)
+NULL_STRING = 0xFFFFFFFF
+NULL_INT = np.iinfo(np.int64).min
+KIND_DTYPES = {"i": "<i8", "f": "<f8", "s": "<u4"}
+KIND_FORMATS = {"i": "q", "f": "d", "s": "I"}
+OFFSET_PAIR = struct.Struct("<II")  # (start, end) of a string or learnset
+SLOT = struct.Struct("<I")
+
+
+def source_hash(paths):
+    """sha1 of the given database files, to tell whether a bundle was built from them."""
+    digest = hashlib.sha1()
+    for path in paths:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def name_hash(name):
+    return zlib.crc32(name)  # Stable across processes, unlike hash()
+
+
+def record_dtype(columns):
+    return np.dtype([(name, KIND_DTYPES[kind]) for name, kind, _ in columns])
+
+
+# -------------------- BUILD -------------------- #
+
+def column_kind(values):
+    """"s" for text, "f" for real and "i" for integer (or all-NULL) columns."""
+    if any(isinstance(value, str) for value in values):
+        return "s"
+    if any(isinstance(value, float) for value in values):
+        return "f"
+    return "i"
+
+
+class StringTable:
+    def __init__(self):
+        self.ids = {}
+        self.data = []
+
+    def add(self, string):
+        if string is None:
+            return NULL_STRING
+        if string not in self.ids:
+            self.ids[string] = len(self.data)
+            self.data.append(string.encode("utf-8"))
+        return self.ids[string]
+
+    def arrays(self):
+        offsets = np.zeros(len(self.data) + 1, dtype="<u4")
+        offsets[1:] = np.cumsum([len(data) for data in self.data])
+        return np.frombuffer(b"".join(self.data), dtype=np.uint8), offsets
+
+
+def name_index(names):
+    """Open-addressing slots (row + 1, 0 = empty) of UTF-8 names, at most half full."""
+    slots = np.zeros(1 << max(3, (2 * len(names) - 1).bit_length()), dtype="<u4")
+    mask = len(slots) - 1
+    for row, name in enumerate(names):
+        slot = name_hash(name) & mask
+        while slots[slot]:
+            slot = (slot + 1) & mask
+        slots[slot] = row + 1
+    return slots
+
+
+def build_bundle(filename):
+    """Compile the game data of the SQLite databases into a bundle at `filename`. Returns its size in bytes."""
+    import game_data  # Imported here: game_data loads bundles through this module
+    moves, species, items, learnsets = game_data.sqlite_tables()
+    tables = {"moves": moves.all(), "species": species.all(), "items": items.all()}
+    strings = StringTable()
+    schema = {"tables": {}, "types": list(typeRelation.TYPES), "source": source_hash(game_data.source_databases())}
+    sections = {}
+
+    for table, rows in tables.items():
+        fields = rows[0]._fields
+        columns = [(name, column_kind([row[i] for row in rows]), any(row[i] is None for row in rows)) for i, name in enumerate(fields)]
+        records = np.zeros(len(rows), dtype=record_dtype(columns))
+        for i, (name, kind, _) in enumerate(columns):
+            if kind == "s":
+                records[name] = [strings.add(row[i]) for row in rows]
+            elif kind == "f":
+                records[name] = [np.nan if row[i] is None else row[i] for row in rows]
+            else:
+                records[name] = [NULL_INT if row[i] is None else row[i] for row in rows]
+        schema["tables"][table] = {"columns": columns, "rows": len(rows)}
+        sections[table] = records
+        sections[table + ".index"] = name_index([row.name.encode("utf-8") for row in rows])
+
+    move_rows = {row.name: i for i, row in enumerate(tables["moves"])}
+    learnset_rows = [[move_rows[name] for name in learnsets.get(row.name) if name in move_rows] for row in tables["species"]]
+    sections["learnset_offsets"] = np.concatenate([[0], np.cumsum([len(rows) for rows in learnset_rows])]).astype("<u4")
+    sections["learnset_moves"] = np.array([row for rows in learnset_rows for row in rows], dtype="<u4")
+    sections["type_chart"] = typeRelation.TYPE_CHART.astype("<f8")
+    sections["strings"], sections["string_offsets"] = strings.arrays()
+    sections = {"schema": np.frombuffer(json.dumps(schema).encode("utf-8"), dtype=np.uint8), **sections}
+
+    # Section data starts after the directory, each section 8-byte aligned
+    offset = HEADER.size + SECTION.size * len(sections)
+    directory = []
+    for name, array in sections.items():
+        offset += -offset % 8
+        directory.append((name, offset, array.nbytes))
+        offset += array.nbytes
+
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    temp = filename + ".tmp"
+    with open(temp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(sections), 0))
+        for name, start, length in directory:
+            f.write(SECTION.pack(name.encode("ascii"), start, length))
+        for (name, start, _), array in zip(directory, sections.values()):
+            f.write(b"\0" * (start - f.tell()))
+            f.write(np.ascontiguousarray(array).tobytes())
+        size = f.tell()
+    os.replace(temp, filename)
+    return size
+
+
+# -------------------- LOAD -------------------- #
+
+class GameBundle:
+    """A memory-mapped bundle file. Raises ValueError if it has another format or version."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        with open(filename, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)  # Stays mapped after the file is closed
+        magic, version, count, _ = HEADER.unpack_from(self.buffer, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{filename} is not a game data bundle")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{filename} has format {version}, expected {FORMAT_VERSION}")
+        self.sections = {}
+        for i in range(count):
+            name, offset, length = SECTION.unpack_from(self.buffer, HEADER.size + i * SECTION.size)
+            self.sections[name.rstrip(b"\0").decode("ascii")] = (offset, length)
+
+        self.schema = json.loads(self.section("schema").tobytes())
+        self.types = tuple(self.schema["types"])
+        self.strings = self.sections["strings"][0]
+        self.string_offsets = self.sections["string_offsets"][0]
+        self.type_chart = self.section("type_chart", "<f8").reshape(len(self.types), len(self.types))
+
+
+    def section(self, name, dtype=np.uint8):
+        """Read-only array view of a section (no copy)."""
+        offset, length = self.sections[name]
+        dtype = np.dtype(dtype)
+        return np.frombuffer(self.buffer, dtype=dtype, count=length // dtype.itemsize, offset=offset)
+
+
+    def string_bytes(self, string_id):
+        start, end = OFFSET_PAIR.unpack_from(self.buffer, self.string_offsets + 4 * string_id)
+        return self.buffer[self.strings + start:self.strings + end]
+
+
+    def string(self, string_id):
+        return None if string_id == NULL_STRING else self.string_bytes(string_id).decode("utf-8")
+
+
+    def tables(self, records):
+        """(moves, species, items, learnsets) with the interface of game_data's tables; `records` maps each table to its record type."""
+        moves = BundleTable(self, "moves", records["moves"])
+        species = BundleTable(self, "species", records["species"])
+        return moves, species, BundleTable(self, "items", records["items"]), BundleLearnsets(self, species, moves)
+
+
+class BundleTable:
+    """
+    One table of a bundle, looked up by name (through its index) or id (binary search). Each row
+    is decoded once; later lookups of the same name or row return the memoized record.
+    """
+
+    def __init__(self, bundle, table, record):
+        self.bundle = bundle
+        self.record = record
+        columns = bundle.schema["tables"][table]["columns"]
+        self.name_column = [name for name, _, _ in columns].index("name")
+        self.row_struct = struct.Struct("<" + "".join(KIND_FORMATS[kind] for _, kind, _ in columns))  # Same layout as record_dtype
+        # Columns that need decoding: string ids, and the NULL markers of columns that have NULLs
+        self.strings = [i for i, (_, kind, _) in enumerate(columns) if kind == "s"]
+        self.nullable_floats = [i for i, (_, kind, nullable) in enumerate(columns) if kind == "f" and nullable]
+        self.nullable_ints = [i for i, (_, kind, nullable) in enumerate(columns) if kind == "i" and nullable]
+        self.start, length = bundle.sections[table]
+        self.count = length // self.row_struct.size
+        self.index_start, length = bundle.sections[table + ".index"]
+        self.mask = length // 4 - 1
+        self.ids = bundle.section(table, record_dtype(columns))["id"]
+        self.records = [None] * self.count  # Decoded records by row
+        self.by_name = {}  # Records by name, for names found before
+        self.by_id = {}    # Records by id, for ids found before
+
+
+    def values(self, row):
+        return self.row_struct.unpack_from(self.bundle.buffer, self.start + row * self.row_struct.size)
+
+
+    def make(self, row):
+        values = list(self.values(row))
+        for i in self.strings:
+            values[i] = self.bundle.string(values[i])
+        for i in self.nullable_floats:
+            if values[i] != values[i]:  # NaN is NULL
+                values[i] = None
+        for i in self.nullable_ints:
+            if values[i] == NULL_INT:
+                values[i] = None
+        return self.record._make(values)
+
+
+    def record_at(self, row):
+        record = self.records[row]
+        if record is None:
+            record = self.records[row] = self.make(row)
+        return record
+
+
+    def find(self, name):
+        """Row of `name`, or -1."""
+        encoded = name.encode("utf-8")
+        buffer = self.bundle.buffer
+        slot = name_hash(encoded) & self.mask
+        while True:
+            row = SLOT.unpack_from(buffer, self.index_start + 4 * slot)[0] - 1
+            if row < 0:
+                return -1
+            if self.bundle.string_bytes(self.values(row)[self.name_column]) == encoded:
+                return row
+            slot = (slot + 1) & self.mask
+
+
+    def get(self, name, default=None):
+        record = self.by_name.get(name)
+        if record is None:
+            row = self.find(name) if isinstance(name, str) else -1
+            if row < 0:
+                return default  # Misses aren't memoized, so unknown names can't grow the table
+            record = self.by_name[name] = self.record_at(row)
+        return record
+
+
+    def get_by_id(self, row_id, default=None):
+        record = self.by_id.get(row_id)
+        if record is None:
+            row = int(np.searchsorted(self.ids, row_id))
+            if row >= self.count or self.ids[row] != row_id:
+                return default
+            record = self.by_id[row_id] = self.record_at(row)
+        return record
+
+
+    def all(self):
+        """Every row, in id order."""
+        return tuple(self.record_at(row) for row in range(self.count))
+
+
+class BundleLearnsets:
+    """Move names each Pokémon can learn, in learnset order."""
+
+    def __init__(self, bundle, species, moves):
+        self.bundle = bundle
+        self.species = species
+        self.moves = moves
+        self.offsets = bundle.sections["learnset_offsets"][0]
+        self.move_rows = bundle.sections["learnset_moves"][0]
+        self.learnsets = {}  # Pokémon name -> decoded learnset
+
+
+    def get(self, pokemon_name):
+        learnset = self.learnsets.get(pokemon_name)
+        if learnset is None:
+            row = self.species.find(pokemon_name)
+            if row < 0:
+                return ()
+            buffer = self.bundle.buffer
+            start, end = OFFSET_PAIR.unpack_from(buffer, self.offsets + 4 * row)
+            move_rows = struct.unpack_from(f"<{end - start}I", buffer, self.move_rows + 4 * start)
+            learnset = self.learnsets[pokemon_name] = tuple(self.moves.record_at(move_row).name for move_row in move_rows)
+        return learnset
+
+
+def load_bundle(filename):
+    return GameBundle(filename)
+
+
+def load_current(filename, sources):
+    """The bundle at `filename` if it exists and was built from the `sources` databases as they are now, else None."""
+    if not os.path.exists(filename):
+        return None
+    try:
+        bundle = GameBundle(filename)
+    except ValueError:
+        return None
+    if bundle.schema["source"] != source_hash(sources):
+        return None
+    return bundle
+
+
+def main(argv=None):
+    import game_data
+    parser = argparse.ArgumentParser(description="Compile the game databases into a memory-mappable bundle.")
+    parser.add_argument("-o", "--output", default=os.path.join(game_data.DATABASE_DIR, game_data.BUNDLE))
+    args = parser.parse_args(argv)
+    size = build_bundle(args.output)
+    print(f"Wrote {args.output} ({size} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+import os
+import sqlite3
+from collections import OrderedDict, namedtuple
+from types import MappingProxyType
+
+# ---------------------- GAME DATA ACCESS ---------------------- #
+#
+# Moves, species, items and learnsets are read from the SQLite databases once per process
+# and kept as immutable records (namedtuples with one field per column), indexed by name and
+# by id. Memory-constrained workers can switch to LRU mode instead: rows are then fetched on
+# demand through one connection per process, and only the most recent `lru_size` are kept.
+#
+# Everything is read from the consolidated game_data.sqlite (built by database_creation/game_db.py)
+# when it exists with the schema version below; otherwise from the four separate databases.
+# A compiled game_data.bundle (see game_bundle.py) built from the current databases takes
+# precedence over both: it is memory-mapped, so processes share it instead of loading a copy.
+
+DATABASE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "database")
+GAME_DATABASE = "game_data.sqlite"
+BUNDLE = "game_data.bundle"
+LEGACY_DATABASES = ("pokemon_db.sqlite", "move_db.sqlite", "item_db.sqlite", "pokemon_move_db.sqlite")
+SCHEMA_VERSION = 1  # PRAGMA user_version of the game_data.sqlite this module reads (see game_db.SCHEMA_VERSION)
+
+# database -> (query of (Pokémon name, move name) rows in learnset order, Pokémon name column)
+LEARNSET_QUERIES = {
+    GAME_DATABASE: ("SELECT p.name, m.name FROM Pokemon p JOIN pokemon_move l ON l.pokemon_id = p.id "
+                    "JOIN Moves m ON m.id = l.move_id {where} ORDER BY l.pokemon_id, l.position", "p.name"),
+    "pokemon_move_db.sqlite": ("SELECT pokemon_name, move_name FROM pokemon_move_db {where} ORDER BY id", "pokemon_name"),
+}
+
+# Record fields follow the column order of each table, so records also index like raw rows
+MoveRecord = namedtuple("MoveRecord", [
+    "id", "name", "type", "power", "accuracy", "effect", "priority", "multi_hit",
+    "stat_user_attack", "stat_user_defense", "stat_user_sp_attack", "stat_user_sp_defense", "stat_user_speed",
+    "stat_opp_attack", "stat_opp_defense", "stat_opp_sp_attack", "stat_opp_sp_defense", "stat_opp_speed",
+    "status_change", "status_chance", "effective_state", "heals", "damage_heals"])
+SpeciesRecord = namedtuple("SpeciesRecord", [
+    "id", "name", "type1", "type2", "base_hp", "base_attack", "base_defense", "base_sp_attack",
+    "base_sp_defense", "base_speed", "ability1", "ability1_text", "ability2", "ability2_text",
+    "ability3", "ability3_text"])
+ItemRecord = namedtuple("ItemRecord", ["id", "name", "info"])
+
+connections = {}  # database path -> (pid, connection)
+
+
+def connect(database):
+    """The process's connection to a database (connections can't be shared with forked workers)."""
+    pid, conn = connections.get(database, (None, None))
+    if pid != os.getpid():
+        conn = sqlite3.connect(database, check_same_thread=False)
+        connections[database] = (os.getpid(), conn)
+    return conn
+
+
+class Table:
+    """One database table, indexed by its `key` column (row name) and by id."""
+
+    def __init__(self, database, table, record, key="name", lru_size=None):
+        self.database = os.path.join(DATABASE_DIR, database)
+        self.table = table
+        self.record = record
+        self.key = key
+        self.lru_size = lru_size
+        self.by_key = self.by_id = None  # Full mode indexes, built on first lookup
+        self.lru = OrderedDict()
+
+
+    def query(self, where="", params=()):
+        columns = ", ".join(self.record._fields)
+        cursor = connect(self.database).execute(f"SELECT {columns} FROM {self.table} {where}", params)
+        return [self.record._make(row) for row in cursor.fetchall()]
+
+
+    def load(self):
+        """Load every row into immutable name and id indexes."""
+        rows = self.query()
+        self.by_key = MappingProxyType({getattr(row, self.key): row for row in rows})
+        self.by_id = MappingProxyType({row.id: row for row in rows})
+
+
+    def lookup(self, column, value):
+        if self.lru_size is None:
+            if self.by_key is None:
+                self.load()
+            return (self.by_key if column == self.key else self.by_id).get(value)
+
+        cache_key = (column, value)
+        if cache_key in self.lru:
+            self.lru.move_to_end(cache_key)
+            return self.lru[cache_key]
+        rows = self.query(f"WHERE {column} = ?", (value,))
+        row = rows[0] if rows else None
+        self.lru[cache_key] = row
+        if len(self.lru) > self.lru_size:
+            self.lru.popitem(last=False)
+        return row
+
+
+    def get(self, name, default=None):
+        row = self.lookup(self.key, name)
+        return default if row is None else row
+
+
+    def get_by_id(self, row_id, default=None):
+        row = self.lookup("id", row_id)
+        return default if row is None else row
+
+
+    def all(self):
+        """Every row, in id order (always loads the whole table)."""
+        if self.by_id is None:
+            self.load()
+        return tuple(self.by_id.values())
+
+
+class Learnsets:
+    """Move names each Pokémon can learn, in learnset order (see LEARNSET_QUERIES)."""
+
+    def __init__(self, database, lru_size=None):
+        self.database = os.path.join(DATABASE_DIR, database)
+        self.sql, self.name_column = LEARNSET_QUERIES[database]
+        self.lru_size = lru_size
+        self.lru = OrderedDict()
+        self.by_pokemon = None
+
+
+    def query(self, where="", params=()):
+        return connect(self.database).execute(self.sql.format(where=where), params).fetchall()
+
+
+    def get(self, pokemon_name):
+        if self.lru_size is not None:
+            if pokemon_name not in self.lru:
+                rows = self.query(f"WHERE {self.name_column} = ?", (pokemon_name,))
+                self.lru[pokemon_name] = tuple(move_name for _, move_name in rows)
+                if len(self.lru) > self.lru_size:
+                    self.lru.popitem(last=False)
+            self.lru.move_to_end(pokemon_name)
+            return self.lru[pokemon_name]
+
+        if self.by_pokemon is None:
+            learnsets = {}
+            for name, move_name in self.query():
+                learnsets.setdefault(name, []).append(move_name)
+            self.by_pokemon = MappingProxyType({name: tuple(moves) for name, moves in learnsets.items()})
+        return self.by_pokemon.get(pokemon_name, ())
+
+
+# ---------------------- MODULE-LEVEL TABLES ---------------------- #
+
+def consolidated():
+    """Whether game_data.sqlite exists with the schema version this module reads."""
+    path = os.path.join(DATABASE_DIR, GAME_DATABASE)
+    if not os.path.exists(path):
+        return False
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    finally:
+        conn.close()
+
+
+def source_databases():
+    """Paths of the SQLite databases the tables are read from."""
+    names = (GAME_DATABASE,) if consolidated() else LEGACY_DATABASES
+    return [os.path.join(DATABASE_DIR, name) for name in names]
+
+
+def sqlite_tables(lru_size=None):
+    """(moves, species, items, learnsets) read from the SQLite databases."""
+    if consolidated():
+        return (Table(GAME_DATABASE, "Moves", MoveRecord, lru_size=lru_size),
+                Table(GAME_DATABASE, "Pokemon", SpeciesRecord, lru_size=lru_size),
+                Table(GAME_DATABASE, "item", ItemRecord, lru_size=lru_size),
+                Learnsets(GAME_DATABASE, lru_size=lru_size))
+    return (Table("move_db.sqlite", "Moves", MoveRecord, lru_size=lru_size),
+            Table("pokemon_db.sqlite", "Pokemon", SpeciesRecord, lru_size=lru_size),
+            Table("item_db.sqlite", "item", ItemRecord, lru_size=lru_size),
+            Learnsets("pokemon_move_db.sqlite", lru_size=lru_size))
+
+
+def configure(lru_size=None, bundle=True):
+    """
+    (Re)create the tables: from the compiled bundle when there is an up-to-date one (unless `bundle`
+    is False), else fully cached from SQLite, or LRU-cached with at most `lru_size` rows each.
+    """
+    global moves, species, items, learnsets
+    if bundle and lru_size is None:
+        import game_bundle  # Imported here: building a bundle reads this module's SQLite tables
+        loaded = game_bundle.load_current(os.path.join(DATABASE_DIR, BUNDLE), source_databases())
+        if loaded is not None:
+            moves, species, items, learnsets = loaded.tables({"moves": MoveRecord, "species": SpeciesRecord, "items": ItemRecord})
+            return
+    moves, species, items, learnsets = sqlite_tables(lru_size)
+
+
+configure()
+
+
+def move(name):
+    """Move record by name, or None if it isn't in the database."""
+    return moves.get(name)
+
+
+def pokemon_species(name):
+    """Species record by name, or None if it isn't in the database."""
+    return species.get(name)
+
+
+def item(name):
+    """Item record by name, or None if it isn't in the database."""
+    return items.get(name)
+
+
+def learnset(pokemon_name):
+    """Names of the moves a Pokémon can learn (empty if unknown)."""
+    return learnsets.get(pokemon_name)
+
+
+def battle_move(name):
+    """
+    A move as the dict the battle code uses, or None if it isn't in the database. Every call
+    returns a new dict, since battles change move powers in place.
+    """
+    record = moves.get(name)
+    if record is None:
+        return None
+    stat_changes = record[8:18]  # stat_user_attack ... stat_opp_speed
+    status = None if record.status_change == "none" else record.status_change
+    return {
+        "name": record.name,
+        "type": record.type,
+        "power": record.power or 0,
+        "accuracy": record.accuracy or 1.0,
+        "priority": record.priority,
+        "multi_hit": record.multi_hit != 0,
+        "StatChange": [stat_changes] if any(change != 1.0 for change in stat_changes) else None,
+        "statusChange": [status, 1 if record.status_chance == 0.0 else record.status_chance] if status else None,
+        "effectiveState": record.effective_state,
+        "heals": 1.0 if record.name == "rest" else record.heals or None,
+        "damageHeals": record.damage_heals != 0,
+    }
@@ -0,0 +1,212 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import game_data
+from batch_sim import simulate_matchup
+
+# ---------------------- MATCHUP MATRIX ---------------------- #
+#
+# Runs random-move 1v1 battles for every ordered pair of species with the batch simulator and
+# stores the win-rate matrix (row species on side 1 against column species on side 2) as one
+# .npz file holding a 2D array per column: battles, wins, losses, win rate, the bounds of its
+# 95% Wilson interval and whether the pair is final. A pair is final once it has played
+# --battles battles or its interval is at most --tolerance wide. The file is rewritten
+# periodically, so an interrupted run resumes where it stopped and final pairs are skipped.
+#
+#   python matchup_matrix.py --all --battles 2000 --workers 8 -o matchups.npz
+#   python matchup_matrix.py charizard blastoise venusaur --movesets movesets.json
+
+DEFAULT_LEVEL = 50
+Z_95 = 1.96
+
+COLUMNS = {"battles": np.int32, "wins": np.int32, "losses": np.int32,
+           "win_rate": np.float32, "ci_low": np.float32, "ci_high": np.float32, "final": np.bool_}
+
+
+# ---------------------- SPECIES AND MOVESETS ---------------------- #
+
+def default_moveset(species_name):
+    """
+    The four strongest damaging moves the species can learn, by power x accuracy x STAB, topped
+    up with its other moves (in learnset order) when it has fewer than four.
+    """
+    species = game_data.pokemon_species(species_name)
+    typing = [species.type1] + ([species.type2] if species.type2 else [])
+
+    def strength(move):
+        return (move.power or 0) * (move.accuracy or 1.0) * (1.5 if move.type in typing else 1)
+
+    moves = [move for move in map(game_data.move, game_data.learnset(species_name)) if move is not None]
+    moves = sorted((move for move in moves if move.power), key=strength, reverse=True) + [move for move in moves if not move.power]
+    return [move.name for move in moves[:4]]
+
+
+def build_pokemon(species_name, moves, level=DEFAULT_LEVEL):
+    """A battle-ready Pokémon of the species with the given move names."""
+    from pokemon import Pokemon
+
+    species = game_data.pokemon_species(species_name)
+    return Pokemon(
+        name=species.name.capitalize(),
+        typing=[species.type1] + ([species.type2] if species.type2 else []),
+        level=level,
+        base_stats={"hp": species.base_hp, "attack": species.base_attack, "defense": species.base_defense,
+                    "sp_attack": species.base_sp_attack, "sp_defense": species.base_sp_defense, "speed": species.base_speed},
+        ability=species.ability1,
+        nature="hardy",
+        moves={move: game_data.battle_move(move) for move in moves},
+    )
+
+
+# ---------------------- RESULTS FILE ---------------------- #
+
+def new_results(species):
+    n = len(species)
+    results = {column: np.zeros((n, n), dtype=dtype) for column, dtype in COLUMNS.items()}
+    results["ci_high"][:] = 1.0
+    return results
+
+
+def load_results(filename, species):
+    """Columns of a previous run over the same species list, or fresh ones if the file doesn't exist."""
+    if not os.path.exists(filename):
+        return new_results(species)
+    with np.load(filename) as data:
+        if data["species"].tolist() != list(species):
+            raise ValueError(f"{filename} holds results for a different species list")
+        return {column: data[column].astype(dtype) for column, dtype in COLUMNS.items()}
+
+
+def save_results(filename, species, movesets, results):
+    # Written to a temporary file first, so an interrupted save never corrupts earlier results
+    with open(filename + ".tmp", "wb") as f:
+        np.savez(f, species=np.array(species), movesets=json.dumps(movesets), **results)
+    os.replace(filename + ".tmp", filename)
+
+
+def wilson_interval(wins, battles, z=Z_95):
+    """95% Wilson score interval of a win rate (works element-wise on arrays)."""
+    battles = np.maximum(battles, 1)
+    rate = wins / battles
+    denominator = 1 + z**2 / battles
+    center = (rate + z**2 / (2 * battles)) / denominator
+    half_width = z * np.sqrt(rate * (1 - rate) / battles + z**2 / (4 * battles**2)) / denominator
+    return center - half_width, center + half_width
+
+
+# ---------------------- WORKERS ---------------------- #
+
+# Per-process state set by init_worker: Pokémon are built once per species, then reused for every pair
+worker_pokemon = {}
+worker_config = {}
+
+
+def init_worker(movesets, level, max_turns, max_battles, batch_size, tolerance, seed):
+    worker_config.update(movesets=movesets, level=level, max_turns=max_turns, max_battles=max_battles,
+                         batch_size=batch_size, tolerance=tolerance, seed=seed)
+
+
+def get_pokemon(species_name):
+    if species_name not in worker_pokemon:
+        worker_pokemon[species_name] = build_pokemon(species_name, worker_config["movesets"][species_name], worker_config["level"])
+    return worker_pokemon[species_name]
+
+
+def run_pair(task):
+    """
+    Continue one pair from its stored counts until it is final.
+    Each batch is seeded from (seed, i, j, battles so far), so results don't depend on the
+    worker count or on where a run was interrupted.
+    """
+    i, j, name1, name2, battles, wins, losses = task
+    config = worker_config
+    pokemon1, pokemon2 = get_pokemon(name1), get_pokemon(name2)
+    while battles < config["max_battles"]:
+        n = min(config["batch_size"], config["max_battles"] - battles)
+        seed = np.random.SeedSequence(config["seed"], spawn_key=(i, j, battles))
+        result = simulate_matchup(pokemon1, pokemon2, n, config["max_turns"], seed=seed)
+        battles, wins, losses = battles + n, wins + result.wins1, losses + result.wins2
+
+        low, high = wilson_interval(wins, battles)
+        if high - low <= config["tolerance"]:
+            break
+    return i, j, battles, wins, losses
+
+
+# ---------------------- MATRIX ---------------------- #
+
+def matchup_matrix(species, filename, movesets=None, max_battles=1000, batch_size=200, tolerance=0.05,
+                   level=DEFAULT_LEVEL, max_turns=100, workers=None, seed=None, checkpoint_interval=60):
+    """
+    Fill in the matchup matrix of `species` in `filename` and return its columns.
+    `movesets` maps species names to move names (default_moveset for the others). Pairs stop
+    once their interval's width is at most `tolerance`, or after `max_battles` battles.
+    Without a seed every run draws fresh entropy (so resumed pairs aren't reproducible).
+    """
+    movesets = {name: list((movesets or {}).get(name) or default_moveset(name)) for name in species}
+    results = load_results(filename, species)
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+
+    # Pairs stopped by an earlier, lower --battles are picked up again unless their interval is already tight
+    results["final"] = (results["battles"] >= max_battles) | (results["ci_high"] - results["ci_low"] <= tolerance)
+    pending = np.argwhere(~results["final"])
+    tasks = [(int(i), int(j), species[i], species[j], int(results["battles"][i, j]),
+              int(results["wins"][i, j]), int(results["losses"][i, j])) for i, j in pending]
+    print(f"{len(species)} species: {len(species)**2 - len(tasks)} pairs final, {len(tasks)} to run")
+
+    initargs = (movesets, level, max_turns, max_battles, batch_size, tolerance, seed)
+    last_save = time.time()
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=initargs) as pool:
+        chunksize = max(1, min(64, len(tasks) // (4 * (workers or os.cpu_count() or 1))))
+        for done, (i, j, battles, wins, losses) in enumerate(pool.map(run_pair, tasks, chunksize=chunksize), 1):
+            results["battles"][i, j], results["wins"][i, j], results["losses"][i, j] = battles, wins, losses
+            results["win_rate"][i, j] = wins / battles
+            results["ci_low"][i, j], results["ci_high"][i, j] = wilson_interval(wins, battles)
+            results["final"][i, j] = True
+
+            if time.time() - last_save > checkpoint_interval:
+                save_results(filename, species, movesets, results)
+                last_save = time.time()
+                print(f"{done}/{len(tasks)} pairs done")
+
+    save_results(filename, species, movesets, results)
+    print(f"Matchup matrix saved to {filename}")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pairwise 1v1 win-rate matrix over the species database.")
+    parser.add_argument("species", nargs="*", help="species names (as in pokemon_db)")
+    parser.add_argument("--all", action="store_true", help="use every species in the database")
+    parser.add_argument("--movesets", help="JSON file mapping species names to lists of move names")
+    parser.add_argument("-o", "--output", default="matchups.npz")
+    parser.add_argument("--battles", type=int, default=1000, help="maximum battles per ordered pair")
+    parser.add_argument("--batch-size", type=int, default=200, help="battles simulated between interval checks")
+    parser.add_argument("--tolerance", type=float, default=0.05, help="stop a pair once its 95%% interval is this narrow")
+    parser.add_argument("--level", type=int, default=DEFAULT_LEVEL)
+    parser.add_argument("--max-turns", type=int, default=100)
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--checkpoint", type=float, default=60, help="seconds between saves of partial results")
+    args = parser.parse_args(argv)
+
+    species = [record.name for record in game_data.species.all()] if args.all else args.species
+    unknown = [name for name in species if game_data.pokemon_species(name) is None]
+    if not species or unknown:
+        parser.error(f"unknown species: {', '.join(unknown)}" if unknown else "give species names or --all")
+
+    movesets = None
+    if args.movesets:
+        with open(args.movesets) as f:
+            movesets = json.load(f)
+
+    matchup_matrix(species, args.output, movesets, args.battles, args.batch_size, args.tolerance,
+                   args.level, args.max_turns, args.workers, args.seed, args.checkpoint)
+
+
+if __name__ == "__main__":
+    main()
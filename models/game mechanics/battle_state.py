@@ -4,6 +4,8 @@ from typing import List, Optional, Dict
 from models.pokemon.pokemon_inbattle import PokemonInBattle
 from models.pokemon.move import Move, create_move
 
+STRUGGLE = "struggle"  # Move used when a Pokémon has no choice (names in the Moves table are lowercase)
+
 @dataclass
 class BattleState:
     """Manages the state of a Pokémon battle, including turn order, effects, and battle progression."""
@@ -29,8 +31,9 @@ class BattleState:
             self.field_effects[effect] -= 1
 
     
-    def get_move_priority(self, move_name, user: PokemonInBattle):
-        move = create_move(move_name)
+    def get_move_priority(self, move, user: PokemonInBattle):
+        if isinstance(move, str):
+            move = create_move(move)
         priority = move.priority
         if user.pokemon.ability == "prankster" and move.category == "status":
             priority +=1
@@ -51,17 +54,18 @@ class BattleState:
         :return: List of Pokémon in the order they will act.
         """
         all_pokemon = self.trainer_pokemon + self.opponent_pokemon
+        moves = {pkmn: create_move(move_choices.get(pkmn, STRUGGLE)) for pkmn in all_pokemon}
 
         # Get priority levels for each Pokémon based on their selected move
         priority_map = {
-            pkmn: self.get_move_priority(move_choices.get(pkmn, "Struggle"), pkmn) 
+            pkmn: self.get_move_priority(moves[pkmn], pkmn) 
             for pkmn in all_pokemon
         }
 
         # Determine if Quick Draw, Quick Claw, or Custap Berry activates
         quick_effects = {}
         for pkmn in all_pokemon:
-            move = create_move(move_choices.get(pkmn, "Struggle"))
+            move = moves[pkmn]
             is_damaging = move.category != "status"
 
             # Check Quick Draw first (supersedes other effects)
@@ -122,11 +126,11 @@ class BattleState:
             return
 
         self.turn_count += 1
-        turn_order = self.get_turn_order()
+        turn_order = self.get_turn_order(move_choices)
 
         for pokemon in turn_order:
             if pokemon.pokemon.current_hp > 0:  # Only active Pokémon can act
-                move_name = move_choices.get(pokemon, "Struggle")  # Default to Struggle if no move selected
+                move_name = move_choices.get(pokemon, STRUGGLE)  # Default to Struggle if no move selected
                 print(f"{pokemon.pokemon.name} used {move_name}!")
                 # TODO: Implement actual move execution logic
 
@@ -1,47 +1,43 @@
 from typing import Optional, Dict, List, Tuple
 from dataclasses import dataclass, field
-import sqlite3
-import json
+import game_data
+
+MULTI_HIT_CHANCES = [(2, 0.375), (3, 0.375), (4, 0.125), (5, 0.125)]  # Same odds as battle_logic
+STATS = ["attack", "defense", "sp_attack", "sp_defense", "speed"]
 
 def create_move(move_name: str):
-    """Fetches a move from the SQLite database and returns a Move object."""
+    """Builds a Move object from the cached move database record."""
     
-    db_path = "database/move.db"  # Replace with your actual database path
-
-    with sqlite3.connect(db_path) as conn:
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT name, info, move_type, category, power, ignores_accuracy, accuracy, pp, makes_contact, 
-                   move_target, priority, multi_hit, stat_modifiers, status_change, heals, 
-                   damage_heals
-            FROM moves
-            WHERE name = ?
-        """, (move_name,))
-        
-        move_data = cursor.fetchone()  # Fetch one record
+    move_data = game_data.move(move_name)
 
     if move_data is None:
         raise ValueError(f"Move '{move_name}' not found in database.")
 
-    # Map database fields to Move class
+    # Stat multipliers that aren't 1, per side
+    stat_change = {}
+    for side, prefix in (("user", "stat_user_"), ("target", "stat_opp_")):
+        changes = {stat: getattr(move_data, prefix + stat) for stat in STATS if getattr(move_data, prefix + stat) != 1}
+        if changes:
+            stat_change[side] = changes
+
+    # Map database fields to Move class (the Moves table has no PP, contact or target columns)
     return Move(
-        name=move_data[0],
-        info=move_data[1],
-        move_type=move_data[2],
-        category=move_data[3],
-        power=move_data[4],
-        ignores_accuracy=bool(move_data[5]),
-        accuracy=move_data[6],
-        pp=move_data[7],
-        makes_contact=bool(move_data[8]),
-        move_target=move_data[9],
-        priority=move_data[10],
-        multi_hit=json.loads(move_data[11]) if move_data[11] else [],
-        stat_change=json.loads(move_data[12]) if move_data[12] else {},
-        status_change=move_data[13],
-        heals=move_data[14],
-        damage_heals=move_data[15],
+        name=move_data.name,
+        info=move_data.effect,
+        move_type=move_data.type,
+        category=move_data.effective_state,
+        power=move_data.power,
+        ignores_accuracy=move_data.accuracy is None,
+        accuracy=move_data.accuracy,
+        pp=None,
+        makes_contact=False,
+        move_target=None,
+        priority=move_data.priority,
+        multi_hit=list(MULTI_HIT_CHANCES) if move_data.multi_hit else [],
+        stat_change=stat_change,
+        status_change=None if move_data.status_change == "none" else move_data.status_change,
+        heals=move_data.heals or None,
+        damage_heals=bool(move_data.damage_heals),
     )
 
 @dataclass
@@ -50,12 +46,12 @@ class Move:
     info: str
     move_type: str
     category: str
-    power: Optional[int] = None 
-    ignores_accuracy: bool = False
     accuracy: Optional[int]
     pp: int
     makes_contact: bool
     move_target: str
+    power: Optional[int] = None 
+    ignores_accuracy: bool = False
     priority: int = 0 
     multi_hit: Optional[List[Tuple[int, float]]] = field(default_factory=list)  # Hit count mapped to probability
     stat_change: Optional[Dict[str, Dict[str, int]]] = field(default_factory=dict) # Changes stats of target/user
@@ -2,8 +2,9 @@ from dataclasses import dataclass, field
 from typing import Optional, Dict
 from models.pokemon.pokemon_ingame import PokemonInGame
 import random
+import stats
 
-@dataclass
+@dataclass(eq=False)  # Compared and hashed by identity: BattleState keys its move choices by Pokémon
 class PokemonInBattle:
     """Represents a Pokémon in an active battle, tracking temporary battle-related stats and conditions."""
 
@@ -40,13 +41,8 @@ class PokemonInBattle:
     
     def update_current_stats(self):
         """Recalculate current stats based on stat stages."""
-        stage_multipliers = {
-            -6: 2/8, -5: 2/7, -4: 2/6, -3: 2/5, -2: 2/4, -1: 2/3,
-             0: 1, 1: 3/2, 2: 4/2, 3: 5/2, 4: 6/2, 5: 7/2, 6: 8/2
-        }
-
         for stat, stage in self.stat_stages.items():
-            self.current_stats[stat] = int(self.pokemon.actual_stats[stat] * stage_multipliers[stage])
+            self.current_stats[stat] = int(self.pokemon.actual_stats[stat] * stats.STAGE_MULTIPLIERS[stage + 6])
 
 
     def take_damage(self, damage):
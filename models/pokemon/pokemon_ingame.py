@@ -3,8 +3,8 @@ import sqlite3
 from dataclasses import dataclass, field
 from typing import List, Dict, Optional
 from models.pokemon.move import Move, create_move
-from pokemon_dex_info import PokemonDexInfo
-from collections import defaultdict
+from models.pokemon.pokemon_dex_info import PokemonDexInfo
+import stats
 
 def generate_unique_pokemon_id():
     """Generate a unique Pokémon ID that does not exist in the database."""
@@ -60,50 +60,21 @@ class PokemonInGame:
 
 
     def nature_effect_calc(self, nature):
-        """Applies the nature's effect to the Pokémon's stats using a defaultdict (default = 1.0)."""
-
-        nature_modifiers = {
-            "adamant":  defaultdict(lambda: 1.0, {"Atk": 1.1, "SpA": 0.9}),
-            "modest":   defaultdict(lambda: 1.0, {"SpA": 1.1, "Atk": 0.9}),
-            "jolly":    defaultdict(lambda: 1.0, {"Spe": 1.1, "SpA": 0.9}),
-            "bold":     defaultdict(lambda: 1.0, {"Def": 1.1, "Atk": 0.9}),
-            "calm":     defaultdict(lambda: 1.0, {"SpD": 1.1, "Atk": 0.9}),
-            "careful":  defaultdict(lambda: 1.0, {"SpD": 1.1, "SpA": 0.9}),
-            "timid":    defaultdict(lambda: 1.0, {"Spe": 1.1, "Atk": 0.9}),
-            "relaxed":  defaultdict(lambda: 1.0, {"Def": 1.1, "Spe": 0.9}),
-            "naive":    defaultdict(lambda: 1.0, {"Spe": 1.1, "SpD": 0.9}),
-            "brave":    defaultdict(lambda: 1.0, {"Atk": 1.1, "Spe": 0.9}),
-            "quiet":    defaultdict(lambda: 1.0, {"SpA": 1.1, "Spe": 0.9}),
-            "rash":     defaultdict(lambda: 1.0, {"SpA": 1.1, "SpD": 0.9}),
-            "gentle":   defaultdict(lambda: 1.0, {"SpD": 1.1, "Def": 0.9}),
-            "hasty":    defaultdict(lambda: 1.0, {"Spe": 1.1, "Def": 0.9}),
-            "sassy":    defaultdict(lambda: 1.0, {"SpD": 1.1, "Spe": 0.9}),
-            "docile":   defaultdict(lambda: 1.0, {}),
-            "hardy":    defaultdict(lambda: 1.0, {}),
-            "serious":  defaultdict(lambda: 1.0, {}),
-            "bashful":  defaultdict(lambda: 1.0, {}),
-            "quirky":   defaultdict(lambda: 1.0, {})
-        }
-
-        # Apply multipliers to stats
-        nature_effects = nature_modifiers.get(nature, defaultdict(lambda: 1.0, {}))
-        return {stat: nature_effects[stat] for stat in ["Atk", "Def", "SpA", "SpD", "Spe"]}
+        """Look up the nature's stat multipliers in the precomputed nature table (default = 1.0)."""
+        return stats.nature_effect(nature)
 
     def calc_initial_stats(self):
         """Calculate and return Pokémon's stats based on base stats, EVs, IVs, level, and nature."""
-
-        def calc_max_hp():
-            """Calculate and return the maximum HP of the Pokémon."""
-            if self.pokemon_dex_info.name == "Shedinja":
-                return 1  # Shedinja always has 1 HP due to its ability
-            return int(((2 * self.pokemon_dex_info.base_stats["HP"] + self.ivs["HP"] + (self.evs["HP"] // 4)) * self.level / 100) + self.level + 10)
-
-        def calculate_stat(stat, nature_modifier):
-            return int(((2 * self.pokemon_dex_info.base_stats[stat] + self.ivs[stat] + (self.evs[stat] // 4)) * self.level / 100 + 5) * nature_modifier)
-        
-        nature_effect = self.nature_effect_calc(self.nature)
-        initial_stats = {"HP": calc_max_hp()}
-        initial_stats.update({stat: calculate_stat(stat, nature_effect[stat]) for stat in ["Atk", "Def", "SpA", "SpD", "Spe"]})
+        base_stats = self.pokemon_dex_info.base_stats
+        if self.pokemon_dex_info.name == "Shedinja":
+            max_hp = 1  # Shedinja always has 1 HP due to its ability
+        else:
+            max_hp = stats.calc_hp(base_stats["HP"], self.ivs["HP"], self.evs["HP"], self.level)
+
+        nature_effect = stats.NATURE_EFFECTS.get(self.nature, stats.NEUTRAL_NATURE)
+        initial_stats = {"HP": max_hp}
+        initial_stats.update({stat: stats.calc_stat(base_stats[stat], self.ivs[stat], self.evs[stat], self.level, nature_effect[stat])
+                              for stat in stats.STATS})
         return initial_stats
 
     def assign_moves(self):
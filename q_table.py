@@ -0,0 +1,272 @@
+import os
+import pickle
+import struct
+import numpy as np
+import typeRelation
+
+# -------------------- STATE ENCODING -------------------- #
+# A battle state is packed into one integer from (HP bucket, typing, status) of both Pokémon.
+# Bump STATE_SCHEMA whenever the layout below changes: saved tables record it.
+STATE_SCHEMA = 1
+
+HP_BUCKETS = 8  # Bucket 0 = fainted, buckets 1-7 = share of max HP
+STATUSES = (None, "burn", "poison", "badly_poison", "paralyze", "sleep", "freeze")
+STATUS_INDEX = {status: i for i, status in enumerate(STATUSES)}
+N_STATUSES = len(STATUSES) + 1  # Last code = any other status
+N_TYPINGS = len(typeRelation.TYPES) ** 2
+N_ACTIONS = 4  # One Q-value per move slot
+
+def move_slots(pokemon):
+    """Move names of a Pokémon in slot order; raises ValueError if they don't fit in a Q-table row."""
+    moves = list(pokemon.moves)
+    if len(moves) > N_ACTIONS:
+        raise ValueError(f"{pokemon.name} has {len(moves)} moves, Q-table rows hold {N_ACTIONS}")
+    return moves
+
+def hp_bucket(hp, max_hp):
+    """Bucket HP: 0 when fainted, otherwise 1 to HP_BUCKETS - 1 by share of max HP."""
+    if hp <= 0:
+        return 0
+    return 1 + (min(hp, max_hp) - 1) * (HP_BUCKETS - 1) // max_hp
+
+def typing_id(typing):
+    type1, type2 = typeRelation.type_ids(typing)
+    return type1 * len(typeRelation.TYPES) + type2
+
+def status_id(status):
+    return STATUS_INDEX.get(status, N_STATUSES - 1)
+
+def encode(attacker_hp, attacker_max_hp, attacker_typing, attacker_status,
+           defender_hp, defender_max_hp, defender_typing, defender_status):
+    """Pack the raw state fields of both Pokémon into one integer."""
+    state = hp_bucket(attacker_hp, attacker_max_hp) * HP_BUCKETS + hp_bucket(defender_hp, defender_max_hp)
+    state = (state * N_TYPINGS + typing_id(attacker_typing)) * N_TYPINGS + typing_id(defender_typing)
+    return (state * N_STATUSES + status_id(attacker_status)) * N_STATUSES + status_id(defender_status)
+
+def encode_state(attacker, defender):
+    """Encode the battle state as a single integer index for Q-table lookup."""
+    return encode(attacker.hp, attacker.max_hp, attacker.typing, attacker.status,
+                  defender.hp, defender.max_hp, defender.typing, defender.status)
+
+
+# -------------------- Q-TABLE -------------------- #
+EMPTY = -1
+HASH_MULTIPLIER = 0x9E3779B97F4A7C15  # Fibonacci hashing constant
+
+class QTable:
+    """
+    Q-values of encoded states, stored in NumPy arrays: an open-addressing hash of int64
+    state keys (linear probing) with one row of `n_actions` values and visit counts per key.
+    Missing states read as all-zero rows.
+    """
+
+    def __init__(self, n_actions=N_ACTIONS, capacity=1024):
+        capacity = 1 << max(3, (capacity - 1).bit_length())  # Power of two for masking
+        self.n_actions = n_actions
+        self.keys = np.full(capacity, EMPTY, dtype=np.int64)
+        self.values = np.zeros((capacity, n_actions), dtype=np.float32)
+        self.visits = np.zeros((capacity, n_actions), dtype=np.uint32)
+        self.count = 0
+        self.zero_row = np.zeros(n_actions, dtype=np.float32)
+        self.zero_row.flags.writeable = False
+
+    @classmethod
+    def from_arrays(cls, keys, values, visits, count):
+        """Wrap existing hash arrays (e.g. memory-mapped ones) without copying them."""
+        table = cls(values.shape[1], capacity=8)
+        table.keys, table.values, table.visits, table.count = keys, values, visits, count
+        return table
+
+    def __len__(self):
+        return self.count
+
+    def home_slot(self, state):
+        bits = len(self.keys).bit_length() - 1
+        return ((state * HASH_MULTIPLIER) & 0xFFFFFFFFFFFFFFFF) >> (64 - bits)
+
+    def find(self, state):
+        """Slot of `state`, or -1 if it isn't in the table."""
+        mask = len(self.keys) - 1
+        slot = self.home_slot(state)
+        while True:
+            key = self.keys[slot]
+            if key == state:
+                return slot
+            if key == EMPTY:
+                return -1
+            slot = (slot + 1) & mask
+
+    def insert(self, state):
+        """Slot of `state`, adding it with zeroed Q-values if needed."""
+        slot = self.find(state)
+        if slot >= 0:
+            return slot
+        if (self.count + 1) * 2 > len(self.keys):  # Keep the load factor under 1/2
+            self.resize(len(self.keys) * 2)
+
+        mask = len(self.keys) - 1
+        slot = self.home_slot(state)
+        while self.keys[slot] != EMPTY:
+            slot = (slot + 1) & mask
+        self.keys[slot] = state
+        self.count += 1
+        return slot
+
+    def resize(self, capacity):
+        used = self.keys != EMPTY
+        keys, values, visits = self.keys[used], self.values[used], self.visits[used]
+        self.keys = np.full(capacity, EMPTY, dtype=np.int64)
+        self.values = np.zeros((capacity, self.n_actions), dtype=np.float32)
+        self.visits = np.zeros((capacity, self.n_actions), dtype=np.uint32)
+        self.count = 0
+        for key, row, row_visits in zip(keys.tolist(), values, visits):
+            slot = self.insert(key)
+            self.values[slot] = row
+            self.visits[slot] = row_visits
+
+    def row(self, state):
+        """Q-values of every action in `state` (read-only zeros if unseen)."""
+        slot = self.find(state)
+        return self.values[slot] if slot >= 0 else self.zero_row
+
+    def get(self, state, action):
+        return float(self.row(state)[action])
+
+    def set(self, state, action, value):
+        slot = self.insert(state)
+        self.values[slot, action] = value
+        self.visits[slot, action] += 1
+
+    def best_action(self, state, n_actions):
+        """Index of the highest-valued of the first `n_actions` actions (first one on ties)."""
+        if n_actions > self.n_actions:
+            raise ValueError(f"{n_actions} actions don't fit in rows of {self.n_actions}")
+        return int(np.argmax(self.row(state)[:n_actions]))
+
+    def max_value(self, state, n_actions):
+        if n_actions > self.n_actions:
+            raise ValueError(f"{n_actions} actions don't fit in rows of {self.n_actions}")
+        return float(self.row(state)[:n_actions].max(initial=0 if n_actions == 0 else -np.inf))
+
+    def copy(self, keep_visits=True):
+        table = QTable.__new__(QTable)
+        table.__dict__.update(self.__dict__)
+        table.keys, table.values = self.keys.copy(), self.values.copy()
+        table.visits = self.visits.copy() if keep_visits else np.zeros_like(self.visits)
+        return table
+
+    def visited_rows(self):
+        """(keys, values, visits) of every state with at least one visit."""
+        used = self.visits.any(axis=1)
+        return self.keys[used], self.values[used], self.visits[used]
+
+    def merge(self, deltas):
+        """
+        Merge (keys, values, visits) deltas by visit-weighted averaging per (state, action).
+        Actions no delta visited keep their current value.
+        """
+        deltas = list(deltas)
+        if not deltas:
+            return
+        keys = np.concatenate([keys for keys, _, _ in deltas])
+        values = np.concatenate([values for _, values, _ in deltas]).astype(np.float64)
+        visits = np.concatenate([visits for _, _, visits in deltas]).astype(np.float64)
+
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        weighted = np.zeros((len(unique_keys), self.n_actions))
+        total = np.zeros((len(unique_keys), self.n_actions))
+        np.add.at(weighted, inverse, values * visits)
+        np.add.at(total, inverse, visits)
+
+        slots = np.array([self.insert(key) for key in unique_keys.tolist()], dtype=np.int64)
+        visited = total > 0
+        merged = self.values[slots]
+        merged[visited] = weighted[visited] / total[visited]
+        self.values[slots] = merged
+        self.visits[slots] += total.astype(np.uint32)
+
+
+# -------------------- BINARY FORMAT -------------------- #
+# Header, then the raw hash arrays: keys (int64[capacity]), values (float32[capacity, n_actions])
+# and visits (uint32[capacity, n_actions]). The arrays are used in place, so a read-only
+# memory map shares one page-cache copy between every process that loads the file.
+MAGIC = b"QTAB"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHHHxxQQ4x")  # magic, version, schema, n_actions, capacity, count (32 bytes)
+
+def save_table(table, filename):
+    """Write the table in the binary format (through a temporary file, so readers never see half a table)."""
+    os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+    temp = filename + ".tmp"
+    with open(temp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, STATE_SCHEMA, table.n_actions, len(table.keys), table.count))
+        for array in (table.keys, table.values, table.visits):
+            f.write(np.ascontiguousarray(array).tobytes())
+    os.replace(temp, filename)
+
+def load_table(filename, mode="r"):
+    """
+    Memory-map a binary table. `mode` is the np.memmap mode: "r" (read-only, shared) for
+    inference, "c" (copy-on-write) to keep training on it, or None to read a private copy.
+    Raises ValueError if the file was written with another format, state schema or action count.
+    """
+    with open(filename, "rb") as f:
+        magic, version, schema, n_actions, capacity, count = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"{filename} is not a Q-table file")
+    if version != FORMAT_VERSION or schema != STATE_SCHEMA:
+        raise ValueError(f"{filename} has format {version}, schema {schema}; "
+                         f"expected format {FORMAT_VERSION}, schema {STATE_SCHEMA}")
+    if n_actions != N_ACTIONS:
+        raise ValueError(f"{filename} has {n_actions} actions per state, expected {N_ACTIONS}")
+
+    arrays = []
+    offset = HEADER.size
+    for dtype, shape in ((np.int64, (capacity,)), (np.float32, (capacity, n_actions)), (np.uint32, (capacity, n_actions))):
+        if mode is None:
+            array = np.fromfile(filename, dtype=dtype, count=int(np.prod(shape)), offset=offset).reshape(shape)
+        else:
+            array = np.memmap(filename, dtype=dtype, mode=mode, offset=offset, shape=shape)
+        arrays.append(array)
+        offset += array.nbytes
+    return QTable.from_arrays(*arrays, count)
+
+
+# -------------------- LEGACY IMPORT -------------------- #
+def import_legacy_pickle(filename, pokemons):
+    """
+    Convert a pickled dict Q-table ({(state tuple, move name): Q-value}) to a QTable.
+    Old states hold raw HP and no max HP or move order, so the attacker is the first of
+    `pokemons` with the state's typing that knows the move, and the defender the first with
+    the defender's typing. Old states falling in the same bucket are averaged.
+    Returns (table, number of entries that could not be resolved).
+    """
+    with open(filename, "rb") as f:
+        legacy = pickle.load(f)
+
+    by_typing = {}
+    for pokemon in pokemons:
+        by_typing.setdefault(tuple(pokemon.typing), []).append(pokemon)
+
+    keys, actions, values = [], [], []
+    skipped = 0
+    for ((hp_a, hp_d, typing_a, typing_d, status_a, status_d), move_name), q in legacy.items():
+        attacker = next((p for p in by_typing.get(tuple(typing_a), []) if move_name in p.moves), None)
+        defender = next(iter(by_typing.get(tuple(typing_d), [])), None)
+        if attacker is None or defender is None:
+            skipped += 1
+            continue
+        keys.append(encode(hp_a, attacker.max_hp, typing_a, status_a, hp_d, defender.max_hp, typing_d, status_d))
+        actions.append(list(attacker.moves).index(move_name))
+        values.append(q)
+
+    # Every old entry counts as one visit of its (state, action)
+    row_values = np.zeros((len(keys), N_ACTIONS), dtype=np.float32)
+    row_visits = np.zeros((len(keys), N_ACTIONS), dtype=np.uint32)
+    rows = np.arange(len(keys))
+    row_values[rows, actions] = values
+    row_visits[rows, actions] = 1
+
+    table = QTable(capacity=2 * len(keys))
+    table.merge([(np.array(keys, dtype=np.int64), row_values, row_visits)])
+    return table, skipped
@@ -1,61 +1,58 @@
-import random
-import pickle
+import os
+from concurrent.futures import ProcessPoolExecutor
 from re import L
 import numpy as np
 
 # Import your existing modules
 from pokemon import Pokemon
 from trainer import Trainer
-from battle_logic import calculate_damage, perform_move
+from battle_logic import DamageCache, calculate_damage_batch, damage_inputs, perform_move
 import battle_ai  # Baseline AI from your battle_ai.py
+import battle_log
+import battle_rng
+from battle_log import Event, NullSink
 import typeRelation
+from q_table import QTable, encode_state, import_legacy_pickle, load_table, move_slots, save_table
 
 # -------------------- Q-LEARNING HYPERPARAMETERS -------------------- #
 ALPHA = 0.1      # Learning rate
 GAMMA = 0.9      # Discount factor
 EPSILON = 0.1    # Exploration rate
 
-# Global Q-table: key = (state, action), value = Q-value
-Q_table = {}
+# Global Q-table: one row of Q-values (and visit counts) per encoded state, indexed by move slot
+Q_table = QTable()
 
 # -------------------- UTILITY FUNCTIONS -------------------- #
 def get_Q(state, action):
-    """Retrieve Q-value for a given state-action pair (defaulting to 0)."""
-    return Q_table.get((state, action), 0)
+    """Retrieve Q-value for a given state and move slot (defaulting to 0)."""
+    return Q_table.get(state, action)
 
-def update_Q(state, action, reward, next_state, moves):
-    """Update Q-value for the state-action pair using the Q-learning formula."""
-    max_future_q = max([get_Q(next_state, m) for m in moves], default=0)
+def update_Q(state, action, reward, next_state, n_actions):
+    """Update Q-value for the state and move slot using the Q-learning formula."""
+    max_future_q = Q_table.max_value(next_state, n_actions)
     current_q = get_Q(state, action)
-    Q_table[(state, action)] = current_q + ALPHA * (reward + GAMMA * max_future_q - current_q)
+    Q_table.set(state, action, current_q + ALPHA * (reward + GAMMA * max_future_q - current_q))
 
-def save_Q_table(filename="final_qtable/q_table.pkl"):
-    """Persist the Q-table to disk."""
-    with open(filename, "wb") as f:
-        pickle.dump(Q_table, f)
+def save_Q_table(filename="final_qtable/q_table.qtab"):
+    """Persist the Q-table to disk in the binary Q-table format."""
+    save_table(Q_table, filename)
 
-def load_Q_table(filename="final_qtable/q_table.pkl"):
-    """Load the Q-table from disk."""
+def load_Q_table(filename="final_qtable/q_table.qtab"):
+    """Load the Q-table from disk (copy-on-write, so training never modifies the file)."""
     global Q_table
     try:
-        with open(filename, "rb") as f:
-            Q_table = pickle.load(f)
+        Q_table = load_table(filename, mode="c")
     except FileNotFoundError:
         print("No Q-table found, starting fresh.")
 
-def encode_state(attacker, defender):
-    """
-    Encode the battle state as a tuple.
-    State includes: attacker HP, defender HP, attacker types, defender types, attacker status, defender status.
-    """
-    return (
-        attacker.hp,
-        defender.hp,
-        tuple(attacker.typing),
-        tuple(defender.typing),
-        attacker.status,
-        defender.status
-    )
+def import_legacy_Q_table(filename="final_qtable/q_table.pkl", pokemons=None):
+    """Convert a Q-table pickled by older versions into the current global Q-table."""
+    global Q_table
+    if pokemons is None:
+        pokemons = [charizard, blastoise, venusaur, pikachu, snorlax, alakazam, gengar, dragonite, mewtwo, tauros, mew, gyarados]
+    Q_table, skipped = import_legacy_pickle(filename, pokemons)
+    if skipped:
+        print(f"Skipped {skipped} Q-values of Pokémon not in the given list.")
 
 def choose_move_RL(state, attacker, last_move):
     """
@@ -66,14 +63,15 @@ def choose_move_RL(state, attacker, last_move):
     if last_move and attacker.item["name"] in ["choice-band", "choice-scarf", "choice-specs"]:
         return last_move
 
-    moves = list(attacker.moves.keys())
-    if random.uniform(0, 1) < EPSILON:
-        chosen = random.choice(moves)
-        print(f"[RL] Exploration: Randomly selected move '{chosen}'")
+    moves = move_slots(attacker)
+    if battle_rng.uniform(0, 1) < EPSILON:
+        chosen = battle_rng.choice(moves)
+        battle_log.emit(Event.RL_EXPLORE, attacker.name, chosen)
         return chosen
     else:
-        chosen = max(moves, key=lambda m: get_Q(state, m))
-        print(f"[RL] Exploitation: Selected best move '{chosen}' with Q-value {get_Q(state, chosen):.2f}")
+        slot = Q_table.best_action(state, len(moves))
+        chosen = moves[slot]
+        battle_log.emit(Event.RL_EXPLOIT, attacker.name, chosen, get_Q(state, slot))
         return chosen
 
 def calculate_reward(attacker, defender, move, estimated_damage):
@@ -96,11 +94,9 @@ def calculate_reward(attacker, defender, move, estimated_damage):
     if move["type"] in attacker.typing:
         reward += 10
 
-    effectiveness = 1
     # Type effectiveness evaluation
-    for d_type in defender.typing:
-        effectiveness *= typeRelation.type_relation[move["type"]].get(d_type, 1)
-        
+    effectiveness = typeRelation.effectiveness(move["type"], defender.typing)
+
     if effectiveness == 4:
         reward += 40
     elif effectiveness == 2:
@@ -129,11 +125,11 @@ def calculate_reward(attacker, defender, move, estimated_damage):
     if move["heals"] and attacker.hp <= attacker.max_hp * 0.5:
         reward += 40
 
-    print(f"[Reward] Move '{move['name']}' generated reward: {reward}")
+    battle_log.emit(Event.REWARD, attacker.name, move["name"], reward)
     return reward
 
 # -------------------- RL-BASED BATTLE AI FUNCTION -------------------- #
-def battleAI_RL(attacker, defender, last_move):
+def battleAI_RL(attacker, defender, last_move, cache=None):
     """
     Reinforcement Learning-based move selection.
     1. Encode current state.
@@ -141,17 +137,19 @@ def battleAI_RL(attacker, defender, last_move):
     3. Estimate damage and calculate reward.
     4. Update Q-table based on the transition.
     5. Return the chosen move.
+    `cache` is an optional DamageCache shared with the rest of the battle.
     """
     state = encode_state(attacker, defender)
     move_name = choose_move_RL(state, attacker, last_move)
     move = attacker.moves[move_name]
 
     # Estimate damage (for reward calculation) but note that perform_move will change the state
-    estimated_damage = calculate_damage(attacker, defender, move)
-    print(f"[RL] Estimated damage by '{move['name']}': {estimated_damage}")
+    inputs = damage_inputs(attacker, defender, [move]) if cache is None else cache.inputs(attacker, defender, [move])
+    estimated_damage = int(calculate_damage_batch(**inputs)[0])
+    battle_log.emit(Event.RL_ESTIMATE, attacker.name, move["name"], estimated_damage)
 
     # Execute the move and log the outcome
-    perform_move(attacker, defender, move)
+    perform_move(attacker, defender, move, cache)
 
     # Calculate reward based on move outcome
     reward = calculate_reward(attacker, defender, move, estimated_damage)
@@ -160,9 +158,11 @@ def battleAI_RL(attacker, defender, last_move):
     next_state = encode_state(attacker, defender)
     
     # Update Q-table using the attacker's available moves
-    update_Q(state, move_name, reward, next_state, list(attacker.moves.keys()))
+    moves = move_slots(attacker)
+    slot = moves.index(move_name)
+    update_Q(state, slot, reward, next_state, len(moves))
     
-    print(f"[RL] Updated Q-value for state {state} and action '{move_name}': {get_Q(state, move_name):.2f}")
+    battle_log.emit(Event.Q_UPDATE, attacker.name, move_name, get_Q(state, slot))
     return move_name
 
 # -------------------- SIMULATION LOOP -------------------- #
@@ -171,18 +171,16 @@ def simulate_battle_RL(rl_trainer, opp_trainer):
     Simulate a simplified battle between two trainers with alternating roles.
     On odd turns, the RL-controlled trainer (e.g., Charizard) attacks first.
     On even turns, the opponent (e.g., Blastoise) attacks first.
-    Logs are printed for each battle and move, including updated HP after each move.
+    Every move, damage, faint and Q-update is emitted as a battle event to the current battle_log sink.
     Note: For training, this simulation assumes no switching.
     """
-    print("\n" + "="*40)
-    print("Starting new battle simulation")
-    print("="*40)
-
     # Reset active Pokémon to full HP
     agent = rl_trainer.get_active_pokemon()
     opp = opp_trainer.get_active_pokemon()
     agent.hp = agent.max_hp
     opp.hp = opp.max_hp
+    battle_log.emit(Event.BATTLE_START, agent.name, target=opp.name)
+    cache = DamageCache()
 
     turn = 1
     lastmove1 = None
@@ -191,23 +189,17 @@ def simulate_battle_RL(rl_trainer, opp_trainer):
     while not agent.is_fainted() and not opp.is_fainted():
         if turn >=10:
             break
-        print(f"\n--- Turn {turn} ---")
-        print(f"{agent.name} HP: {agent.hp}/{agent.max_hp}")
-        print(f"{opp.name} HP: {opp.hp}/{opp.max_hp}")
+        battle_log.emit(Event.TURN, value=turn)
         
         if turn % 2 == 1:
             # Odd turn: RL agent attacks first
-            print(f"[Turn Order] {agent.name} (RL Agent) attacks first.")
             if agent.item["name"] in ["choice-band", "choice-scarf", "choice-specs"] and lastmove1:
                 move_rl = lastmove1
             else:
-                move_rl = battleAI_RL(agent, opp, lastmove1)
+                move_rl = battleAI_RL(agent, opp, lastmove1, cache)
                 lastmove1 = move_rl
 
-            print(f"{agent.name} (RL Agent) used '{move_rl}'.")
-            print(f"After move, {opp.name} HP: {opp.hp}/{opp.max_hp}")
             if opp.is_fainted():
-                print(f"{opp.name} fainted!")
                 break
 
             # Opponent selects and executes its move
@@ -215,30 +207,20 @@ def simulate_battle_RL(rl_trainer, opp_trainer):
             lastmove2 = move_opp
             
             # Execute opponent's move
-            perform_move(opp, agent, opp.moves[move_opp])
-            print(f"{opp.name} (Opponent) used '{move_opp}'.")
-            print(f"After move, {agent.name} HP: {agent.hp}/{agent.max_hp}")
+            perform_move(opp, agent, opp.moves[move_opp], cache)
             if agent.is_fainted():
-                print(f"{agent.name} fainted!")
                 break
         else:
             # Even turn: Opponent attacks first
-            print(f"[Turn Order] {opp.name} (Opponent) attacks first.")
             move_opp = battle_ai.battleAI(opp, agent, lastmove2)
             lastmove2 = move_opp
-            perform_move(opp, agent, opp.moves[move_opp])
-            print(f"{opp.name} (Opponent) used '{move_opp}'.")
-            print(f"After move, {agent.name} HP: {agent.hp}/{agent.max_hp}")
+            perform_move(opp, agent, opp.moves[move_opp], cache)
             if agent.is_fainted():
-                print(f"{agent.name} fainted!")
                 break
 
-            move_rl = battleAI_RL(agent, opp, lastmove1)
+            move_rl = battleAI_RL(agent, opp, lastmove1, cache)
             lastmove1 = move_rl
-            print(f"{agent.name} (RL Agent) used '{move_rl}'.")
-            print(f"After move, {opp.name} HP: {opp.hp}/{opp.max_hp}")
             if opp.is_fainted():
-                print(f"{opp.name} fainted!")
                 break
 
         turn += 1
@@ -246,49 +228,113 @@ def simulate_battle_RL(rl_trainer, opp_trainer):
     # Terminal reward: bonus or penalty based on battle outcome
     if opp.is_fainted():
         final_reward = 100
-        print(f"\nBattle result: {agent.name} wins!")
+        battle_log.emit(Event.WIN, agent.name)
     else:
         final_reward = -100
-        print(f"\nBattle result: {opp.name} wins!")
+        battle_log.emit(Event.WIN, opp.name)
     
     # Update Q for terminal state (using the last RL move)
     final_state = encode_state(agent, opp)
-    update_Q(final_state, move_rl, final_reward, final_state, list(agent.moves.keys()))
-    print(f"[Final Update] Terminal reward applied. Final Q-value for move '{move_rl}': {get_Q(final_state, move_rl):.2f}")
+    moves = move_slots(agent)
+    slot = moves.index(move_rl)
+    update_Q(final_state, slot, final_reward, final_state, len(moves))
+    battle_log.emit(Event.Q_UPDATE, agent.name, move_rl, get_Q(final_state, slot))
     
-    print("="*40 + "\n")
     # Return outcome: True if RL agent wins
     return not agent.is_fainted()
 
 # -------------------- TRAINING LOOP -------------------- #
 from battle_test import charizard, blastoise, venusaur, pikachu, snorlax, alakazam, gengar, dragonite, mewtwo, tauros, mew, gyarados
-def train_RL_agent(episodes=50):
+def train_RL_agent(episodes=50, sink=None):
     """
     Train the RL agent by simulating multiple battles.
-    Logs are printed for each battle.
+    Battle events go to `sink` (a NullSink unless given, e.g. battle_log.PrintSink() to watch).
     Adjust the number of episodes as needed.
     """
     load_Q_table()
     pokemons = [charizard, blastoise, venusaur, pikachu, snorlax, alakazam, gengar, dragonite, mewtwo, tauros, mew, gyarados]
-    for rl_agent in pokemons:
-        for base_poke in pokemons:
-            wins = 0
-            for episode in range(episodes):
-                # For training, create new trainers with fresh copies of Pokémon.
-                # Using helper functions to generate new instances.
-                rl_trainer = Trainer("RL_Agent", [rl_agent_pokemon(rl_agent)])
-                opp_trainer = Trainer("Baseline", [baseline_pokemon(base_poke)])
-                
-                print(f"=== Episode {episode+1} ===")
-                result = simulate_battle_RL(rl_trainer, opp_trainer)
-                if result:
-                    wins += 1
-                
-                print(f"Episode {episode+1} complete. Cumulative win rate: {wins / (episode+1):.2f}\n")
+    with battle_log.sink_to(NullSink() if sink is None else sink):
+        for rl_agent in pokemons:
+            for base_poke in pokemons:
+                wins = 0
+                for episode in range(episodes):
+                    # For training, create new trainers with fresh copies of Pokémon.
+                    # Using helper functions to generate new instances.
+                    rl_trainer = Trainer("RL_Agent", [rl_agent_pokemon(rl_agent)])
+                    opp_trainer = Trainer("Baseline", [baseline_pokemon(base_poke)])
+
+                    result = simulate_battle_RL(rl_trainer, opp_trainer)
+                    if result:
+                        wins += 1
+
+                    battle_log.emit(Event.EPISODE, rl_agent.name, value=wins / (episode+1), target=base_poke.name)
     
     save_Q_table()
     print("Training complete. Q-table saved.")
 
+# -------------------- PARALLEL TRAINING LOOP -------------------- #
+def train_shard(q_snapshot, rl_agent, base_poke, episodes, seed):
+    """
+    Worker task: play `episodes` battles of one matchup against a private copy of the Q-table.
+    Returns (delta, wins) where delta is the (keys, values, visits) arrays of every updated state.
+    """
+    global Q_table
+    if seed is not None:
+        battle_rng.seed(seed)
+
+    Q_table = q_snapshot.copy(keep_visits=False)
+    wins = 0
+    with battle_log.sink_to(NullSink()):
+        for _ in range(episodes):
+            rl_trainer = Trainer("RL_Agent", [rl_agent_pokemon(rl_agent)])
+            opp_trainer = Trainer("Baseline", [baseline_pokemon(base_poke)])
+            wins += simulate_battle_RL(rl_trainer, opp_trainer)
+
+    return Q_table.visited_rows(), wins
+
+def merge_Q_deltas(deltas):
+    """
+    Merge worker deltas into the global Q-table by visit-weighted averaging.
+    Deltas are merged in the order given, so a fixed order gives a deterministic table.
+    """
+    Q_table.merge(deltas)
+
+def train_RL_agent_parallel(episodes=50, workers=None, sync_interval=10, seed=None, pokemons=None):
+    """
+    Train the RL agent on every matchup across a process pool.
+    Episodes run in rounds of `sync_interval` per matchup; each round every matchup is a task
+    working on a private copy of the Q-table, and the returned deltas are merged at the end of
+    the round. Every task gets its own seed spawned from `seed` (fresh OS entropy if None), so
+    workers never replay each other's exploration, and with a fixed `seed` the result does not
+    depend on the number of workers. Returns the win rate of every (rl_agent, base_poke) pair.
+    """
+    load_Q_table()
+    if pokemons is None:
+        pokemons = [charizard, blastoise, venusaur, pikachu, snorlax, alakazam, gengar, dragonite, mewtwo, tauros, mew, gyarados]
+    matchups = [(rl_agent, base_poke) for rl_agent in pokemons for base_poke in pokemons]
+    seeds = np.random.SeedSequence(seed)
+    wins = [0] * len(matchups)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, episodes, sync_interval):
+            round_episodes = min(sync_interval, episodes - start)
+            task_seeds = seeds.spawn(len(matchups))
+
+            # Tasks are sent in chunks so the shared snapshot is pickled once per chunk, not per task
+            q_snapshot = Q_table.copy(keep_visits=False)
+            chunksize = max(1, len(matchups) // (4 * (workers or os.cpu_count() or 1)))
+            results = list(pool.map(train_shard, [q_snapshot] * len(matchups),
+                                    [rl_agent for rl_agent, _ in matchups], [base_poke for _, base_poke in matchups],
+                                    [round_episodes] * len(matchups), task_seeds, chunksize=chunksize))
+
+            merge_Q_deltas(delta for delta, _ in results)
+            for i, (_, shard_wins) in enumerate(results):
+                wins[i] += shard_wins
+
+    save_Q_table()
+    print("Training complete. Q-table saved.")
+    return {(rl_agent.name, base_poke.name): wins[i] / episodes for i, (rl_agent, base_poke) in enumerate(matchups)}
+
 # -------------------- HELPER FUNCTIONS TO GENERATE POKÉMON -------------------- #
 def rl_agent_pokemon(rl_agent):
     """
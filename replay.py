@@ -0,0 +1,266 @@
+import hashlib
+import pickle
+import struct
+import zlib
+import typeRelation
+from battle_engine import Battle, SWITCH
+from battle_rng import BattleRNG
+
+# ---------------------- REPLAY FORMAT ---------------------- #
+#
+# A replay holds everything needed to re-run an engine battle exactly:
+#   header       magic, version, winner, turns, checkpoint interval, section sizes
+#   RNG state    where the battle's random stream stood before turn 1 (its seed)
+#   teams        both trainers as they were before turn 1 (zlib-compressed pickle), or with a
+#                team store, the 16-byte digest of that blob in the store
+#   actions      one byte per provider answer, in the order the engine asked for them,
+#                with a TURN_MARKER byte before each turn
+#   checkpoints  every `checkpoint_interval` turns: the turn, the offset of its first action
+#                byte, the RNG state and a compressed battle snapshot
+# Replaying feeds the recorded answers back through providers while the engine redraws the
+# same random numbers from the same stream. Seeking restores the nearest checkpoint at or
+# before the target turn, so at most `checkpoint_interval - 1` turns are re-simulated.
+#
+# Teams make up most of a standalone replay (around 800 bytes for a 1v1). Archives that keep many
+# battles pass a team store (any bytes -> bytes mapping, e.g. a dict or a dbm file): each
+# distinct team blob is stored there once, and a replay shrinks to a couple hundred bytes.
+
+MAGIC = b"PKRP"
+FORMAT_VERSION = 2  # 2: snapshots hold each Pokémon's crit ratio and STAB/crit multipliers
+CHECKPOINT_INTERVAL = 10
+
+HEADER = struct.Struct("<4sHBBHHIIH")  # magic, version, winner (0 = none), flags, turns, interval, teams size, actions size, checkpoints
+RNG_STATE = struct.Struct("<16s16sBIH")  # PCG64 state and increment, buffered uint32 flag and value, index in the block
+CHECKPOINT = struct.Struct("<HII")       # turn, action offset, snapshot size
+
+# Action bytes: side in the top bit, then a move slot, a team index (for switch requests) or a code
+TURN_MARKER = 0xFF
+SWITCH_CODE = 0x7E         # "switch" answer to an action request
+INVALID_INDEX_CODE = 0x7D  # Switch answers outside 0-124 (only ever invalid) all replay as -1
+
+TEAMS_IN_STORE = 1  # Header flag: the teams section is a digest into a team store
+
+# Preset zlib dictionary of the strings every pickled team and snapshot repeats
+ZDICT = pickle.dumps((
+    "trainer", "Trainer", "pokemon", "Pokemon", "name", "team", "active_pokemon", "typing", "level",
+    "base_stats", "stat_stages", "ability", "nature", "evs", "ivs", "item", "moves", "status", "accuracy",
+    "evasion", "critical_stage", "critical_hit", "nature_effect", "initial_stats", "current_stats",
+    "max_hp", "hp", "stats_version", "stab_multiplier", "critical_multiplier", "toxic_counter",
+    "attack", "defense", "sp_attack", "sp_defense", "speed", "HP", "Atk", "Def", "SpA", "SpD", "Spe",
+    "type", "power", "priority", "multi_hit", "StatChange", "statusChange", "effectiveState", "heals",
+    "damageHeals", "physical", "special", "used", "burn", "poison", "badly_poison", "paralyze", "sleep", "freeze",
+) + typeRelation.TYPES, pickle.HIGHEST_PROTOCOL)
+
+
+def pack_rng_state(state):
+    block_state, index = state
+    pcg = block_state["state"]
+    return RNG_STATE.pack(pcg["state"].to_bytes(16, "little"), pcg["inc"].to_bytes(16, "little"),
+                          block_state["has_uint32"], block_state["uinteger"], index)
+
+
+def unpack_rng_state(data, offset=0):
+    state, inc, has_uint32, uinteger, index = RNG_STATE.unpack_from(data, offset)
+    block_state = {"bit_generator": "PCG64",
+                   "state": {"state": int.from_bytes(state, "little"), "inc": int.from_bytes(inc, "little")},
+                   "has_uint32": has_uint32, "uinteger": uinteger}
+    return block_state, index
+
+
+def compress(value):
+    compressor = zlib.compressobj(9, zdict=ZDICT)
+    return compressor.compress(pickle.dumps(value, pickle.HIGHEST_PROTOCOL)) + compressor.flush()
+
+
+def decompress(data):
+    return pickle.loads(zlib.decompressobj(zdict=ZDICT).decompress(data))
+
+
+def team_digest(teams):
+    return hashlib.blake2b(teams, digest_size=16).digest()
+
+
+# ---------------------- RECORDING ---------------------- #
+
+class ReplayRecorder:
+    """Wraps a battle's providers to log their answers, then runs the battle turn by turn."""
+
+    def __init__(self, battle, checkpoint_interval=CHECKPOINT_INTERVAL, team_store=None):
+        if battle.turn != 0:
+            raise ValueError("Replays must be recorded from the start of the battle")
+        self.battle = battle
+        self.checkpoint_interval = checkpoint_interval
+        self.teams = compress(battle.trainers)
+        self.flags = 0
+        if team_store is not None:
+            digest = team_digest(self.teams)
+            if digest not in team_store:
+                team_store[digest] = self.teams
+            self.teams = digest
+            self.flags |= TEAMS_IN_STORE
+        self.rng_state = pack_rng_state(battle.rng.get_state())
+        self.actions = bytearray()
+        self.checkpoints = []
+        battle.providers = tuple(self.recording(side, provider) for side, provider in enumerate(battle.providers))
+
+
+    def recording(self, side, provider):
+        def recorded(request, trainer, opponent, last_move):
+            answer = provider(request, trainer, opponent, last_move)
+            if request == "switch":
+                code = answer if 0 <= answer < INVALID_INDEX_CODE else INVALID_INDEX_CODE
+            elif answer == SWITCH:
+                code = SWITCH_CODE
+            else:
+                code = list(trainer.get_active_pokemon().moves).index(answer)
+            self.actions.append(side << 7 | code)
+            return answer
+        return recorded
+
+
+    def run(self):
+        """Play the battle to the end and return its BattleResult."""
+        battle = self.battle
+        while not battle.is_over():
+            if battle.turn and battle.turn % self.checkpoint_interval == 0:
+                self.checkpoints.append((battle.turn, len(self.actions), pack_rng_state(battle.rng.get_state()),
+                                         compress(battle.snapshot())))
+            self.actions.append(TURN_MARKER)
+            battle.play_turn()
+        return battle.result()
+
+
+    def to_bytes(self):
+        battle = self.battle
+        data = bytearray(HEADER.pack(MAGIC, FORMAT_VERSION, battle.winner or 0, self.flags, battle.turn, self.checkpoint_interval,
+                                     len(self.teams), len(self.actions), len(self.checkpoints)))
+        data += self.rng_state + self.teams + self.actions
+        for turn, offset, rng_state, snapshot in self.checkpoints:
+            data += CHECKPOINT.pack(turn, offset, len(snapshot)) + rng_state + snapshot
+        return bytes(data)
+
+
+def record_battle(battle, checkpoint_interval=CHECKPOINT_INTERVAL, team_store=None):
+    """Run a not yet started battle to the end. Returns (BattleResult, replay bytes)."""
+    recorder = ReplayRecorder(battle, checkpoint_interval, team_store)
+    result = recorder.run()
+    return result, recorder.to_bytes()
+
+
+def save_replay(filename, data):
+    with open(filename, "wb") as f:
+        f.write(data)
+
+
+# ---------------------- PLAYBACK ---------------------- #
+
+class ReplayProvider:
+    """Answers one side's requests from the action bytes, starting at `position`."""
+
+    def __init__(self, actions, side, position=0):
+        self.actions = actions
+        self.side = side
+        self.position = position
+
+
+    def __call__(self, request, trainer, opponent, last_move):
+        # Both sides' answers are interleaved in request order; skip turn markers and the other side's
+        while self.actions[self.position] == TURN_MARKER or self.actions[self.position] >> 7 != self.side:
+            self.position += 1
+        code = self.actions[self.position] & 0x7F
+        self.position += 1
+
+        if request == "switch":
+            return -1 if code == INVALID_INDEX_CODE else code
+        if code == SWITCH_CODE:
+            return SWITCH
+        return list(trainer.get_active_pokemon().moves)[code]
+
+
+class Replay:
+    """
+    A parsed replay. `battle_at(turn)` rebuilds the battle as it stood after that many turns.
+    Replays recorded with a team store need the same store to be read.
+    """
+
+    def __init__(self, data, team_store=None):
+        (magic, version, winner, flags, self.turns, self.checkpoint_interval,
+         teams_size, actions_size, n_checkpoints) = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Not a battle replay")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported replay version {version}")
+        self.winner = winner or None
+
+        offset = HEADER.size
+        self.rng_state = unpack_rng_state(data, offset)
+        offset += RNG_STATE.size
+        self.teams = bytes(data[offset:offset + teams_size])
+        offset += teams_size
+        if flags & TEAMS_IN_STORE:
+            if team_store is None or self.teams not in team_store:
+                raise ValueError("This replay's teams are in a team store that wasn't given")
+            self.teams = bytes(team_store[self.teams])
+        self.actions = bytes(data[offset:offset + actions_size])
+        offset += actions_size
+
+        self.checkpoints = []  # (turn, action offset, RNG state, compressed snapshot)
+        for _ in range(n_checkpoints):
+            turn, action_offset, snapshot_size = CHECKPOINT.unpack_from(data, offset)
+            offset += CHECKPOINT.size
+            rng_state = unpack_rng_state(data, offset)
+            offset += RNG_STATE.size
+            self.checkpoints.append((turn, action_offset, rng_state, bytes(data[offset:offset + snapshot_size])))
+            offset += snapshot_size
+
+
+    def battle_at(self, turn=0, sink=None):
+        """
+        A Battle (with fresh Pokémon) after `turn` turns, ready to continue with play_turn or run.
+        Its providers keep replaying the recorded actions.
+        """
+        turn = max(0, min(turn, self.turns))
+        trainers = decompress(self.teams)
+        rng = BattleRNG()
+        battle = Battle(*trainers, None, None, max_turns=self.turns, sink=sink, rng=rng)
+
+        start = 0, 0, self.rng_state, None
+        for checkpoint in self.checkpoints:
+            if checkpoint[0] <= turn:
+                start = checkpoint
+        _, position, rng_state, snapshot = start
+        if snapshot is not None:
+            battle.restore(decompress(snapshot))
+        rng.set_state(rng_state)
+        battle.providers = (ReplayProvider(self.actions, 0, position), ReplayProvider(self.actions, 1, position))
+
+        while battle.turn < turn:
+            battle.play_turn()
+        return battle
+
+
+    def play(self, sink=None):
+        """Re-run the whole battle (e.g. with a PrintSink to re-watch it) and return its BattleResult."""
+        return self.battle_at(0, sink).run()
+
+
+def verify_replay(data, team_store=None):
+    """
+    Check that a replay re-runs to its recorded outcome, both from the start and when seeking one
+    turn past each checkpoint. Raises ValueError naming the first mismatch.
+    """
+    replay = Replay(data, team_store)
+    starts = [0] + [min(turn + 1, replay.turns) for turn, *_ in replay.checkpoints]
+    for turn in starts:
+        battle = replay.battle_at(turn)
+        if battle.turn != turn:
+            raise ValueError(f"Seeking to turn {turn} stopped at turn {battle.turn}")
+        result = battle.run()
+        if (result.winner, result.turns) != (replay.winner, replay.turns):
+            raise ValueError(f"Replay from turn {turn} ended with winner {result.winner} after {result.turns} turns, "
+                             f"recorded: winner {replay.winner} after {replay.turns} turns")
+
+
+def load_replay(filename, team_store=None):
+    with open(filename, "rb") as f:
+        return Replay(f.read(), team_store)
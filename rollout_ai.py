@@ -0,0 +1,201 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import battle_rng
+from trainer import Trainer
+from battle_engine import Battle, SWITCH
+
+CHOICE_ITEMS = ["choice-band", "choice-scarf", "choice-specs"]
+
+# ---------------------- ROLLOUT POLICIES ---------------------- #
+
+def random_policy(attacker, defender, last_move):
+    """Default rollout policy: a random move (locked into the last one when holding a Choice item)."""
+    if last_move and attacker.item and attacker.item["name"] in CHOICE_ITEMS:
+        return last_move
+    return battle_rng.choice(list(attacker.moves))
+
+
+def legal_actions(trainer, last_move):
+    """Move names the active Pokémon may use, then ("switch", index) for every healthy benched Pokémon."""
+    pokemon = trainer.get_active_pokemon()
+    if last_move and pokemon.item and pokemon.item["name"] in CHOICE_ITEMS:
+        actions = [last_move]
+    else:
+        actions = list(pokemon.moves)
+    actions += [(SWITCH, i) for i, p in enumerate(trainer.team) if i != trainer.active_pokemon and not p.is_fainted()]
+    return actions
+
+
+class RolloutProvider:
+    """Battle-engine provider for one side of a rollout: plays `first` once, then follows `policy`."""
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.first = None
+        self.switch_to = None
+
+
+    def __call__(self, request, trainer, opponent, last_move):
+        if request == "switch":
+            if self.switch_to is not None:
+                index, self.switch_to = self.switch_to, None
+                return index
+            return next(i for i, p in enumerate(trainer.team) if i != trainer.active_pokemon and not p.is_fainted())
+
+        if self.first is not None:
+            action, self.first = self.first, None
+            if isinstance(action, tuple):
+                self.switch_to = action[1]
+                return SWITCH
+            return action
+        return self.policy(trainer.get_active_pokemon(), opponent.get_active_pokemon(), last_move)
+
+
+# ---------------------- ROLLOUTS ---------------------- #
+
+def rollout_battle(trainers, last_move, policy):
+    """Headless battle over the given trainers, resuming mid-battle with side 0 to act next."""
+    battle = Battle(*trainers, RolloutProvider(policy), RolloutProvider(policy))
+    battle.started = True  # The Pokémon are already out: don't rerun switch-in effects
+    battle.last_moves[0] = last_move
+    return battle
+
+
+def score(battle):
+    """1 for a side 0 win, 0 for a loss; unfinished rollouts score side 0's share of the remaining HP."""
+    if battle.winner is not None:
+        return 1.0 if battle.winner == 1 else 0.0
+    own, opp = ([p.hp / p.max_hp for p in trainer.team] for trainer in battle.trainers)
+    total = sum(own) + sum(opp)
+    return sum(own) / total if total else 0.5
+
+
+def evaluate_actions(trainers, last_move, actions, rollouts, depth, policy, deadline=None, seed=None):
+    """
+    Run up to `rollouts` rollouts of each action (round-robin, so every action gets a fair share
+    if the deadline hits first). The trainers are restored to their starting state afterwards.
+    Returns (total score, rollout count) per action. With a `seed`, the rollouts draw from their
+    own stream seeded from it, leaving the current one untouched.
+    """
+    if seed is not None:
+        with battle_rng.use(battle_rng.BattleRNG(seed)):
+            return evaluate_actions(trainers, last_move, actions, rollouts, depth, policy, deadline)
+
+    battle = rollout_battle(trainers, last_move, policy)
+    start = battle.snapshot()
+    scores = [0.0] * len(actions)
+    counts = [0] * len(actions)
+    for _ in range(rollouts):
+        if deadline is not None and time.time() > deadline:
+            break
+        for i, action in enumerate(actions):
+            battle.restore(start)
+            battle.providers[0].first = action
+            battle.max_turns = None if depth is None else battle.turn + depth
+            battle.run()
+            scores[i] += score(battle)
+            counts[i] += 1
+    battle.restore(start)
+    return scores, counts
+
+
+# ---------------------- MONTE CARLO AI ---------------------- #
+
+class MonteCarloAI:
+    """
+    Picks the action with the best average rollout score (win rate, with HP share for rollouts cut
+    off at `depth` turns). Every legal action gets up to `rollouts` rollouts, stopping early once
+    `time_budget` seconds have passed. With `workers`, rollouts are split across a process pool.
+    Every evaluation (and every worker's share of it) draws from its own stream spawned from
+    `seed`, so a fixed seed gives the same choices with or without workers; without a seed the
+    streams are spawned from fresh OS entropy.
+
+    Call it like battleAI, `ai(attacker, defender, last_move)`, for 1v1 move choice, or use
+    `provider()` with the battle engine to also consider switching. The process pool is started
+    on first use and lives until `close()`; use the AI as a context manager to release it:
+
+        with MonteCarloAI(workers=4) as ai:
+            pokemon_battle(trainer1, trainer2, ai=ai)
+    """
+
+    def __init__(self, rollouts=32, depth=None, time_budget=None, workers=None, policy=random_policy, seed=None):
+        self.rollouts = rollouts
+        self.depth = depth
+        self.time_budget = time_budget
+        self.workers = workers
+        self.policy = policy
+        self.seeds = np.random.SeedSequence(seed)
+        self.pool = None
+
+
+    def evaluate(self, trainers, last_move, actions):
+        deadline = None if self.time_budget is None else time.time() + self.time_budget
+        if not self.workers:
+            return evaluate_actions(trainers, last_move, actions, self.rollouts, self.depth, self.policy, deadline,
+                                    self.seeds.spawn(1)[0])
+
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=self.workers)
+        shares = [self.rollouts // self.workers + (i < self.rollouts % self.workers) for i in range(self.workers)]
+        shares = [share for share in shares if share]
+        seeds = self.seeds.spawn(len(shares))
+
+        # Workers get pickled copies of the trainers, so the real battle is never touched
+        futures = [self.pool.submit(evaluate_actions, trainers, last_move, actions, share, self.depth, self.policy, deadline, s)
+                   for share, s in zip(shares, seeds)]
+        scores = [0.0] * len(actions)
+        counts = [0] * len(actions)
+        for future in futures:
+            worker_scores, worker_counts = future.result()
+            for i in range(len(actions)):
+                scores[i] += worker_scores[i]
+                counts[i] += worker_counts[i]
+        return scores, counts
+
+
+    def choose(self, trainer, opponent, last_move):
+        """Best legal action for `trainer`'s active Pokémon: a move name or ("switch", index)."""
+        actions = legal_actions(trainer, last_move)
+        if len(actions) == 1:
+            return actions[0]
+        scores, counts = self.evaluate((trainer, opponent), last_move, actions)
+        averages = [score / count if count else -1.0 for score, count in zip(scores, counts)]
+        return actions[averages.index(max(averages))]
+
+
+    def __call__(self, attacker, defender, last_move):
+        """battleAI-compatible move choice, treating the battle as attacker vs defender alone."""
+        return self.choose(Trainer("Rollout", [attacker]), Trainer("Opponent", [defender]), last_move)
+
+
+    def provider(self):
+        """Battle-engine action provider that can also choose to switch."""
+        pending = []
+
+        def provider(request, trainer, opponent, last_move):
+            if request == "switch":
+                if pending:
+                    return pending.pop()
+                return next(i for i, p in enumerate(trainer.team) if i != trainer.active_pokemon and not p.is_fainted())
+            action = self.choose(trainer, opponent, last_move)
+            if isinstance(action, tuple):
+                pending.append(action[1])
+                return SWITCH
+            return action
+        return provider
+
+
+    def close(self):
+        """Shut down the process pool, if any (a later evaluation starts a new one)."""
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,75 @@
+# ---------------------- BATTLE SNAPSHOTS ---------------------- #
+#
+# A snapshot is one flat tuple holding every value a battle mutates: the battle's own
+# progress (turn, winner, active Pokémon, last and revealed moves) followed by each team
+# member's HP, status, toxic counter, accuracy, evasion, crit stage, crit ratio, STAB and crit
+# multipliers (set by the battle's "initialize" effects), item, current stats and move powers
+# (life-orb, sheer-force and technician change them in place).
+# Taking a snapshot and restoring it are both linear in its size, and snapshots are immutable,
+# so one snapshot can seed any number of search branches without deep-copying a Pokémon.
+
+BATTLE_FIELDS = 9  # turn, winner, started, 2 active indexes, 2 last moves, 2 revealed-move sets
+POKEMON_FIELDS = 10  # Per team member, before its current stats and move powers
+
+
+class SnapshotSchema:
+    """Position of every value in the snapshots of one battle, fixed by its teams' stat keys and moves."""
+
+    def __init__(self, battle):
+        self.layout = []  # (pokemon, stat keys, move names) per team member, side 1 first
+        for trainer in battle.trainers:
+            for pokemon in trainer.team:
+                self.layout.append((pokemon, tuple(pokemon.current_stats), tuple(pokemon.moves)))
+        self.size = BATTLE_FIELDS + sum(POKEMON_FIELDS + len(stats) + len(moves) for _, stats, moves in self.layout)
+
+
+def item_state(item):
+    # Items are small dicts whose "used" flag flips in battle; None once consumed
+    return None if item is None else tuple(item.items())
+
+
+def take_snapshot(battle, schema):
+    """Flatten the battle's current state into a tuple."""
+    trainer1, trainer2 = battle.trainers
+    values = [battle.turn, battle.winner, battle.started, trainer1.active_pokemon, trainer2.active_pokemon,
+              battle.last_moves[0], battle.last_moves[1],
+              frozenset(battle.known_moves[0]), frozenset(battle.known_moves[1])]
+
+    for pokemon, stats, moves in schema.layout:
+        values += (pokemon.hp, pokemon.status, getattr(pokemon, "toxic_counter", 0), pokemon.accuracy,
+                   pokemon.evasion, pokemon.critical_stage, pokemon.critical_hit,
+                   getattr(pokemon, "stab_multiplier", 1.5), getattr(pokemon, "critical_multiplier", 1.5),
+                   item_state(pokemon.item))
+        current_stats = pokemon.current_stats
+        values += [current_stats[stat] for stat in stats]
+        values += [pokemon.moves[move]["power"] for move in moves]
+    return tuple(values)
+
+
+def restore_snapshot(battle, schema, values):
+    """Write a snapshot back into the battle's existing objects."""
+    if len(values) != schema.size:
+        raise ValueError(f"Snapshot has {len(values)} values, this battle's schema expects {schema.size}")
+
+    trainer1, trainer2 = battle.trainers
+    (battle.turn, battle.winner, battle.started, trainer1.active_pokemon, trainer2.active_pokemon,
+     last_move1, last_move2, known_moves1, known_moves2) = values[:BATTLE_FIELDS]
+    battle.last_moves = [last_move1, last_move2]
+    battle.known_moves = (set(known_moves1), set(known_moves2))
+
+    i = BATTLE_FIELDS
+    for pokemon, stats, moves in schema.layout:
+        (pokemon.hp, pokemon.status, pokemon.toxic_counter, pokemon.accuracy,
+         pokemon.evasion, pokemon.critical_stage, pokemon.critical_hit,
+         pokemon.stab_multiplier, pokemon.critical_multiplier, item) = values[i:i + POKEMON_FIELDS]
+        pokemon.item = None if item is None else dict(item)
+        i += POKEMON_FIELDS
+
+        current_stats = pokemon.current_stats
+        for stat in stats:
+            current_stats[stat] = values[i]
+            i += 1
+        for move in moves:
+            pokemon.moves[move]["power"] = values[i]
+            i += 1
+        pokemon.stats_changed()  # Versions only move forward, so cached damage is never stale
@@ -7,3 +7,41 @@ class BaseStats(NamedTuple):
     SpA:int
     SpD:int
     Spe:int
+
+
+# ---------------------- PRECOMPUTED STAT TABLES ---------------------- #
+
+STATS = ("Atk", "Def", "SpA", "SpD", "Spe")  # Stats that natures and stages modify (not HP)
+
+# Boosted and lowered stat of every nature; the neutral ones leave everything at 1.0
+NATURE_CHANGES = {
+    "adamant": ("Atk", "SpA"), "modest": ("SpA", "Atk"), "jolly": ("Spe", "SpA"), "bold": ("Def", "Atk"),
+    "calm": ("SpD", "Atk"), "careful": ("SpD", "SpA"), "timid": ("Spe", "Atk"), "relaxed": ("Def", "Spe"),
+    "naive": ("Spe", "SpD"), "brave": ("Atk", "Spe"), "quiet": ("SpA", "Spe"), "rash": ("SpA", "SpD"),
+    "gentle": ("SpD", "Def"), "hasty": ("Spe", "Def"), "sassy": ("SpD", "Spe"),
+    "docile": None, "hardy": None, "serious": None, "bashful": None, "quirky": None,
+}
+
+NEUTRAL_NATURE = {stat: 1.0 for stat in STATS}
+NATURE_EFFECTS = {nature: {**NEUTRAL_NATURE, **({changes[0]: 1.1, changes[1]: 0.9} if changes else {})}
+                  for nature, changes in NATURE_CHANGES.items()}
+
+# Multiplier of each stat stage from -6 to +6, indexed by stage + 6
+STAGE_MULTIPLIERS = tuple(2 / (2 - stage) if stage < 0 else (2 + stage) / 2 for stage in range(-6, 7))
+
+
+def nature_effect(nature):
+    """Stat multipliers of a nature (a new dict; unknown natures are neutral)."""
+    return dict(NATURE_EFFECTS.get(nature, NEUTRAL_NATURE))
+
+
+def stage_multiplier(stage):
+    return STAGE_MULTIPLIERS[stage + 6]
+
+
+def calc_stat(base, iv, ev, level, nature_modifier=1.0):
+    return int(((2 * base + iv + (ev // 4)) * level / 100 + 5) * nature_modifier)
+
+
+def calc_hp(base, iv, ev, level):
+    return int(((2 * base + iv + (ev // 4)) * level / 100) + level + 10)
@@ -0,0 +1,252 @@
+import argparse
+import os
+import sqlite3
+import time
+import numpy as np
+import game_data
+import stats
+from battle_rng import BattleRNG
+
+# ---------------------- BULK TEAM GENERATION ---------------------- #
+#
+# Random legal teams for training data, generated a chunk at a time with array operations
+# instead of one PokemonInGame (and one move query per move) at a time:
+#   - species data and learnsets are turned into arrays once (TeamTables): base stats per
+#     species, and every species' legal moves as one flat array of move indices with offsets
+#   - species (no duplicates within a team), levels, natures, abilities, IVs, shininess and
+#     up to four distinct learnset moves are drawn for the whole chunk at once
+#   - Pokémon IDs are consecutive blocks of an IdSequence, not random IDs probed for against
+#     the database one by one
+# Teams are structured arrays of shape (teams, team size) with one MEMBER record per Pokémon,
+# holding indices into the tables' species, move and nature names; save_teams stores them
+# with those names, so a file can be read without the databases.
+#
+#   python team_generator.py -n 1000000 --seed 1 -o teams.npz
+#   python team_generator.py -n 1000 --team-size 3 --level 5 100
+
+TEAM_SIZE = 6
+DEFAULT_LEVEL = 50
+SHINY_CHANCE = 0.01  # Same odds as PokemonInGame
+FIRST_POKEMON_ID = 100000
+CHUNK_SIZE = 100_000
+STAT_NAMES = ("HP",) + stats.STATS
+NO_MOVE = 0xFFFF
+
+MEMBER = np.dtype([
+    ("pokemon_id", "<u8"),
+    ("species", "<u2"),     # Index into TeamTables.species_names
+    ("level", "u1"),
+    ("nature", "u1"),       # Index into TeamTables.natures
+    ("ability", "u1"),      # Ability slot of the species (0-2)
+    ("shiny", "?"),
+    ("ivs", "u1", (6,)),    # In STAT_NAMES order
+    ("moves", "<u2", (4,)), # Indices into TeamTables.move_names, NO_MOVE for empty slots
+])
+
+
+class TeamTables:
+    """Species, learnsets and natures as arrays, for the species (default: all) that have legal moves."""
+
+    def __init__(self, species=None):
+        records = [game_data.pokemon_species(name) for name in species] if species else list(game_data.species.all())
+        move_names = [move.name for move in game_data.moves.all()]
+        move_index = {name: i for i, name in enumerate(move_names)}
+        learnsets = {record.name: [move_index[name] for name in game_data.learnset(record.name) if name in move_index]
+                     for record in records if record is not None}
+        records = [record for record in records if record is not None and learnsets[record.name]]
+
+        self.species = tuple(records)
+        self.species_names = tuple(record.name for record in records)
+        self.move_names = tuple(move_names)
+        self.base_stats = np.array([(record.base_hp, record.base_attack, record.base_defense, record.base_sp_attack,
+                                     record.base_sp_defense, record.base_speed) for record in records], dtype=np.int64)
+        self.ability_counts = np.array([sum(ability is not None for ability in (record.ability1, record.ability2, record.ability3))
+                                        for record in records], dtype=np.int64)
+        sizes = [len(learnsets[record.name]) for record in records]
+        self.learnset_sizes = np.array(sizes, dtype=np.int64)
+        self.learnset_offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int64)
+        self.learnset_moves = np.array([move for record in records for move in learnsets[record.name]], dtype=np.uint16)
+        self.natures = tuple(stats.NATURE_CHANGES)
+        self.nature_multipliers = np.array([[stats.NATURE_EFFECTS[nature][stat] for stat in stats.STATS]
+                                            for nature in self.natures])
+
+
+class IdSequence:
+    """Hands out consecutive Pokémon IDs from `start`, a block per call."""
+
+    def __init__(self, start=FIRST_POKEMON_ID):
+        self.next_id = start
+
+
+    @classmethod
+    def from_database(cls, filename, table="ingame_pokemon"):
+        """A sequence starting after the highest pokemon_id of the table (one query), or at FIRST_POKEMON_ID."""
+        conn = sqlite3.connect(filename)
+        try:
+            highest = conn.execute(f"SELECT MAX(pokemon_id) FROM {table}").fetchone()[0]
+        except sqlite3.OperationalError:  # No such table yet
+            highest = None
+        finally:
+            conn.close()
+        return cls(FIRST_POKEMON_ID if highest is None else max(FIRST_POKEMON_ID, highest + 1))
+
+
+    def take(self, count):
+        ids = np.arange(self.next_id, self.next_id + count, dtype=np.uint64)
+        self.next_id += count
+        return ids
+
+
+def sample_without_replacement(generator, sizes, count):
+    """
+    `count` distinct indices in [0, size) per row of `sizes`, as a (rows, count) array; slots
+    past a row's size are -1. Each draw picks among the remaining indices by stepping over
+    the ones already taken, in ascending order.
+    """
+    rows = len(sizes)
+    picks = np.full((rows, count), -1, dtype=np.int64)
+    draws = generator.random((rows, count))
+    for i in range(count):
+        remaining = sizes - i
+        valid = remaining > 0
+        pick = (draws[:, i] * np.maximum(remaining, 1)).astype(np.int64)
+        for taken in np.sort(picks[:, :i], axis=1).T:  # Each row's earlier picks, smallest first (-1 never counts)
+            pick += (taken >= 0) & (pick >= taken)
+        picks[valid, i] = pick[valid]
+    return picks
+
+
+# ---------------------- GENERATOR ---------------------- #
+
+class TeamGenerator:
+    """
+    Random teams of `team_size` different species. `level` is a fixed level or an inclusive
+    (low, high) range; `seed` seeds the draws as in BattleRNG; `ids` is the IdSequence to take
+    Pokémon IDs from.
+    """
+
+    def __init__(self, tables=None, team_size=TEAM_SIZE, level=DEFAULT_LEVEL, seed=None, ids=None):
+        self.tables = tables or TeamTables()
+        if team_size > len(self.tables.species):
+            raise ValueError(f"Teams of {team_size} need at least {team_size} species, there are {len(self.tables.species)}")
+        self.team_size = team_size
+        self.level = (level, level) if isinstance(level, int) else tuple(level)
+        self.generator = BattleRNG(seed).generator
+        self.ids = ids or IdSequence()
+
+
+    def draw_species(self, n_teams):
+        """(n_teams, team_size) species indices with no species twice in a team (duplicate teams are redrawn)."""
+        species = self.generator.integers(0, len(self.tables.species), (n_teams, self.team_size))
+        while True:
+            ordered = np.sort(species, axis=1)
+            duplicates = (ordered[:, 1:] == ordered[:, :-1]).any(axis=1)
+            if not duplicates.any():
+                return species
+            species[duplicates] = self.generator.integers(0, len(self.tables.species), (int(duplicates.sum()), self.team_size))
+
+
+    def generate(self, n_teams):
+        """`n_teams` random teams as a (n_teams, team_size) MEMBER array."""
+        tables, generator = self.tables, self.generator
+        teams = np.zeros((n_teams, self.team_size), dtype=MEMBER)
+        members = teams.reshape(-1)
+        count = len(members)
+
+        species = self.draw_species(n_teams).reshape(-1)
+        members["species"] = species
+        members["pokemon_id"] = self.ids.take(count)
+        members["level"] = generator.integers(self.level[0], self.level[1] + 1, count)
+        members["nature"] = generator.integers(0, len(tables.natures), count)
+        members["ability"] = (generator.random(count) * tables.ability_counts[species]).astype(np.int64)
+        members["shiny"] = generator.random(count) < SHINY_CHANCE
+        members["ivs"] = generator.integers(0, 32, (count, len(STAT_NAMES)))
+
+        picks = sample_without_replacement(generator, tables.learnset_sizes[species], 4)
+        moves = tables.learnset_moves[tables.learnset_offsets[species][:, None] + np.maximum(picks, 0)]
+        members["moves"] = np.where(picks >= 0, moves, NO_MOVE)
+        return teams
+
+
+    def generate_chunks(self, n_teams, chunk_size=CHUNK_SIZE):
+        """`n_teams` teams in MEMBER arrays of at most `chunk_size` teams each."""
+        for start in range(0, n_teams, chunk_size):
+            yield self.generate(min(chunk_size, n_teams - start))
+
+
+# ---------------------- TEAM DATA ---------------------- #
+
+def team_stats(tables, members):
+    """Stats of MEMBER records (no EVs) as an int array of shape members.shape + (6,), in STAT_NAMES order."""
+    base = tables.base_stats[members["species"]]
+    ivs = members["ivs"].astype(np.int64)
+    level = members["level"].astype(np.int64)[..., None]
+    scaled = (2 * base + ivs) * level / 100
+    values = np.empty(base.shape, dtype=np.int64)
+    values[..., 0] = (scaled[..., 0] + level[..., 0] + 10).astype(np.int64)
+    values[..., 1:] = ((scaled[..., 1:] + 5) * tables.nature_multipliers[members["nature"]]).astype(np.int64)
+    shedinja = np.array([name == "shedinja" for name in tables.species_names])[members["species"]]
+    values[..., 0][shedinja] = 1  # Shedinja always has 1 HP due to its ability
+    return values
+
+
+def build_team(tables, team):
+    """Battle-ready Pokémon of one team (a row of MEMBER records)."""
+    from pokemon import Pokemon, STAT_KEYS
+    keys = ("hp",) + STAT_KEYS  # Pokemon's stat keys, in STAT_NAMES order
+
+    pokemon = []
+    for member in team:
+        species = tables.species[member["species"]]
+        moves = [tables.move_names[move] for move in member["moves"] if move != NO_MOVE]
+        pokemon.append(Pokemon(
+            name=species.name.capitalize(),
+            typing=[species.type1] + ([species.type2] if species.type2 else []),
+            level=int(member["level"]),
+            base_stats=dict(zip(keys, (species.base_hp, species.base_attack, species.base_defense,
+                                       species.base_sp_attack, species.base_sp_defense, species.base_speed))),
+            ability=(species.ability1, species.ability2, species.ability3)[member["ability"]],
+            nature=tables.natures[member["nature"]],
+            ivs=dict(zip(keys, member["ivs"].tolist())),
+            moves={move: game_data.battle_move(move) for move in moves},
+        ))
+    return pokemon
+
+
+def save_teams(filename, tables, teams):
+    """Write teams with the species, move and nature names their indices refer to (through a temporary file)."""
+    with open(filename + ".tmp", "wb") as f:
+        np.savez(f, teams=teams, species=np.array(tables.species_names), moves=np.array(tables.move_names),
+                 natures=np.array(tables.natures))
+    os.replace(filename + ".tmp", filename)
+
+
+def load_teams(filename):
+    """(teams, names) of a save_teams file, where names maps "species", "moves" and "natures" to name arrays."""
+    with np.load(filename) as data:
+        return data["teams"], {key: data[key] for key in ("species", "moves", "natures")}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate random legal teams in bulk.")
+    parser.add_argument("-n", "--teams", type=int, default=1000)
+    parser.add_argument("--team-size", type=int, default=TEAM_SIZE)
+    parser.add_argument("--level", type=int, nargs="+", default=[DEFAULT_LEVEL], help="a level, or the lowest and highest level")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--first-id", type=int, default=FIRST_POKEMON_ID, help="first Pokémon ID to hand out")
+    parser.add_argument("-o", "--output", default="teams.npz")
+    args = parser.parse_args(argv)
+    if len(args.level) > 2:
+        parser.error("--level takes one or two levels")
+
+    start = time.time()
+    generator = TeamGenerator(team_size=args.team_size, level=args.level[0] if len(args.level) == 1 else args.level,
+                              seed=args.seed, ids=IdSequence(args.first_id))
+    teams = np.concatenate(list(generator.generate_chunks(args.teams)))
+    save_teams(args.output, generator.tables, teams)
+    print(f"{args.teams} teams written to {args.output} in {time.time() - start:.1f}s "
+          f"(Pokémon IDs {args.first_id} to {generator.ids.next_id - 1})")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
+import battle_log
+from battle_log import Event
+
 class Trainer:
     def __init__(self, name, team):
         self.name = name
@@ -11,17 +14,17 @@ class Trainer:
     def switch_pokemon(self, index):
         """Switch to another Pokémon in the team."""
         if not (0 <= index < len(self.team)):
-            print("Invalid switch! Choose a valid Pokémon index.")
+            battle_log.emit(Event.SWITCH_FAILED, self.name, "invalid", target=index)
             return False
         if index == self.active_pokemon:
-            print(f"{self.name}, {self.team[index].name} is already active!")
+            battle_log.emit(Event.SWITCH_FAILED, self.name, "active", target=self.team[index].name)
             return False
         if self.team[index].is_fainted():
-            print(f"{self.name} cannot switch to {self.team[index].name}, it has fainted!")
+            battle_log.emit(Event.SWITCH_FAILED, self.name, "fainted", target=self.team[index].name)
             return False
 
         self.active_pokemon = index
-        print(f"{self.name} switched to {self.team[index].name}!")
+        battle_log.emit(Event.SWITCH, self.name, self.team[index].name)
         return True
     
     def has_pokemon_left(self):
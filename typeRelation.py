@@ -1,4 +1,5 @@
 from collections import defaultdict
+import numpy as np
 
 # Default to 1x effectiveness if type matchup is missing
 type_relation = defaultdict(lambda: defaultdict(lambda: 1.0))
@@ -34,3 +35,49 @@ STATUS_IMMUNITIES = {
     "ice": ["freeze"]         # Ice-types cannot be frozen
 }
 
+
+# ---------------------- DENSE TYPE TABLES ---------------------- #
+
+# Interned type IDs: each type name maps to a fixed row/column of the tables below
+TYPES = tuple(type_relation.keys())
+TYPE_INDEX = {name: i for i, name in enumerate(TYPES)}
+
+# TYPE_CHART[attacking type, defending type] = multiplier
+TYPE_CHART = np.ones((len(TYPES), len(TYPES)))
+for attacking, matchups in type_relation.items():
+    for defending, multiplier in matchups.items():
+        TYPE_CHART[TYPE_INDEX[attacking], TYPE_INDEX[defending]] = multiplier
+
+# DUAL_TYPE_CHART[attacking type, type1, type2] = combined multiplier against a dual-type defender.
+# A Pokémon never has the same type twice, so mono-types are stored on the (type, type) diagonal.
+DUAL_TYPE_CHART = TYPE_CHART[:, :, None] * TYPE_CHART[:, None, :]
+_ids = np.arange(len(TYPES))
+DUAL_TYPE_CHART[:, _ids, _ids] = TYPE_CHART
+
+# STATUS_IMMUNE[status][type] = True if that type can't receive the status
+STATUS_IMMUNE = {}
+for immune_type, statuses in STATUS_IMMUNITIES.items():
+    for status in statuses:
+        STATUS_IMMUNE.setdefault(status, np.zeros(len(TYPES), dtype=bool))[TYPE_INDEX[immune_type]] = True
+
+
+def type_ids(typing):
+    """Return the (type1, type2) IDs of a typing list; mono-types repeat their only type."""
+    type1 = TYPE_INDEX[typing[0]]
+    return type1, (TYPE_INDEX[typing[1]] if len(typing) > 1 else type1)
+
+
+def effectiveness(move_type, typing):
+    """Combined type multiplier of a move type against a defender's typing, as one table lookup."""
+    type1, type2 = type_ids(typing)
+    return float(DUAL_TYPE_CHART[TYPE_INDEX[move_type], type1, type2])
+
+
+def is_status_immune(status, typing):
+    """Check whether any of the defender's types is immune to the given status."""
+    immune = STATUS_IMMUNE.get(status)
+    if immune is None:
+        return False
+    type1, type2 = type_ids(typing)
+    return bool(immune[type1] or immune[type2])
+